@@ -0,0 +1,181 @@
+"""initial schema
+
+The tables as Base.metadata.create_all built them before migrations existed,
+without the full-text index of products, which 0010 adds. Databases created that
+way are brought under Alembic with ``alembic stamp 0001``.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 01:51:24.711299
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('attributes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('is_filterable', sa.Boolean(), nullable=True),
+    sa.Column('is_required', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('attributes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_attributes_id'), ['id'], unique=False)
+
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('sku', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sku')
+    )
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_id'), ['id'], unique=False)
+
+    op.create_table('regions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code')
+    )
+    with op.batch_alter_table('regions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_regions_id'), ['id'], unique=False)
+
+    op.create_table('rental_periods',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('days', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('rental_periods', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_rental_periods_id'), ['id'], unique=False)
+
+    op.create_table('attribute_values',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('attribute_id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['attribute_id'], ['attributes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('attribute_values', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_attribute_values_id'), ['id'], unique=False)
+
+    op.create_table('product_pricing',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('region_id', sa.Integer(), nullable=False),
+    sa.Column('rental_period_id', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['region_id'], ['regions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['rental_period_id'], ['rental_periods.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id', 'region_id', 'rental_period_id', name='uix_product_region_period')
+    )
+    with op.batch_alter_table('product_pricing', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_pricing_id'), ['id'], unique=False)
+
+    op.create_table('rental_transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('region_id', sa.Integer(), nullable=False),
+    sa.Column('rental_period_id', sa.Integer(), nullable=False),
+    sa.Column('customer_name', sa.String(), nullable=False),
+    sa.Column('customer_email', sa.String(), nullable=False),
+    sa.Column('customer_address', sa.Text(), nullable=False),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('end_date', sa.DateTime(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('status', sa.Enum('CONFIRMED', 'CANCELLED', 'COMPLETED', name='transactionstatus'), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['region_id'], ['regions.id'], ondelete='RESTRICT'),
+    sa.ForeignKeyConstraint(['rental_period_id'], ['rental_periods.id'], ondelete='RESTRICT'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('rental_transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_rental_transactions_date_range', ['start_date', 'end_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_rental_transactions_id'), ['id'], unique=False)
+        batch_op.create_index('ix_rental_transactions_product_status', ['product_id', 'status'], unique=False)
+        batch_op.create_index('ix_rental_transactions_region_status', ['region_id', 'status'], unique=False)
+
+    op.create_table('product_attribute_values',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('attribute_value_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['attribute_value_id'], ['attribute_values.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id', 'attribute_value_id', name='uix_product_attribute_value')
+    )
+    with op.batch_alter_table('product_attribute_values', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_attribute_values_id'), ['id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('product_attribute_values', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_attribute_values_id'))
+
+    op.drop_table('product_attribute_values')
+    with op.batch_alter_table('rental_transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_rental_transactions_region_status')
+        batch_op.drop_index('ix_rental_transactions_product_status')
+        batch_op.drop_index(batch_op.f('ix_rental_transactions_id'))
+        batch_op.drop_index('ix_rental_transactions_date_range')
+
+    op.drop_table('rental_transactions')
+    with op.batch_alter_table('product_pricing', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_pricing_id'))
+
+    op.drop_table('product_pricing')
+    with op.batch_alter_table('attribute_values', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attribute_values_id'))
+
+    op.drop_table('attribute_values')
+    with op.batch_alter_table('rental_periods', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_rental_periods_id'))
+
+    op.drop_table('rental_periods')
+    with op.batch_alter_table('regions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_regions_id'))
+
+    op.drop_table('regions')
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_id'))
+
+    op.drop_table('products')
+    with op.batch_alter_table('attributes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attributes_id'))
+
+    op.drop_table('attributes')
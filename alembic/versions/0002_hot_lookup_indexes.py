@@ -0,0 +1,50 @@
+"""hot lookup indexes
+
+Indexes matched to the router queries: product names (duplicate checks),
+pricing by region and rental period, transactions newest first, and attribute
+values by attribute and value (duplicate checks and lists).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 01:51:43.554162
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('attribute_values', schema=None) as batch_op:
+        batch_op.create_index('ix_attribute_values_attribute_value', ['attribute_id', 'value'], unique=False)
+
+    with op.batch_alter_table('product_pricing', schema=None) as batch_op:
+        batch_op.create_index('ix_product_pricing_region_period', ['region_id', 'rental_period_id'], unique=False)
+        batch_op.create_index('ix_product_pricing_rental_period', ['rental_period_id'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_name'), ['name'], unique=False)
+
+    with op.batch_alter_table('rental_transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_rental_transactions_created', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('rental_transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_rental_transactions_created')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_name'))
+
+    with op.batch_alter_table('product_pricing', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_pricing_rental_period')
+        batch_op.drop_index('ix_product_pricing_region_period')
+
+    with op.batch_alter_table('attribute_values', schema=None) as batch_op:
+        batch_op.drop_index('ix_attribute_values_attribute_value')
+
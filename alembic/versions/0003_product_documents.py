@@ -0,0 +1,76 @@
+"""product documents
+
+Materialised product detail responses, and the triggers that delete a product's
+document whenever one of the rows it was built from changes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 01:58:55.642034
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (name, event, statements) of the SQLite triggers that delete stale documents
+TRIGGERS = (
+    ('product_documents_products_update', 'UPDATE ON products',
+     'DELETE FROM product_documents WHERE product_id = old.id; DELETE FROM product_documents WHERE product_id = new.id;'),
+    ('product_documents_products_delete', 'DELETE ON products',
+     'DELETE FROM product_documents WHERE product_id = old.id;'),
+    ('product_documents_product_attribute_values_insert', 'INSERT ON product_attribute_values',
+     'DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_attribute_values_update', 'UPDATE ON product_attribute_values',
+     'DELETE FROM product_documents WHERE product_id = old.product_id; DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_attribute_values_delete', 'DELETE ON product_attribute_values',
+     'DELETE FROM product_documents WHERE product_id = old.product_id;'),
+    ('product_documents_product_pricing_insert', 'INSERT ON product_pricing',
+     'DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_pricing_update', 'UPDATE ON product_pricing',
+     'DELETE FROM product_documents WHERE product_id = old.product_id; DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_pricing_delete', 'DELETE ON product_pricing',
+     'DELETE FROM product_documents WHERE product_id = old.product_id;'),
+    ('product_documents_attribute_values_update', 'UPDATE ON attribute_values',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = new.id);'),
+    ('product_documents_attribute_values_delete', 'DELETE ON attribute_values',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id);'),
+    ('product_documents_attributes_update', 'UPDATE ON attributes',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = new.id);'),
+    ('product_documents_attributes_delete', 'DELETE ON attributes',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id);'),
+    ('product_documents_regions_update', 'UPDATE ON regions',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = new.id);'),
+    ('product_documents_regions_delete', 'DELETE ON regions',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id);'),
+    ('product_documents_rental_periods_update', 'UPDATE ON rental_periods',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = new.id);'),
+    ('product_documents_rental_periods_delete', 'DELETE ON rental_periods',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id);'),
+)
+
+
+def upgrade() -> None:
+    op.create_table('product_documents',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('etag', sa.String(), nullable=False),
+    sa.Column('last_modified', sa.DateTime(), nullable=True),
+    sa.Column('built_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    if op.get_bind().dialect.name == 'sqlite':
+        for name, on, statements in TRIGGERS:
+            op.execute(f'CREATE TRIGGER IF NOT EXISTS {name} AFTER {on} BEGIN {statements} END')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        for name, *_ in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+    op.drop_table('product_documents')
@@ -0,0 +1,44 @@
+"""revenue rollups
+
+Fill the new table from existing transactions with
+``python -m app.services.revenue_rollups`` after upgrading.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 02:02:47.327318
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('revenue_rollups',
+    sa.Column('region_id', sa.Integer(), nullable=False),
+    sa.Column('rental_period_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('transactions', sa.Integer(), nullable=False),
+    sa.Column('revenue_cents', sa.BigInteger(), nullable=False),
+    sa.Column('booked_days', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['region_id'], ['regions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['rental_period_id'], ['rental_periods.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('region_id', 'rental_period_id', 'product_id', 'day')
+    )
+    with op.batch_alter_table('revenue_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_revenue_rollups_day', ['day', 'region_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('revenue_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_revenue_rollups_day')
+
+    op.drop_table('revenue_rollups')
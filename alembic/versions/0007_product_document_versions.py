@@ -0,0 +1,167 @@
+"""product document versions
+
+Documents get a version that the triggers bump, instead of deleting the document,
+whenever a row it was built from changes. Reads store the documents they build
+only if the version is unchanged, so they no longer take a write lock. PostgreSQL
+gets the triggers too.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 02:31:12.504118
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# (name, event, statements) of the SQLite triggers that create and mark stale documents
+SQLITE_TRIGGERS = (
+    ('product_documents_products_insert', 'INSERT ON products',
+     'INSERT INTO product_documents (product_id, version) VALUES (new.id, 0) ON CONFLICT (product_id) DO NOTHING;'),
+    ('product_documents_products_update', 'UPDATE ON products',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.id; UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.id;'),
+    ('product_documents_products_delete', 'DELETE ON products',
+     'DELETE FROM product_documents WHERE product_id = old.id;'),
+    ('product_documents_product_attribute_values_insert', 'INSERT ON product_attribute_values',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id;'),
+    ('product_documents_product_attribute_values_update', 'UPDATE ON product_attribute_values',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id; UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id;'),
+    ('product_documents_product_attribute_values_delete', 'DELETE ON product_attribute_values',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id;'),
+    ('product_documents_product_pricing_insert', 'INSERT ON product_pricing',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id;'),
+    ('product_documents_product_pricing_update', 'UPDATE ON product_pricing',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id; UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id;'),
+    ('product_documents_product_pricing_delete', 'DELETE ON product_pricing',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id;'),
+    ('product_documents_attribute_values_update', 'UPDATE ON attribute_values',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = new.id);'),
+    ('product_documents_attribute_values_delete', 'DELETE ON attribute_values',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id);'),
+    ('product_documents_attributes_update', 'UPDATE ON attributes',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = new.id);'),
+    ('product_documents_attributes_delete', 'DELETE ON attributes',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id);'),
+    ('product_documents_regions_update', 'UPDATE ON regions',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = new.id);'),
+    ('product_documents_regions_delete', 'DELETE ON regions',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id);'),
+    ('product_documents_rental_periods_update', 'UPDATE ON rental_periods',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = new.id);'),
+    ('product_documents_rental_periods_delete', 'DELETE ON rental_periods',
+     'UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id);'),
+)
+
+# (table, function) of the PostgreSQL row triggers doing the same
+POSTGRES_TRIGGERS = (
+    ('products',
+     "CREATE OR REPLACE FUNCTION product_documents_products() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN INSERT INTO product_documents (product_id, version) VALUES (new.id, 0) ON CONFLICT (product_id) DO NOTHING; ELSIF TG_OP = 'UPDATE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.id; UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.id; ELSIF TG_OP = 'DELETE' THEN DELETE FROM product_documents WHERE product_id = old.id; END IF; RETURN NULL; END $$"),
+    ('product_attribute_values',
+     "CREATE OR REPLACE FUNCTION product_documents_product_attribute_values() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id; ELSIF TG_OP = 'UPDATE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id; UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id; ELSIF TG_OP = 'DELETE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id; END IF; RETURN NULL; END $$"),
+    ('product_pricing',
+     "CREATE OR REPLACE FUNCTION product_documents_product_pricing() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id; ELSIF TG_OP = 'UPDATE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id; UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = new.product_id; ELSIF TG_OP = 'DELETE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id = old.product_id; END IF; RETURN NULL; END $$"),
+    ('attribute_values',
+     "CREATE OR REPLACE FUNCTION product_documents_attribute_values() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN NULL; ELSIF TG_OP = 'UPDATE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = new.id); ELSIF TG_OP = 'DELETE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id); END IF; RETURN NULL; END $$"),
+    ('attributes',
+     "CREATE OR REPLACE FUNCTION product_documents_attributes() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN NULL; ELSIF TG_OP = 'UPDATE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = new.id); ELSIF TG_OP = 'DELETE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id); END IF; RETURN NULL; END $$"),
+    ('regions',
+     "CREATE OR REPLACE FUNCTION product_documents_regions() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN NULL; ELSIF TG_OP = 'UPDATE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = new.id); ELSIF TG_OP = 'DELETE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id); END IF; RETURN NULL; END $$"),
+    ('rental_periods',
+     "CREATE OR REPLACE FUNCTION product_documents_rental_periods() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN IF TG_OP = 'INSERT' THEN NULL; ELSIF TG_OP = 'UPDATE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id); UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = new.id); ELSIF TG_OP = 'DELETE' THEN UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id); END IF; RETURN NULL; END $$"),
+)
+
+# The triggers of revision 0003, which deleted stale documents
+OLD_SQLITE_TRIGGERS = (
+    ('product_documents_products_update', 'UPDATE ON products',
+     'DELETE FROM product_documents WHERE product_id = old.id; DELETE FROM product_documents WHERE product_id = new.id;'),
+    ('product_documents_products_delete', 'DELETE ON products',
+     'DELETE FROM product_documents WHERE product_id = old.id;'),
+    ('product_documents_product_attribute_values_insert', 'INSERT ON product_attribute_values',
+     'DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_attribute_values_update', 'UPDATE ON product_attribute_values',
+     'DELETE FROM product_documents WHERE product_id = old.product_id; DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_attribute_values_delete', 'DELETE ON product_attribute_values',
+     'DELETE FROM product_documents WHERE product_id = old.product_id;'),
+    ('product_documents_product_pricing_insert', 'INSERT ON product_pricing',
+     'DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_pricing_update', 'UPDATE ON product_pricing',
+     'DELETE FROM product_documents WHERE product_id = old.product_id; DELETE FROM product_documents WHERE product_id = new.product_id;'),
+    ('product_documents_product_pricing_delete', 'DELETE ON product_pricing',
+     'DELETE FROM product_documents WHERE product_id = old.product_id;'),
+    ('product_documents_attribute_values_update', 'UPDATE ON attribute_values',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = new.id);'),
+    ('product_documents_attribute_values_delete', 'DELETE ON attribute_values',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = old.id);'),
+    ('product_documents_attributes_update', 'UPDATE ON attributes',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = new.id);'),
+    ('product_documents_attributes_delete', 'DELETE ON attributes',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT pav.product_id FROM product_attribute_values pav JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = old.id);'),
+    ('product_documents_regions_update', 'UPDATE ON regions',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = new.id);'),
+    ('product_documents_regions_delete', 'DELETE ON regions',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE region_id = old.id);'),
+    ('product_documents_rental_periods_update', 'UPDATE ON rental_periods',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id); DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = new.id);'),
+    ('product_documents_rental_periods_delete', 'DELETE ON rental_periods',
+     'DELETE FROM product_documents WHERE product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = old.id);'),
+)
+
+
+def _drop_sqlite_triggers(triggers) -> None:
+    for name, *_ in triggers:
+        op.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def _create_sqlite_triggers(triggers) -> None:
+    for name, on, statements in triggers:
+        op.execute(f'CREATE TRIGGER IF NOT EXISTS {name} AFTER {on} BEGIN {statements} END')
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _drop_sqlite_triggers(OLD_SQLITE_TRIGGERS)
+
+    with op.batch_alter_table('product_documents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'))
+        batch_op.alter_column('body', existing_type=sa.TEXT(), nullable=True)
+        batch_op.alter_column('etag', existing_type=sa.VARCHAR(), nullable=True)
+
+    # Every product has a document row, so that every write leaves a new version behind
+    op.execute(
+        'INSERT INTO product_documents (product_id, version) SELECT id, 0 FROM products '
+        'WHERE id NOT IN (SELECT product_id FROM product_documents)'
+    )
+
+    if dialect == 'sqlite':
+        _create_sqlite_triggers(SQLITE_TRIGGERS)
+    elif dialect == 'postgresql':
+        for table, function in POSTGRES_TRIGGERS:
+            op.execute(function)
+            op.execute(
+                f'CREATE TRIGGER product_documents_stale AFTER INSERT OR UPDATE OR DELETE ON {table} '
+                f'FOR EACH ROW EXECUTE FUNCTION product_documents_{table}()'
+            )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _drop_sqlite_triggers(SQLITE_TRIGGERS)
+    elif dialect == 'postgresql':
+        for table, _ in POSTGRES_TRIGGERS:
+            op.execute(f'DROP FUNCTION IF EXISTS product_documents_{table}() CASCADE')
+
+    op.execute('DELETE FROM product_documents WHERE body IS NULL')
+    with op.batch_alter_table('product_documents', schema=None) as batch_op:
+        batch_op.alter_column('etag', existing_type=sa.VARCHAR(), nullable=False)
+        batch_op.alter_column('body', existing_type=sa.TEXT(), nullable=False)
+        batch_op.drop_column('version')
+
+    if dialect == 'sqlite':
+        _create_sqlite_triggers(OLD_SQLITE_TRIGGERS)
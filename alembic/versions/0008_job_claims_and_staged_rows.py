@@ -0,0 +1,37 @@
+"""job claims and staged rows
+
+Claim tokens that fence a job's writes to the runner holding it, and a table
+for the input rows of a job instead of its params.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 02:38:20.160494
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('job_rows',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('index', sa.Integer(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('job_id', 'index')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claim', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_column('claim')
+
+    op.drop_table('job_rows')
@@ -0,0 +1,56 @@
+"""collection version bumps per transaction
+
+The collection versions are bumped once per transaction by the application, so
+the triggers that bumped them on every written row or statement go away.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 02:52:41.307815
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('products', 'product_pricing', 'regions', 'rental_periods', 'attributes')
+
+BUMP = (
+    "INSERT INTO collection_versions (table_name, version) VALUES ({table}, 1) "
+    "ON CONFLICT (table_name) DO UPDATE SET version = collection_versions.version + 1"
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for table in VERSIONED_TABLES:
+            for operation in ('insert', 'update', 'delete'):
+                op.execute(f"DROP TRIGGER IF EXISTS collection_versions_{table}_{operation}")
+    elif dialect == 'postgresql':
+        op.execute("DROP FUNCTION IF EXISTS bump_collection_version() CASCADE")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for table in VERSIONED_TABLES:
+            for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                op.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS collection_versions_{table}_{operation.lower()} "
+                    f"AFTER {operation} ON {table} BEGIN {BUMP.format(table=repr(table))}; END"
+                )
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE OR REPLACE FUNCTION bump_collection_version() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            f"BEGIN {BUMP.format(table='TG_TABLE_NAME')}; RETURN NULL; END $$"
+        )
+        for table in VERSIONED_TABLES:
+            op.execute(
+                f"CREATE TRIGGER collection_versions_bump AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                "FOR EACH STATEMENT EXECUTE FUNCTION bump_collection_version()"
+            )
@@ -0,0 +1,65 @@
+"""product search index
+
+Full-text index of products, outside the ORM metadata: an FTS5 table kept in
+sync by triggers on SQLite, a GIN expression index on PostgreSQL. Every statement
+is idempotent, as databases created by the application or migrated before this
+revision existed may have the index already.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 02:58:12.604137
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+# SQLite: external-content FTS5 table over products, kept in sync by triggers
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+# PostgreSQL: GIN expression index
+POSTGRES_SEARCH_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (("
+    "setweight(to_tsvector('simple'::regconfig, coalesce(products.name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(products.description, '')), 'B')))",
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        exists = bind.execute(sa.text("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")).first()
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+        if not exists:
+            # Index the rows that predate the table
+            op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    elif bind.dialect.name == 'postgresql':
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for operation in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS products_fts_{operation}')
+        op.execute('DROP TABLE IF EXISTS products_fts')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_products_search')
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Returned by cache backends when a key is absent, so that None can be cached
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Process-local cache with per-entry TTL and least-recently-used eviction.
+
+    Values are stored as-is and must not be mutated by callers.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class RedisCache:
+    """
+    Cache stored in Redis so that several workers share entries and invalidations.
+
+    Values are serialised as JSON. Eviction is left to the Redis ``maxmemory`` policy.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: Optional[float] = 300):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis package is required to use a redis:// cache URL")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return MISSING
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "redis",
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": 0,
+            }
+
+
+def create_cache(name: str, max_entries: int, ttl: Optional[float]):
+    """
+    Build the cache backend configured for ``name``.
+
+    ``CACHE_URL`` selects a shared Redis backend (``redis://...``); without it the
+    cache lives in process memory.
+    """
+    url = os.getenv("CACHE_URL")
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url, prefix=f"{name}:", ttl=ttl)
+    return LRUCache(max_entries=max_entries, ttl=ttl)
@@ -0,0 +1,110 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, Optional, Tuple
+
+from fastapi import Request, Response, status
+from sqlalchemy import select
+
+from app.models.collection_version import CollectionVersion
+from app.services import collection_versions  # noqa: F401
+
+
+def make_etag(value: Any) -> str:
+    """Strong ETag derived from the ``repr`` of ``value``."""
+    return '"' + hashlib.blake2b(repr(value).encode(), digest_size=16).hexdigest() + '"'
+
+
+def row_validators(rows: Iterable) -> Tuple[str, Optional[datetime]]:
+    """
+    ETag and Last-Modified of a response built from the ORM ``rows``.
+
+    The ETag covers every column of every row rather than ``updated_at`` alone, whose
+    one-second resolution on SQLite would hide quick successive updates, and it
+    still avoids building the response body.
+    """
+    rows = [row for row in rows if row is not None]
+    state = sorted(
+        (row.__tablename__, tuple(str(getattr(row, column.key)) for column in row.__table__.columns))
+        for row in rows
+    )
+    last_modified = max((row.updated_at for row in rows if row.updated_at is not None), default=None)
+    return make_etag(state), last_modified
+
+
+def collection_version(*models):
+    """
+    Select the write counters of the tables of ``models``.
+
+    Every transaction that writes to a table bumps its counter, so the version
+    changes even when a write lands in the same second as the last one.
+    """
+    tables = [model.__tablename__ for model in models]
+    return (
+        select(CollectionVersion.table_name, CollectionVersion.version)
+        .where(CollectionVersion.table_name.in_(tables))
+        .order_by(CollectionVersion.table_name)
+    )
+
+
+def collection_etag(request: Request, versions) -> str:
+    """ETag of a list response, from the table versions and the normalised query parameters."""
+    params = sorted(request.query_params.multi_items())
+    return make_etag((request.url.path, params, [tuple(row) for row in versions]))
+
+
+def _http_date(value: datetime) -> str:
+    # Timestamps are stored without timezone information, in UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def check_not_modified(request: Request, response: Response, etag: str,
+                       last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """
+    Set the validators on ``response`` and answer 304 if the client's copy is current.
+
+    If-None-Match takes precedence over If-Modified-Since as in RFC 9110; Last-Modified
+    cannot reflect removed related rows, so clients should prefer the ETag.
+
+    Returns:
+        Optional[Response]: An empty 304 response to return instead of the body, or None
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+    if not fresh:
+        return None
+    if "cache-control" in response.headers:
+        headers["Cache-Control"] = response.headers["cache-control"]
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
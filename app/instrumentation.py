@@ -0,0 +1,187 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Requests whose slowest statement exceeds this many milliseconds are logged with it
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+
+# Histogram upper bounds for request and database durations (seconds) and query counts
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """Statements executed while handling one request."""
+
+    __slots__ = ("query_count", "db_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.query_count += 1
+        self.db_seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+# Stats of the request being handled. Thread pool workers and the greenlets used by
+# the async engine run in a copy of the request context, so they share this object.
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def instrument_engine(sync_engine) -> None:
+    """Record the count and duration of statements run by ``sync_engine`` against the current request."""
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own context rather than the connection, so a statement
+    # that raises, and never reaches after_cursor_execute, leaves nothing behind
+    if _request_stats.get() is not None and context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+class Histogram:
+    """Cumulative Prometheus histogram for a single label set."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class RequestMetrics:
+    """Per-route histograms of request duration, database time and query count."""
+
+    HISTOGRAMS = {
+        "http_request_duration_seconds": ("Request handling time", DURATION_BUCKETS),
+        "http_request_db_seconds": ("Time spent executing SQL statements per request", DURATION_BUCKETS),
+        "http_request_db_queries": ("SQL statements executed per request", QUERY_COUNT_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Dict[str, Histogram]] = {}
+
+    def observe(self, method: str, route: str, duration: float, stats: RequestStats) -> None:
+        with self._lock:
+            histograms = self._routes.get((method, route))
+            if histograms is None:
+                histograms = {name: Histogram(buckets) for name, (_, buckets) in self.HISTOGRAMS.items()}
+                self._routes[(method, route)] = histograms
+            histograms["http_request_duration_seconds"].observe(duration)
+            histograms["http_request_db_seconds"].observe(stats.db_seconds)
+            histograms["http_request_db_queries"].observe(stats.query_count)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, (description, _) in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), histograms in sorted(self._routes.items()):
+                    labels = f'method="{method}",route="{_escape_label(route)}"'
+                    lines.extend(histograms[name].render(name, labels))
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
+
+
+class QueryInstrumentationMiddleware:
+    """
+    ASGI middleware that reports the SQL work done by each request.
+
+    Adds a ``Server-Timing`` header (``db`` with the query count, ``db-slowest`` and
+    ``app``) and feeds the per-route histograms rendered by ``/metrics``. Routes are
+    labelled by their path template; unmatched paths share a single label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                header = (
+                    f'db;desc="{stats.query_count} queries";dur={stats.db_seconds * 1000:.3f}, '
+                    f"db-slowest;dur={stats.slowest_seconds * 1000:.3f}, "
+                    f"app;dur={elapsed * 1000:.3f}"
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            duration = time.perf_counter() - started
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            request_metrics.observe(scope["method"], path, duration, stats)
+            if stats.slowest_seconds * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+                logger.warning(
+                    "%s %s: slowest of %d statements took %.1f ms: %s",
+                    scope["method"], path, stats.query_count, stats.slowest_seconds * 1000, stats.slowest_statement,
+                )
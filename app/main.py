@@ -1,3 +1,5 @@
+import os
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
@@ -6,11 +8,31 @@ from fastapi.staticfiles import StaticFiles
 from starlette.responses import RedirectResponse
 from sqlalchemy.orm import Session
 
-from app.database import engine, Base, get_db
-from app.routers import products, attributes, regions, pricing, rental_periods, rental_transactions, attribute_values
+from app.database import engine, async_engine, Base, get_db, SessionLocal
+from app.instrumentation import QueryInstrumentationMiddleware, instrument_engine
+from app.pagination import NEXT_CURSOR_HEADER
+from app.serialization import DefaultJSONResponse
+from app.routers import products, analytics, attributes, regions, jobs, pricing, quotes, rental_periods, rental_transactions, attribute_values, monitoring
+from app.services.booking_index import booking_index
+from app.services.collection_versions import drop_version_triggers
+from app.services.jobs import job_runner
+from app.services.product_documents import install_document_triggers
+from app.services.product_search import install_search_index
+
+# Create missing tables on startup. Deployments that manage the schema with Alembic
+# ("alembic upgrade head") set DB_AUTO_CREATE=false.
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "true").lower() in ("1", "true", "yes")
+
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+def create_schema():
+    """Create missing tables and the full-text index, without migrating existing ones."""
+    Base.metadata.create_all(bind=engine)
+    # Databases created before full-text search and product documents existed get
+    # their index and triggers here, and lose the per-row collection version triggers
+    with engine.begin() as connection:
+        install_search_index(connection)
+        install_document_triggers(connection)
+        drop_version_triggers(connection)
 
 app = FastAPI(
     title="Product Rental API",
@@ -18,6 +40,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url=None,  # Disable the default docs
     redoc_url=None,  # Disable the default redoc
+    default_response_class=DefaultJSONResponse,
     openapi_url="/api/v1/openapi.json",
     terms_of_service="",
     contact={
@@ -37,8 +60,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
+# Count and time the SQL statements of every request
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+app.add_middleware(QueryInstrumentationMiddleware)
+
 # Custom OpenAPI schema
 def custom_openapi():
     if app.openapi_schema:
@@ -105,6 +134,11 @@ app.include_router(
     prefix="/api/v1", 
     tags=["Pricing"]
 )
+app.include_router(
+    quotes.router, 
+    prefix="/api/v1", 
+    tags=["Quotes"]
+)
 app.include_router(
     rental_periods.router, 
     prefix="/api/v1", 
@@ -115,6 +149,44 @@ app.include_router(
     prefix="/api/v1", 
     tags=["Rental Transactions"]
 )
+app.include_router(
+    analytics.router, 
+    prefix="/api/v1", 
+    tags=["Analytics"]
+)
+app.include_router(
+    jobs.router, 
+    prefix="/api/v1", 
+    tags=["Jobs"]
+)
+
+app.include_router(
+    monitoring.router, 
+    tags=["Monitoring"]
+)
+
+@app.on_event("startup")
+def prepare_database():
+    if DB_AUTO_CREATE:
+        create_schema()
+
+# Warm the in-memory booking index used for availability checks
+@app.on_event("startup")
+def warm_booking_index():
+    db = SessionLocal()
+    try:
+        booking_index.load(db)
+    finally:
+        db.close()
+
+# Run queued background jobs and resume any left behind by a previous process
+@app.on_event("startup")
+def start_job_runner():
+    job_runner.start()
+
+@app.on_event("shutdown")
+def stop_job_runner():
+    job_runner.stop()
 
 # Root endpoint
 @app.get("/", tags=["Root"], summary="API Welcome Endpoint", description="Returns a welcome message for the API")
@@ -5,4 +5,8 @@ from app.models.region import Region
 from app.models.rental_period import RentalPeriod
 from app.models.product_pricing import ProductPricing
 from app.models.rental_transaction import RentalTransaction
-from app.models.product_attribute_value import ProductAttributeValue
\ No newline at end of file
+from app.models.product_attribute_value import ProductAttributeValue
+from app.models.product_document import ProductDocument
+from app.models.revenue_rollup import RevenueRollup
+from app.models.job import Job, JobRow
+from app.models.collection_version import CollectionVersion
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -30,4 +30,9 @@ class AttributeValue(Base):
 
     # Relationships
     attribute = relationship("Attribute", back_populates="values")
-    products = relationship("ProductAttributeValue", back_populates="attribute_value")
\ No newline at end of file
+    products = relationship("ProductAttributeValue", back_populates="attribute_value")
+
+    # Duplicate checks look values up by attribute and value, lists by attribute
+    __table_args__ = (
+        Index('ix_attribute_values_attribute_value', 'attribute_id', 'value'),
+    )
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, BigInteger
+
+from app.database import Base
+
+
+class CollectionVersion(Base):
+    """Write counter of a table, bumped once by every transaction that writes to it."""
+    __tablename__ = "collection_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Text, JSON, Enum, DateTime, ForeignKey, Index, func
+import enum
+
+from app.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(Base):
+    """A background operation run in chunks; ``state`` is where it resumes after a restart."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String, nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    params = Column(JSON, nullable=False)
+    state = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=False, default=dict)
+    total = Column(Integer, nullable=True)
+    completed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    # Token of the runner that claimed the job; its writes to the job are conditional on it
+    claim = Column(String, nullable=True)
+    # Refreshed by the claiming runner while the job runs; a running job whose heartbeat stops is reclaimed
+    heartbeat_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # The runner polls for claimable jobs by status
+    __table_args__ = (
+        Index('ix_jobs_status', 'status', 'id'),
+    )
+
+
+class JobRow(Base):
+    """An input row staged for a job, read back one chunk at a time and deleted once the job finishes."""
+    __tablename__ = "job_rows"
+
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    index = Column(Integer, primary_key=True)
+    data = Column(JSON, nullable=False)
@@ -9,7 +9,8 @@ class Product(Base):
     __tablename__ = "products"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    # Indexed for the duplicate-name checks on every create and update
+    name = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
     sku = Column(String, unique=True, nullable=False)
     is_active = Column(Boolean, default=True)
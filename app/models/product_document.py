@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, ForeignKey, DateTime, func
+
+from app.database import Base
+
+
+class ProductDocument(Base):
+    """
+    Serialised product detail response.
+
+    Database triggers create the row with its product and, on any change to a row the
+    document was built from, clear it and bump ``version``.
+    """
+    __tablename__ = "product_documents"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    # Null until built, and again once stale
+    body = Column(Text)
+    etag = Column(String)
+    last_modified = Column(DateTime)
+    built_at = Column(DateTime, default=func.now())
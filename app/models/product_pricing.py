@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Numeric, Boolean, ForeignKey, DateTime, UniqueConstraint, func
+from sqlalchemy import Column, Integer, Numeric, Boolean, ForeignKey, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -21,7 +21,10 @@ class ProductPricing(Base):
     region = relationship("Region", back_populates="pricing")
     rental_period = relationship("RentalPeriod", back_populates="pricing")
 
-    # Ensure unique pricing for product-region-period combination
+    # Ensure unique pricing for product-region-period combination. The unique index
+    # also serves product_id lookups; region and rental period filters get their own.
     __table_args__ = (
         UniqueConstraint('product_id', 'region_id', 'rental_period_id', name='uix_product_region_period'),
+        Index('ix_product_pricing_region_period', 'region_id', 'rental_period_id'),
+        Index('ix_product_pricing_rental_period', 'rental_period_id'),
     )
\ No newline at end of file
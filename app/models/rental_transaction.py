@@ -39,4 +39,6 @@ class RentalTransaction(Base):
         Index('ix_rental_transactions_product_status', 'product_id', 'status'),
         Index('ix_rental_transactions_region_status', 'region_id', 'status'),
         Index('ix_rental_transactions_date_range', 'start_date', 'end_date'),
+        # Newest-first listing and its (created_at, id) keyset cursor
+        Index('ix_rental_transactions_created', 'created_at', 'id'),
     )
\ No newline at end of file
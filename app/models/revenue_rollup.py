@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, BigInteger, Date, ForeignKey, DateTime, Index, func
+
+from app.database import Base
+
+
+class RevenueRollup(Base):
+    """Confirmed and completed rental transactions summed per region, rental period, product and start day."""
+    __tablename__ = "revenue_rollups"
+
+    region_id = Column(Integer, ForeignKey("regions.id", ondelete="CASCADE"), primary_key=True)
+    rental_period_id = Column(Integer, ForeignKey("rental_periods.id", ondelete="CASCADE"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    transactions = Column(Integer, nullable=False, default=0)
+    # Integer cents, so that incremental sums stay exact
+    revenue_cents = Column(BigInteger, nullable=False, default=0)
+    booked_days = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # Dashboards filter on a date range first
+    __table_args__ = (
+        Index('ix_revenue_rollups_day', 'day', 'region_id'),
+    )
@@ -0,0 +1,70 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+# Response header carrying the opaque cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> Optional[List[Any]]:
+    """
+    Decode a cursor produced by ``encode_cursor`` for the given sort columns.
+
+    An empty cursor requests the first page and decodes to None.
+
+    Raises:
+        HTTPException: If the cursor is malformed or does not match the sort columns
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort columns")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError, binascii.Error, NotImplementedError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_paginate(query, cursor: str, columns: Sequence, limit: int, descending: bool = False):
+    """
+    Order ``query`` by ``columns`` and start it right after the row encoded in ``cursor``.
+
+    Works for both ``Query`` and ``Select`` objects. One extra row is fetched so that
+    ``finish_page`` can tell whether a next page exists. The last column must be unique.
+    """
+    values = decode_cursor(cursor, columns)
+    if values is not None:
+        # Row-value comparison (a, b) > (x, y) spelled out for every backend
+        clauses = []
+        for i, column in enumerate(columns):
+            equal = [columns[j] == values[j] for j in range(i)]
+            beyond = column < values[i] if descending else column > values[i]
+            clauses.append(and_(*equal, beyond))
+        query = query.filter(or_(*clauses))
+    order_by = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+def finish_page(response: Response, rows: Sequence, columns: Sequence, limit: int) -> Sequence:
+    """Trim the extra row fetched by ``keyset_paginate`` and set the next-page cursor header."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more and rows:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows
@@ -0,0 +1,100 @@
+import os
+import uuid
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+
+from app.cache import MISSING, create_cache
+from app.conditional import check_not_modified
+from app.serialization import json_response
+
+# Seconds a cached response stays valid, bounding staleness across workers without a shared backend
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+# Maximum number of distinct responses (route and query string) kept in process memory
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+
+# Response headers replayed from the cache, everything else is recomputed per request
+CACHED_HEADERS = ("etag", "last-modified", "x-next-cursor")
+
+
+def cache_control(policy: str) -> Callable[[Response], None]:
+    """Route dependency that sets ``Cache-Control`` to ``policy`` on every response."""
+    def set_cache_control(response: Response) -> None:
+        response.headers["Cache-Control"] = policy
+    return set_cache_control
+
+
+class ResponseCache:
+    """
+    Serialised JSON responses of read endpoints, keyed by route and normalised query string.
+
+    Every entry is filed under one or more tags, normally the tables the response is
+    read from. Each tag has a random version that is part of the entry key, so
+    ``invalidate`` only has to replace the version: old entries are never read again
+    and age out of the backend. ``lookup`` returns the key to pass to ``store``, built
+    from the versions seen before the query, so a response read before a concurrent
+    invalidation is filed under a key nobody looks up any more.
+    """
+
+    def __init__(self, backend, tags):
+        self.backend = backend
+        self.tags = tags
+
+    def _tag_version(self, tag: str) -> str:
+        version = self.tags.get(tag)
+        if version is MISSING:
+            # First use, or the version was evicted: a fresh one orphans any old entries
+            version = uuid.uuid4().hex
+            self.tags.set(tag, version, ttl=0)
+        return version
+
+    def _replay(self, request: Request, response: Response, entry: Dict[str, Any]) -> Response:
+        response.headers.update(entry["headers"])
+        if "etag" in entry["headers"]:
+            not_modified = check_not_modified(request, response, entry["headers"]["etag"])
+            if not_modified:
+                return not_modified
+        return json_response(entry["body"].encode(), response)
+
+    def lookup(self, request: Request, response: Response, tags: Sequence[str]) -> Tuple[Optional[Response], str]:
+        """
+        Look up the cached response for ``request``.
+
+        Returns:
+            Tuple[Optional[Response], str]: The response to send (200 or 304) or None on a
+            miss, and the key to ``store`` the freshly built response under
+        """
+        versions = [f"{tag}={self._tag_version(tag)}" for tag in tags]
+        params = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+        key = f"{';'.join(versions)}:{request.url.path}?{params}"
+        entry = self.backend.get(key)
+        if entry is MISSING:
+            return None, key
+        return self._replay(request, response, entry), key
+
+    def store(self, key: str, response: Response, body: bytes) -> Response:
+        """Cache the serialised ``body`` with its validator headers and return it as the response."""
+        entry = {
+            "body": body.decode(),
+            "headers": {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+        }
+        self.backend.set(key, entry)
+        return json_response(body, response)
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self.tags.set(tag, uuid.uuid4().hex, ttl=0)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+
+response_cache = ResponseCache(
+    create_cache("responses", max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL),
+    create_cache("response-tags", max_entries=RESPONSE_CACHE_SIZE, ttl=0),
+)
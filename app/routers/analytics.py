@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import date
+from decimal import Decimal
+
+from app.database import get_async_db
+from app.models.revenue_rollup import RevenueRollup
+from app.schemas.analytics import RevenueGroup, RevenueRow
+from app.schemas.job import JobResponse
+from app.services.jobs import create_job, job_runner
+from app.services.revenue_rollups import BACKFILL_WINDOW_DAYS
+
+router = APIRouter()
+
+# Rollup columns of the groups other than the period
+GROUP_COLUMNS = {
+    RevenueGroup.REGION: "region_id",
+    RevenueGroup.RENTAL_PERIOD: "rental_period_id",
+    RevenueGroup.PRODUCT: "product_id",
+}
+
+
+def _month(day, dialect: str):
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m", day)
+    if dialect == "postgresql":
+        return func.to_char(day, "YYYY-MM")
+    raise NotImplementedError(f"Monthly revenue is not supported on {dialect}")
+
+
+@router.get("/analytics/revenue", response_model=List[RevenueRow])
+async def read_revenue(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    group_by: List[RevenueGroup] = Query([RevenueGroup.MONTH]),
+    region_id: Optional[int] = None,
+    rental_period_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 1000,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Revenue, transaction count and booked days of confirmed and completed rentals.
+
+    Answered from the revenue rollups rather than the transactions. Rentals count on
+    their start day; ``from`` and ``to`` are inclusive start days. Rows are grouped
+    by any of region, rental period and product, and by day or month.
+    """
+    if RevenueGroup.DAY in group_by and RevenueGroup.MONTH in group_by:
+        raise HTTPException(status_code=400, detail="Group by either day or month, not both")
+    
+    keys = []
+    if RevenueGroup.MONTH in group_by:
+        keys.append(_month(RevenueRollup.day, db.get_bind().dialect.name).label("period"))
+    elif RevenueGroup.DAY in group_by:
+        keys.append(RevenueRollup.day.label("period"))
+    keys.extend(getattr(RevenueRollup, column).label(column) for group, column in GROUP_COLUMNS.items() if group in group_by)
+    
+    query = select(
+        *keys,
+        func.sum(RevenueRollup.transactions).label("transactions"),
+        func.sum(RevenueRollup.revenue_cents).label("revenue_cents"),
+        func.sum(RevenueRollup.booked_days).label("booked_days"),
+    )
+    if keys:
+        query = query.group_by(*keys).order_by(*keys)
+    
+    if date_from:
+        query = query.where(RevenueRollup.day >= date_from)
+    
+    if date_to:
+        query = query.where(RevenueRollup.day <= date_to)
+    
+    if region_id:
+        query = query.where(RevenueRollup.region_id == region_id)
+    
+    if rental_period_id:
+        query = query.where(RevenueRollup.rental_period_id == rental_period_id)
+    
+    if product_id:
+        query = query.where(RevenueRollup.product_id == product_id)
+    
+    result = await db.execute(query.offset(skip).limit(limit))
+    rows = []
+    for row in result.mappings():
+        if row["transactions"] is None:
+            # Aggregate over no rows at all
+            continue
+        period = row.get("period")
+        rows.append(RevenueRow(
+            period=period.isoformat() if isinstance(period, date) else period,
+            region_id=row.get("region_id"),
+            rental_period_id=row.get("rental_period_id"),
+            product_id=row.get("product_id"),
+            transactions=row["transactions"],
+            revenue=(Decimal(row["revenue_cents"]) / 100).quantize(Decimal("0.01")),
+            booked_days=row["booked_days"],
+        ))
+    return rows
+
+
+@router.post("/analytics/revenue/backfill", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_revenue_backfill_job(window_days: int = Query(BACKFILL_WINDOW_DAYS, ge=1), db: AsyncSession = Depends(get_async_db)):
+    """Rebuild the revenue rollups from the transactions in a background job, one committed window of days at a time"""
+    job = await db.run_sync(create_job, "revenue_backfill", {"window_days": window_days})
+    job_runner.wake()
+    return job
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.database import get_db
+from app.pagination import keyset_paginate, finish_page
+from app.response_cache import cache_control, response_cache
+from app.serialization import serialize_rows
 from app.models.attribute import AttributeValue
 from app.schemas.attribute_value import AttributeValueCreate, AttributeValueUpdate, AttributeValueResponse, AttributeValueDetailResponse
+from app.services.facet_index import facet_index
 
 router = APIRouter()
 
+# Cache tags of the list response, the tables it is read from
+ATTRIBUTE_VALUES_CACHE_TAGS = ("attribute_values", "attributes")
+
 
 # AttributeValue endpoints
 @router.post("/attribute-values", response_model=AttributeValueResponse, status_code=status.HTTP_201_CREATED)
@@ -20,18 +27,31 @@ def create_attribute_value(attribute_value: AttributeValueCreate, db: Session =
     db_attribute_value = AttributeValue(**attribute_value.dict())
     db.add(db_attribute_value)
     db.commit()
+    response_cache.invalidate("attribute_values")
     db.refresh(db_attribute_value)
+    facet_index.sync_value(db_attribute_value)
     return db_attribute_value
 
 
-@router.get("/attribute-values", response_model=List[AttributeValueResponse])
+@router.get(
+    "/attribute-values",
+    response_model=List[AttributeValueResponse],
+    dependencies=[Depends(cache_control("public, max-age=60"))],
+)
 def read_attribute_values(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     attribute_id: Optional[int] = None,
     value: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
+    cached, cache_key = response_cache.lookup(request, response, ATTRIBUTE_VALUES_CACHE_TAGS)
+    if cached:
+        return cached
+    
     query = db.query(AttributeValue)
     
     if attribute_id:
@@ -40,7 +60,15 @@ def read_attribute_values(
     if value:
         query = query.filter(AttributeValue.value.ilike(f"%{value}%"))
     
-    return query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        # Keyset pagination: page N costs the same as page 1
+        rows = keyset_paginate(query, cursor, (AttributeValue.id,), limit).all()
+        rows = finish_page(response, rows, (AttributeValue.id,), limit)
+    else:
+        rows = query.offset(skip).limit(limit).all()
+    
+    # Serialise once here so cache hits skip both the query and response validation
+    return response_cache.store(cache_key, response, serialize_rows(AttributeValueResponse, rows))
 
 
 @router.get("/attribute-values/{attribute_value_id}", response_model=AttributeValueDetailResponse)
@@ -82,7 +110,9 @@ def update_attribute_value(attribute_value_id: int, attribute_value: AttributeVa
         setattr(db_attribute_value, key, value)
     
     db.commit()
+    response_cache.invalidate("attribute_values")
     db.refresh(db_attribute_value)
+    facet_index.sync_value(db_attribute_value)
     return db_attribute_value
 
 
@@ -94,4 +124,6 @@ def delete_attribute_value(attribute_value_id: int, db: Session = Depends(get_db
     
     db.delete(db_attribute_value)
     db.commit()
+    response_cache.invalidate("attribute_values")
+    facet_index.discard_value(attribute_value_id)
     return {"detail": "Attribute value has been deleted"}
\ No newline at end of file
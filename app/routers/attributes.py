@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.conditional import check_not_modified, collection_etag, collection_version, row_validators
 from app.database import get_db
+from app.pagination import keyset_paginate, finish_page
+from app.response_cache import cache_control, response_cache
+from app.serialization import serialize_rows
 from app.models.attribute import Attribute
 from app.schemas.attribute import AttributeCreate, AttributeUpdate, AttributeResponse, AttributeDetailResponse
+from app.services.facet_index import facet_index
 
 router = APIRouter()
 
+# Cache tags of the list response, the tables it is read from
+ATTRIBUTES_CACHE_TAGS = ("attributes",)
+
 
 # Attribute endpoints
 @router.post("/attributes", response_model=AttributeResponse, status_code=status.HTTP_201_CREATED)
@@ -20,19 +28,38 @@ def create_attribute(attribute: AttributeCreate, db: Session = Depends(get_db)):
     db_attribute = Attribute(**attribute.dict())
     db.add(db_attribute)
     db.commit()
+    response_cache.invalidate("attributes")
     db.refresh(db_attribute)
+    if db_attribute.is_filterable:
+        facet_index.clear()
     return db_attribute
 
 
-@router.get("/attributes", response_model=List[AttributeResponse])
+@router.get(
+    "/attributes",
+    response_model=List[AttributeResponse],
+    dependencies=[Depends(cache_control("public, max-age=60"))],
+)
 def read_attributes(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     name: Optional[str] = None,
     type: Optional[str] = None,
     is_filterable: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
+    cached, cache_key = response_cache.lookup(request, response, ATTRIBUTES_CACHE_TAGS)
+    if cached:
+        return cached
+    
+    versions = db.execute(collection_version(Attribute)).all()
+    not_modified = check_not_modified(request, response, collection_etag(request, versions))
+    if not_modified:
+        return not_modified
+    
     query = db.query(Attribute)
     
     if name:
@@ -44,14 +71,26 @@ def read_attributes(
     if is_filterable is not None:
         query = query.filter(Attribute.is_filterable == is_filterable)
     
-    return query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        # Keyset pagination: page N costs the same as page 1
+        rows = keyset_paginate(query, cursor, (Attribute.id,), limit).all()
+        rows = finish_page(response, rows, (Attribute.id,), limit)
+    else:
+        rows = query.offset(skip).limit(limit).all()
+    
+    # Serialise once here so cache hits skip both the query and response validation
+    return response_cache.store(cache_key, response, serialize_rows(AttributeResponse, rows))
 
 
 @router.get("/attributes/{attribute_id}", response_model=AttributeDetailResponse)
-def read_attribute(attribute_id: int, db: Session = Depends(get_db)):
+def read_attribute(attribute_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     db_attribute = db.query(Attribute).filter(Attribute.id == attribute_id).first()
     if db_attribute is None:
         raise HTTPException(status_code=404, detail="Attribute not found")
+    
+    not_modified = check_not_modified(request, response, *row_validators([db_attribute, *db_attribute.values]))
+    if not_modified:
+        return not_modified
     return db_attribute
 
 
@@ -70,7 +109,10 @@ def update_attribute(attribute_id: int, attribute: AttributeUpdate, db: Session
         setattr(db_attribute, key, value)
     
     db.commit()
+    response_cache.invalidate("attributes")
     db.refresh(db_attribute)
+    # Rebuild the facet index on next search, the set of filterable attributes may have changed
+    facet_index.clear()
     return db_attribute
 
 
@@ -82,4 +124,6 @@ def delete_attribute(attribute_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_attribute)
     db.commit()
+    response_cache.invalidate("attributes")
+    facet_index.clear()
     return {"detail": "Attribute has been deleted"}
\ No newline at end of file
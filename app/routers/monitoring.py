@@ -0,0 +1,75 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database import pool_metrics
+from app.instrumentation import request_metrics
+from app.response_cache import response_cache
+from app.services.pricing_cache import pricing_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics/pool", summary="Database connection pool metrics")
+def read_pool_metrics():
+    """
+    Report connection pool usage for the sync and async engines.
+    
+    Returns:
+        dict: Checkout counts, timeouts, wait times and current pool occupancy per engine
+    """
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+
+
+@router.get("/metrics/cache", summary="Application cache metrics")
+def read_cache_metrics():
+    """
+    Report hit, miss and eviction counters of the application caches.
+    
+    Returns:
+        dict: Counters and current size per cache
+    """
+    return {"pricing": pricing_cache.stats(), "responses": response_cache.stats()}
+
+
+# Pool and cache statistics that only grow while the process runs; the others are
+# current values such as occupancy and size
+COUNTER_STATS = {
+    "checkouts", "timeouts", "connects", "invalidations", "wait_seconds_total",
+    "hits", "misses", "evictions", "expirations",
+}
+
+
+def _render_family(name: str, kind: str, description: str, label: str, values: dict) -> list:
+    if not values:
+        return []
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    lines.extend(f'{name}{{{label}="{key}"}} {value}' for key, value in values.items())
+    return lines
+
+
+def _render_stats(name: str, description: str, stats: dict) -> list:
+    """Render the numeric ``stats`` as a ``{name}_total`` counter family and a ``{name}`` gauge family."""
+    numeric = {key: value for key, value in stats.items() if isinstance(value, (int, float))}
+    counters = {key.removesuffix("_total"): value for key, value in numeric.items() if key in COUNTER_STATS}
+    gauges = {key: value for key, value in numeric.items() if key not in COUNTER_STATS}
+    return [
+        *_render_family(f"{name}_total", "counter", f"{description}, counted since the process started", "stat", counters),
+        *_render_family(name, "gauge", description, "stat", gauges),
+    ]
+
+
+@router.get("/metrics", summary="Prometheus metrics", response_class=PlainTextResponse)
+def read_prometheus_metrics():
+    """
+    Expose per-route request, query count and database time histograms together with
+    pool and cache counters in the Prometheus text format.
+    
+    Returns:
+        str: Metrics in the Prometheus exposition format
+    """
+    lines = [request_metrics.render().rstrip("\n")]
+    for engine_name, metrics in pool_metrics.items():
+        lines.extend(_render_stats(f"db_pool_{engine_name}", f"Connection pool statistics of the {engine_name} engine", metrics.snapshot()))
+    for cache_name, cache in (("pricing", pricing_cache), ("responses", response_cache)):
+        lines.extend(_render_stats(f"cache_{cache_name}", f"{cache_name.capitalize()} cache statistics", cache.stats()))
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,39 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
 from decimal import Decimal
+import csv
+import io
 
-from app.database import get_db
+from app.cache import MISSING
+from app.conditional import check_not_modified, collection_etag, collection_version, make_etag, row_validators
+from app.database import get_async_db
+from app.pagination import keyset_paginate, finish_page
+from app.serialization import model_response, rows_response
 from app.models.product_pricing import ProductPricing
 from app.models.product import Product
 from app.models.region import Region
 from app.models.rental_period import RentalPeriod
-from app.schemas.product_pricing import ProductPricingCreate, ProductPricingUpdate, ProductPricingResponse, ProductPricingDetailResponse
+from app.schemas.product_pricing import ProductPricingCreate, ProductPricingUpdate, ProductPricingResponse, ProductPricingDetailResponse, ProductPricingBulkResponse
+from app.services.pricing_cache import pricing_cache
+from app.services.pricing_import import upsert_pricing
+from app.services.upsert import UPSERT_INSERTS
 
 router = APIRouter()
 
 
 @router.post("/pricing", response_model=ProductPricingResponse, status_code=status.HTTP_201_CREATED)
-def create_pricing(pricing: ProductPricingCreate, db: Session = Depends(get_db)):
+async def create_pricing(pricing: ProductPricingCreate, db: AsyncSession = Depends(get_async_db)):
     # Verify that product, region, and rental period exist
-    product = db.query(Product).filter(Product.id == pricing.product_id).first()
+    product = await db.get(Product, pricing.product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    region = db.query(Region).filter(Region.id == pricing.region_id).first()
+    region = await db.get(Region, pricing.region_id)
     if not region:
         raise HTTPException(status_code=404, detail="Region not found")
     
-    rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == pricing.rental_period_id).first()
+    rental_period = await db.get(RentalPeriod, pricing.rental_period_id)
     if not rental_period:
         raise HTTPException(status_code=404, detail="Rental period not found")
     
     # Check if pricing already exists for this combination
-    existing_pricing = db.query(ProductPricing).filter(
+    existing_pricing = (await db.execute(select(ProductPricing.id).where(
         ProductPricing.product_id == pricing.product_id,
         ProductPricing.region_id == pricing.region_id,
         ProductPricing.rental_period_id == pricing.rental_period_id
-    ).first()
+    ))).first()
     
     if existing_pricing:
         raise HTTPException(
@@ -43,52 +54,170 @@ def create_pricing(pricing: ProductPricingCreate, db: Session = Depends(get_db))
     
     db_pricing = ProductPricing(**pricing.dict())
     db.add(db_pricing)
-    db.commit()
-    db.refresh(db_pricing)
+    await db.commit()
+    # Drop the cached "no pricing" entry for this combination
+    pricing_cache.invalidate(pricing.product_id, pricing.region_id, pricing.rental_period_id)
+    await db.refresh(db_pricing)
     return db_pricing
 
 
+# Upper bound on the number of rows accepted by a single bulk request
+MAX_BULK_PRICING_ROWS = 100000
+
+
+def _parse_pricing_csv(content: bytes) -> List[dict]:
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    # Empty cells fall back to the schema defaults
+    return [{key: value for key, value in row.items() if value not in (None, "")} for row in reader]
+
+
+@router.post(
+    "/pricing/bulk",
+    response_model=ProductPricingBulkResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/ProductPricingCreate"}}
+                },
+                "text/csv": {"schema": {"type": "string"}},
+                "multipart/form-data": {
+                    "schema": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}
+                },
+            },
+        }
+    }
+)
+async def bulk_upsert_pricing(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Insert or update many pricing rows from a JSON array or a CSV upload, reporting per-row errors"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected a CSV file in the 'file' field")
+        rows = _parse_pricing_csv(await upload.read())
+    elif content_type.startswith("text/csv"):
+        rows = _parse_pricing_csv(await request.body())
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array or CSV")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array or CSV")
+    
+    if len(rows) > MAX_BULK_PRICING_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A bulk request may contain at most {MAX_BULK_PRICING_ROWS} rows"
+        )
+    if db.get_bind().dialect.name not in UPSERT_INSERTS:
+        raise HTTPException(status_code=400, detail=f"Bulk pricing upsert is not supported on {db.get_bind().dialect.name}")
+    
+    return await db.run_sync(upsert_pricing, rows)
+
+
 @router.get("/pricing", response_model=List[ProductPricingResponse])
-def read_pricing(
+async def read_pricing(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     product_id: Optional[int] = None,
     region_id: Optional[int] = None,
     rental_period_id: Optional[int] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(ProductPricing)
+    if product_id and region_id and rental_period_id and cursor is None:
+        # A full combination matches at most one row, which the pricing cache can answer
+        rows = await _read_cached_pricing(db, product_id, region_id, rental_period_id, skip, limit, min_price, max_price, is_active)
+        # The cached row versions this response, which keeps the check off the database
+        etag = make_etag((request.url.path, sorted(request.query_params.multi_items()), [row.model_dump() for row in rows]))
+        return check_not_modified(request, response, etag) or rows_response(ProductPricingResponse, rows, response)
+    
+    versions = (await db.execute(collection_version(ProductPricing))).all()
+    not_modified = check_not_modified(request, response, collection_etag(request, versions))
+    if not_modified:
+        return not_modified
+    
+    query = select(ProductPricing)
     
     if product_id:
-        query = query.filter(ProductPricing.product_id == product_id)
+        query = query.where(ProductPricing.product_id == product_id)
     
     if region_id:
-        query = query.filter(ProductPricing.region_id == region_id)
+        query = query.where(ProductPricing.region_id == region_id)
     
     if rental_period_id:
-        query = query.filter(ProductPricing.rental_period_id == rental_period_id)
+        query = query.where(ProductPricing.rental_period_id == rental_period_id)
     
     if min_price is not None:
-        query = query.filter(ProductPricing.price >= min_price)
+        query = query.where(ProductPricing.price >= min_price)
     
     if max_price is not None:
-        query = query.filter(ProductPricing.price <= max_price)
+        query = query.where(ProductPricing.price <= max_price)
     
     if is_active is not None:
-        query = query.filter(ProductPricing.is_active == is_active)
+        query = query.where(ProductPricing.is_active == is_active)
+    
+    if cursor is not None:
+        # Keyset pagination: page N costs the same as page 1
+        result = await db.execute(keyset_paginate(query, cursor, (ProductPricing.id,), limit))
+        return rows_response(ProductPricingResponse, finish_page(response, result.scalars().all(), (ProductPricing.id,), limit), response)
+    
+    result = await db.execute(query.offset(skip).limit(limit))
+    return rows_response(ProductPricingResponse, result.scalars().all(), response)
+
+
+async def _read_cached_pricing(db, product_id, region_id, rental_period_id, skip, limit, min_price, max_price, is_active) -> list:
+    pricing = pricing_cache.get(product_id, region_id, rental_period_id)
+    if pricing is MISSING:
+        generation = pricing_cache.generation
+        db_pricing = (await db.execute(select(ProductPricing).where(
+            ProductPricing.product_id == product_id,
+            ProductPricing.region_id == region_id,
+            ProductPricing.rental_period_id == rental_period_id
+        ))).scalars().first()
+        pricing_cache.store(product_id, region_id, rental_period_id, db_pricing, generation)
+        pricing = ProductPricingResponse.model_validate(db_pricing) if db_pricing else None
+    elif pricing is not None:
+        pricing = ProductPricingResponse.model_validate(pricing)
     
-    return query.offset(skip).limit(limit).all()
+    if (pricing is None or skip > 0 or limit < 1
+            or (min_price is not None and pricing.price < Decimal(str(min_price)))
+            or (max_price is not None and pricing.price > Decimal(str(max_price)))
+            or (is_active is not None and pricing.is_active != is_active)):
+        return []
+    return [pricing]
 
 
 @router.get("/pricing/{pricing_id}", response_model=ProductPricingDetailResponse)
-def read_pricing_detail(pricing_id: int, db: Session = Depends(get_db)):
-    db_pricing = db.query(ProductPricing).filter(ProductPricing.id == pricing_id).first()
+async def read_pricing_detail(pricing_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    # The product, region and rental period are joined into the same query
+    result = await db.execute(select(ProductPricing).where(ProductPricing.id == pricing_id).options(
+        joinedload(ProductPricing.product),
+        joinedload(ProductPricing.region),
+        joinedload(ProductPricing.rental_period)
+    ))
+    db_pricing = result.scalars().first()
     if db_pricing is None:
         raise HTTPException(status_code=404, detail="Pricing not found")
     
+    rows = (db_pricing, db_pricing.product, db_pricing.region, db_pricing.rental_period)
+    not_modified = check_not_modified(request, response, *row_validators(rows))
+    if not_modified:
+        return not_modified
+    
+    return model_response(_build_pricing_detail(db_pricing), response)
+
+
+def _build_pricing_detail(db_pricing: ProductPricing) -> ProductPricingDetailResponse:
     # Create response with nested data
     response = ProductPricingDetailResponse(
         id=db_pricing.id,
@@ -120,8 +249,8 @@ def read_pricing_detail(pricing_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/pricing/{pricing_id}", response_model=ProductPricingResponse)
-def update_pricing(pricing_id: int, pricing: ProductPricingUpdate, db: Session = Depends(get_db)):
-    db_pricing = db.query(ProductPricing).filter(ProductPricing.id == pricing_id).first()
+async def update_pricing(pricing_id: int, pricing: ProductPricingUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_pricing = await db.get(ProductPricing, pricing_id)
     if db_pricing is None:
         raise HTTPException(status_code=404, detail="Pricing not found")
     
@@ -129,17 +258,17 @@ def update_pricing(pricing_id: int, pricing: ProductPricingUpdate, db: Session =
     
     # If updating product, region, or rental period, verify they exist
     if "product_id" in update_data:
-        product = db.query(Product).filter(Product.id == update_data["product_id"]).first()
+        product = await db.get(Product, update_data["product_id"])
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
     
     if "region_id" in update_data:
-        region = db.query(Region).filter(Region.id == update_data["region_id"]).first()
+        region = await db.get(Region, update_data["region_id"])
         if not region:
             raise HTTPException(status_code=404, detail="Region not found")
     
     if "rental_period_id" in update_data:
-        rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == update_data["rental_period_id"]).first()
+        rental_period = await db.get(RentalPeriod, update_data["rental_period_id"])
         if not rental_period:
             raise HTTPException(status_code=404, detail="Rental period not found")
     
@@ -148,12 +277,12 @@ def update_pricing(pricing_id: int, pricing: ProductPricingUpdate, db: Session =
     region_id = update_data.get("region_id", db_pricing.region_id)
     rental_period_id = update_data.get("rental_period_id", db_pricing.rental_period_id)
     
-    existing_pricing = db.query(ProductPricing).filter(
+    existing_pricing = (await db.execute(select(ProductPricing.id).where(
         ProductPricing.product_id == product_id,
         ProductPricing.region_id == region_id,
         ProductPricing.rental_period_id == rental_period_id,
         ProductPricing.id != pricing_id
-    ).first()
+    ))).first()
     
     if existing_pricing:
         raise HTTPException(
@@ -161,20 +290,25 @@ def update_pricing(pricing_id: int, pricing: ProductPricingUpdate, db: Session =
             detail="Pricing already exists for this product, region, and rental period combination"
         )
     
+    previous_key = (db_pricing.product_id, db_pricing.region_id, db_pricing.rental_period_id)
     for key, value in update_data.items():
         setattr(db_pricing, key, value)
     
-    db.commit()
-    db.refresh(db_pricing)
+    await db.commit()
+    pricing_cache.invalidate(*previous_key)
+    pricing_cache.invalidate(product_id, region_id, rental_period_id)
+    await db.refresh(db_pricing)
     return db_pricing
 
 
 @router.delete("/pricing/{pricing_id}", status_code=status.HTTP_200_OK)
-def delete_pricing(pricing_id: int, db: Session = Depends(get_db)):
-    db_pricing = db.query(ProductPricing).filter(ProductPricing.id == pricing_id).first()
+async def delete_pricing(pricing_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_pricing = await db.get(ProductPricing, pricing_id)
     if db_pricing is None:
         raise HTTPException(status_code=404, detail="Pricing not found")
     
-    db.delete(db_pricing)
-    db.commit()
+    key = (db_pricing.product_id, db_pricing.region_id, db_pricing.rental_period_id)
+    await db.delete(db_pricing)
+    await db.commit()
+    pricing_cache.invalidate(*key)
     return {"detail": "Pricing has been deleted"}
\ No newline at end of file
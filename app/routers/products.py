@@ -1,14 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
+from datetime import datetime, timedelta
+import json
 
-from app.database import get_db
+from app.conditional import check_not_modified, collection_etag, collection_version
+from app.database import get_async_db
+from app.pagination import keyset_paginate, finish_page
+from app.serialization import json_response, rows_response
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductDetailResponse
-from app.models.product_attribute_value import ProductAttributeValue
+from app.schemas.job import JobResponse
+from app.schemas.product import ProductCreate, ProductBulkItem, ProductBulkResult, ProductUpdate, ProductResponse, ProductDetailResponse, ProductSearchResponse, ProductAvailabilityResponse
+from app.services.availability import availability, load_bookings
+from app.services.facet_index import facet_index
+from app.services.jobs import create_job, job_runner
+from app.services.product_documents import read_product_document
+from app.services.product_import import CHUNK_SIZE, upsert_products
+from app.services.product_search import apply_text_search, search_terms
+from app.services.upsert import UPSERT_INSERTS
 
 router = APIRouter()
 
+# Upper bound on the number of products in one availability request
+MAX_AVAILABILITY_PRODUCTS = 500
+
+# Length of the availability window when no end date is given
+DEFAULT_AVAILABILITY_DAYS = 90
+
+# Upper bound on the number of products accepted by a single bulk request
+MAX_BULK_PRODUCT_ROWS = 100000
 
 @router.post(
     "/products", 
@@ -21,7 +43,7 @@ router = APIRouter()
         400: {"description": "Bad request - Product with this name or SKU already exists"}
     }
 )
-def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new product with the provided details.
     
@@ -36,22 +58,151 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         HTTPException: If a product with the same name or SKU already exists
     """
     # Check for duplicate product name
-    existing_product = db.query(Product).filter(Product.name == product.name).first()
+    existing_product = (await db.execute(select(Product.id).where(Product.name == product.name))).first()
     if existing_product:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product with this name already exists.")
     
     # Check for duplicate SKU
-    existing_sku = db.query(Product).filter(Product.sku == product.sku).first()
+    existing_sku = (await db.execute(select(Product.id).where(Product.sku == product.sku))).first()
     if existing_sku:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product with this SKU already exists.")
     
     db_product = Product(**product.dict())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    await db.refresh(db_product)
+    facet_index.sync_product(db_product)
     return db_product
 
 
+def _parse_bulk_products(content: bytes, content_type: str) -> list:
+    if content_type.startswith("application/x-ndjson"):
+        rows = []
+        for line in content.decode("utf-8-sig").splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                # Reported as a failed row rather than rejecting the whole catalog
+                rows.append(None)
+        return rows
+    try:
+        rows = json.loads(content)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+    return rows
+
+
+async def _bulk_product_results(db: AsyncSession, rows: list):
+    # Each chunk is committed before its results are sent, so a client that loses the
+    # connection knows which products were written
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = list(enumerate(rows[start:start + CHUNK_SIZE], start))
+        results = await db.run_sync(upsert_products, chunk)
+        yield "".join(ProductBulkResult(**result).model_dump_json() + "\n" for result in results)
+
+
+@router.post(
+    "/products/bulk",
+    response_class=StreamingResponse,
+    summary="Create or update many products",
+    description="Upsert products on their SKU, with their attribute values, streaming one result per row.",
+    responses={200: {"content": {"application/x-ndjson": {"schema": ProductBulkResult.model_json_schema()}}}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": ProductBulkItem.model_json_schema()}
+                },
+                "application/x-ndjson": {"schema": ProductBulkItem.model_json_schema()},
+            },
+        }
+    }
+)
+async def bulk_upsert_products(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Insert or update products from a JSON array or NDJSON body.
+    
+    Rows are matched on SKU and written in chunks, each with one duplicate-check
+    query and one executemany upsert. Rows with ``attribute_value_ids`` have their
+    attribute values replaced by that list.
+    
+    Args:
+        request: Incoming request carrying the products
+        db: Database session dependency
+        
+    Returns:
+        StreamingResponse: NDJSON with one ProductBulkResult per input row, in order
+        
+    Raises:
+        HTTPException: If the body is not a JSON array or NDJSON, or has too many rows
+    """
+    rows = _parse_bulk_products(await request.body(), request.headers.get("content-type", ""))
+    if len(rows) > MAX_BULK_PRODUCT_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A bulk request may contain at most {MAX_BULK_PRODUCT_ROWS} products"
+        )
+    if db.get_bind().dialect.name not in UPSERT_INSERTS:
+        raise HTTPException(status_code=400, detail=f"Bulk product upsert is not supported on {db.get_bind().dialect.name}")
+    
+    return StreamingResponse(_bulk_product_results(db, rows), media_type="application/x-ndjson")
+
+
+@router.post(
+    "/products/bulk/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Import products in the background",
+    description="Queue a product upsert and return its job at once; follow it with GET /jobs/{id}.",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": ProductBulkItem.model_json_schema()}
+                },
+                "application/x-ndjson": {"schema": ProductBulkItem.model_json_schema()},
+            },
+        }
+    }
+)
+async def create_product_import_job(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Queue the same upsert as ``POST /products/bulk`` as a background job.
+    
+    The job commits one chunk of rows at a time and resumes after the last committed
+    chunk if the process stops. Its result counts the rows by status and lists the
+    failed and skipped ones.
+    
+    Args:
+        request: Incoming request carrying the products
+        db: Database session dependency
+        
+    Returns:
+        JobResponse: The pending job
+        
+    Raises:
+        HTTPException: If the body is not a JSON array or NDJSON, or has too many rows
+    """
+    rows = _parse_bulk_products(await request.body(), request.headers.get("content-type", ""))
+    if len(rows) > MAX_BULK_PRODUCT_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A bulk request may contain at most {MAX_BULK_PRODUCT_ROWS} products"
+        )
+    if db.get_bind().dialect.name not in UPSERT_INSERTS:
+        raise HTTPException(status_code=400, detail=f"Bulk product upsert is not supported on {db.get_bind().dialect.name}")
+    
+    job = await db.run_sync(create_job, "product_import", {}, rows)
+    job_runner.wake()
+    return job
+
+
 @router.get(
     "/products", 
     response_model=List[ProductResponse],
@@ -61,12 +212,16 @@ def create_product(product: ProductCreate, db: Session = Depends(get_db)):
         200: {"description": "List of products retrieved successfully"}
     }
 )
-def read_products(
+async def read_products(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     name: Optional[str] = None,
+    q: Optional[str] = None,
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieve a list of products with optional filtering.
@@ -74,22 +229,176 @@ def read_products(
     Args:
         skip: Number of products to skip (pagination)
         limit: Maximum number of products to return (pagination)
+        cursor: Opaque keyset cursor; pass an empty value for the first page and the
+            X-Next-Cursor response header for the following ones (skip is ignored)
         name: Optional filter for product name (partial match)
+        q: Optional full-text query over name and description. Every word must match,
+            as a prefix; results are ordered by relevance unless a cursor is given
         is_active: Optional filter for active status
+        request: Incoming request, checked for If-None-Match
+        response: Response used to return the next-page cursor and the ETag
         db: Database session dependency
         
     Returns:
-        List[ProductResponse]: List of products matching the criteria
+        List[ProductResponse]: List of products matching the criteria, or an empty
+            304 response when the client's copy is current
     """
-    query = db.query(Product)
+    versions = (await db.execute(collection_version(Product))).all()
+    not_modified = check_not_modified(request, response, collection_etag(request, versions))
+    if not_modified:
+        return not_modified
+    
+    query = select(Product)
+    rank = None
     
     if name:
-        query = query.filter(Product.name.ilike(f"%{name}%"))
+        query = query.where(Product.name.ilike(f"%{name}%"))
+    
+    if q and search_terms(q):
+        try:
+            query, rank = apply_text_search(query, db.get_bind().dialect.name, search_terms(q))
+        except NotImplementedError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     if is_active is not None:
-        query = query.filter(Product.is_active == is_active)
+        query = query.where(Product.is_active == is_active)
+    
+    if cursor is not None:
+        # Keyset pagination: page N costs the same as page 1
+        result = await db.execute(keyset_paginate(query, cursor, (Product.id,), limit))
+        return rows_response(ProductResponse, finish_page(response, result.scalars().all(), (Product.id,), limit), response)
+    
+    if rank is not None:
+        query = query.order_by(rank, Product.id)
+    
+    result = await db.execute(query.offset(skip).limit(limit))
+    return rows_response(ProductResponse, result.scalars().all(), response)
+
+
+@router.get(
+    "/products/search",
+    response_model=ProductSearchResponse,
+    summary="Search products by attribute values",
+    description="Filter products by filterable attribute values and return per-value facet counts.",
+    responses={
+        200: {"description": "Matching products and facet counts"},
+        400: {"description": "Bad request - An attribute value is not filterable"},
+        503: {"description": "The search index is being rebuilt"}
+    }
+)
+async def search_products(
+    attribute_value_ids: List[int] = Query([]),
+    is_active: Optional[bool] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search products by attribute values, answered from the in-memory facet index.
+    
+    Args:
+        attribute_value_ids: Values to filter by; values of the same attribute are
+            combined with OR, different attributes with AND
+        is_active: Optional filter for active status
+        skip: Number of matching products to skip (pagination)
+        limit: Maximum number of products to return (pagination)
+        db: Database session dependency
+        
+    Returns:
+        ProductSearchResponse: Total match count, the requested page of products ordered
+            by ID, and value counts for every filterable attribute
+        
+    Raises:
+        HTTPException: If a value is not filterable or the index cannot be loaded
+    """
+    if not await db.run_sync(facet_index.ensure_loaded):
+        raise HTTPException(status_code=503, detail="Search index is being rebuilt, please retry")
+    
+    try:
+        result = facet_index.search(attribute_value_ids, is_active=is_active, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=503, detail="Search index is being rebuilt, please retry")
+    
+    items = []
+    if result.product_ids:
+        rows = await db.execute(select(Product).where(Product.id.in_(result.product_ids)).order_by(Product.id))
+        items = rows.scalars().all()
+    return ProductSearchResponse(
+        total=result.total,
+        items=[ProductResponse.model_validate(product) for product in items],
+        facets=result.facets
+    )
+
+
+async def _read_availability(db: AsyncSession, product_ids: List[int], start: Optional[datetime], end: Optional[datetime]) -> List[ProductAvailabilityResponse]:
+    # Booking dates are stored without timezone information
+    start = start.replace(tzinfo=None) if start else datetime.now()
+    end = end.replace(tzinfo=None) if end else start + timedelta(days=DEFAULT_AVAILABILITY_DAYS)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'to' must be after 'from'")
+    
+    found = set((await db.execute(select(Product.id).where(Product.id.in_(product_ids)))).scalars())
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    if missing:
+        detail = "Product not found" if len(product_ids) == 1 else f"Products not found: {', '.join(map(str, missing))}"
+        raise HTTPException(status_code=404, detail=detail)
+    
+    bookings = await db.run_sync(load_bookings, product_ids)
+    responses = []
+    for product_id in product_ids:
+        booked, free = availability(bookings[product_id], start, end)
+        responses.append(ProductAvailabilityResponse(
+            product_id=product_id,
+            start=start,
+            end=end,
+            booked=[{"start": interval[0], "end": interval[1]} for interval in booked],
+            free=[{"start": interval[0], "end": interval[1]} for interval in free]
+        ))
+    return responses
+
+
+@router.get(
+    "/products/availability",
+    response_model=List[ProductAvailabilityResponse],
+    summary="Get availability calendars of several products",
+    description="Return booked and free intervals of many products over the same date window.",
+    responses={
+        200: {"description": "Availability calendars in the order of product_ids"},
+        400: {"description": "Bad request - Invalid date window or too many products"},
+        404: {"description": "One or more products not found"}
+    }
+)
+async def read_products_availability(
+    product_ids: List[int] = Query(...),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieve availability calendars for several products at once.
+    
+    Args:
+        product_ids: IDs of the products, each listed once
+        start: Start of the window (query parameter ``from``), defaults to now
+        end: End of the window (query parameter ``to``), defaults to 90 days after start
+        db: Database session dependency
+        
+    Returns:
+        List[ProductAvailabilityResponse]: One calendar per product, in request order
+        
+    Raises:
+        HTTPException: If the window is invalid, too many products are requested or a product does not exist
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if len(product_ids) > MAX_AVAILABILITY_PRODUCTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_AVAILABILITY_PRODUCTS} products may be requested at once"
+        )
     
-    return query.offset(skip).limit(limit).all()
+    return await _read_availability(db, product_ids, start, end)
 
 
 @router.get(
@@ -102,71 +411,72 @@ def read_products(
         404: {"description": "Product not found"}
     }
 )
-def read_product(product_id: int, db: Session = Depends(get_db)):
+async def read_product(product_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve detailed information about a specific product by its ID.
     
     Args:
         product_id: ID of the product to retrieve
+        request: Incoming request, checked for If-None-Match and If-Modified-Since
+        response: Response used to return the ETag and Last-Modified headers
         db: Database session dependency
         
     Returns:
-        ProductDetailResponse: Detailed product information including attributes and pricing
+        ProductDetailResponse: Detailed product information including attributes and pricing,
+            or an empty 304 response when the client's copy is current
         
     Raises:
         HTTPException: If the product is not found
     """
-    db_product = db.query(Product).filter(Product.id == product_id).first()
-    if db_product is None:
+    # The materialised document is one primary-key read, without loading the product graph
+    document = await db.run_sync(read_product_document, product_id)
+    if document is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Get attribute values with their attribute information
-    attribute_values = []
-    for pav in db_product.attribute_values:
-        av = pav.attribute_value
-        attribute_values.append({
-            "id": av.id,
-            "attribute": {
-                "id": av.attribute.id,
-                "name": av.attribute.name,
-                "type": av.attribute.type
-            },
-            "value": av.value
-        })
-    
-    # Get pricing information
-    pricing = []
-    for price in db_product.pricing:
-        pricing.append({
-            "id": price.id,
-            "region": {
-                "id": price.region.id,
-                "name": price.region.name,
-                "code": price.region.code
-            },
-            "rental_period": {
-                "id": price.rental_period.id,
-                "name": price.rental_period.name,
-                "days": price.rental_period.days
-            },
-            "price": float(price.price),
-            "is_active": price.is_active
-        })
-    
-    # Create response with nested data
-    response = ProductDetailResponse(
-        id=db_product.id,
-        name=db_product.name,
-        description=db_product.description,
-        sku=db_product.sku,
-        is_active=db_product.is_active,
-        created_at=db_product.created_at,
-        updated_at=db_product.updated_at,
-        attribute_values=attribute_values,
-        pricing=pricing
-    )
+    body, etag, last_modified = document
+    not_modified = check_not_modified(request, response, etag, last_modified)
+    if not_modified:
+        return not_modified
+    
+    return json_response(body, response)
+
+
+@router.get(
+    "/products/{product_id}/availability",
+    response_model=ProductAvailabilityResponse,
+    summary="Get the availability calendar of a product",
+    description="Return the merged booked intervals and the free intervals between them over a date window.",
+    responses={
+        200: {"description": "Availability calendar retrieved successfully"},
+        400: {"description": "Bad request - Invalid date window"},
+        404: {"description": "Product not found"}
+    }
+)
+async def read_product_availability(
+    product_id: int,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieve the availability calendar of a product from its CONFIRMED bookings.
+    
+    Booked intervals are merged and clipped to the window and include both ends,
+    like the availability check, so a free interval is open where it touches one.
     
-    return response
+    Args:
+        product_id: ID of the product
+        start: Start of the window (query parameter ``from``), defaults to now
+        end: End of the window (query parameter ``to``), defaults to 90 days after start
+        db: Database session dependency
+        
+    Returns:
+        ProductAvailabilityResponse: Booked and free intervals within the window
+        
+    Raises:
+        HTTPException: If the window is invalid or the product is not found
+    """
+    return (await _read_availability(db, [product_id], start, end))[0]
 
 
 @router.put(
@@ -180,7 +490,7 @@ def read_product(product_id: int, db: Session = Depends(get_db)):
         404: {"description": "Product not found"}
     }
 )
-def update_product(product_id: int, product: ProductUpdate, db: Session = Depends(get_db)):
+async def update_product(product_id: int, product: ProductUpdate, db: AsyncSession = Depends(get_async_db)):
     """
     Update an existing product with the provided details.
     
@@ -195,25 +505,26 @@ def update_product(product_id: int, product: ProductUpdate, db: Session = Depend
     Raises:
         HTTPException: If the product is not found or if there's a duplicate name/SKU
     """
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = await db.get(Product, product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Check for duplicate product name
-    duplicate_product = db.query(Product).filter(Product.name == product.name, Product.id != product_id).first()
+    duplicate_product = (await db.execute(select(Product.id).where(Product.name == product.name, Product.id != product_id))).first()
     if duplicate_product:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product with this name already exists.")
     
     # Check for duplicate SKU
-    duplicate_sku = db.query(Product).filter(Product.sku == product.sku, Product.id != product_id).first()
+    duplicate_sku = (await db.execute(select(Product.id).where(Product.sku == product.sku, Product.id != product_id))).first()
     if duplicate_sku:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Product with this SKU already exists.")
 
     for key, value in product.dict(exclude_unset=True).items():
         setattr(db_product, key, value)
     
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    await db.refresh(db_product)
+    facet_index.sync_product(db_product)
     return db_product
 
 
@@ -228,7 +539,7 @@ def update_product(product_id: int, product: ProductUpdate, db: Session = Depend
         404: {"description": "Product not found"}
     }
 )
-def delete_product(product_id: int, db: Session = Depends(get_db)):
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a product from the system by its ID.
     
@@ -242,14 +553,15 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If the product is not found or cannot be deleted
     """
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = await db.get(Product, product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
     try:
-        db.delete(db_product)
-        db.commit()
+        await db.delete(db_product)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Failed to delete product. It may be referenced elsewhere.")
+    facet_index.discard_product(product_id)
     return {"detail": "Product has been deleted"}
\ No newline at end of file
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.models.region import Region
+from app.schemas.quote import QuoteRequest, QuoteResponse
+from app.services.quotes import MAX_QUOTE_DAYS, quote_products, rental_days
+
+router = APIRouter()
+
+# Upper bound on the number of products priced by a single quote request
+MAX_QUOTE_PRODUCTS = 500
+
+
+@router.post("/quotes", response_model=QuoteResponse)
+async def create_quote(quote: QuoteRequest, db: AsyncSession = Depends(get_async_db)):
+    """Price a rental of one or many products, combining the rental periods that make it cheapest"""
+    if not quote.product_ids:
+        raise HTTPException(status_code=400, detail="At least one product is required")
+    if len(quote.product_ids) > MAX_QUOTE_PRODUCTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A quote may contain at most {MAX_QUOTE_PRODUCTS} products"
+        )
+    
+    days = rental_days(quote.start_date, quote.end_date)
+    if days < 1:
+        raise HTTPException(status_code=400, detail="End date must be after start date")
+    if days > MAX_QUOTE_DAYS:
+        raise HTTPException(status_code=400, detail=f"A quote may cover at most {MAX_QUOTE_DAYS} days")
+    
+    region = await db.get(Region, quote.region_id)
+    if not region:
+        raise HTTPException(status_code=404, detail="Region not found")
+    
+    quotes = await db.run_sync(quote_products, quote.product_ids, quote.region_id, days)
+    return QuoteResponse(
+        region_id=quote.region_id,
+        start_date=quote.start_date,
+        end_date=quote.end_date,
+        days=days,
+        quotes=quotes,
+    )
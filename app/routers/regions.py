@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
+import csv
+import io
 
+from app.conditional import check_not_modified, collection_etag, collection_version, row_validators
 from app.database import get_db
+from app.pagination import keyset_paginate, finish_page
+from app.response_cache import cache_control, response_cache
+from app.serialization import model_response, serialize_rows
 from app.models.region import Region
-from app.schemas.region import RegionCreate, RegionUpdate, RegionResponse, RegionDetailResponse
+from app.models.product import Product
+from app.models.product_pricing import ProductPricing
+from app.models.rental_period import RentalPeriod
+from app.schemas.region import RegionCreate, RegionUpdate, RegionResponse, RegionDetailResponse, PriceMatrixFormat, PriceMatrixResponse
 
 router = APIRouter()
 
+# Cache tags of the list response, the tables it is read from
+REGIONS_CACHE_TAGS = ("regions",)
+
 
 @router.post("/regions", response_model=RegionResponse, status_code=status.HTTP_201_CREATED)
 def create_region(region: RegionCreate, db: Session = Depends(get_db)):
@@ -19,19 +32,36 @@ def create_region(region: RegionCreate, db: Session = Depends(get_db)):
     db_region = Region(**region.dict())
     db.add(db_region)
     db.commit()
+    response_cache.invalidate("regions")
     db.refresh(db_region)
     return db_region
 
 
-@router.get("/regions", response_model=List[RegionResponse])
+@router.get(
+    "/regions",
+    response_model=List[RegionResponse],
+    dependencies=[Depends(cache_control("public, no-cache"))],
+)
 def read_regions(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     name: Optional[str] = None,
     code: Optional[str] = None,
     is_active: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
+    cached, cache_key = response_cache.lookup(request, response, REGIONS_CACHE_TAGS)
+    if cached:
+        return cached
+    
+    versions = db.execute(collection_version(Region)).all()
+    not_modified = check_not_modified(request, response, collection_etag(request, versions))
+    if not_modified:
+        return not_modified
+    
     query = db.query(Region)
     
     if name:
@@ -43,15 +73,31 @@ def read_regions(
     if is_active is not None:
         query = query.filter(Region.is_active == is_active)
     
-    return query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        # Keyset pagination: page N costs the same as page 1
+        rows = keyset_paginate(query, cursor, (Region.id,), limit).all()
+        rows = finish_page(response, rows, (Region.id,), limit)
+    else:
+        rows = query.offset(skip).limit(limit).all()
+    
+    # Serialise once here so cache hits skip both the query and response validation
+    return response_cache.store(cache_key, response, serialize_rows(RegionResponse, rows))
 
 
 @router.get("/regions/{region_id}", response_model=RegionDetailResponse)
-def read_region(region_id: int, db: Session = Depends(get_db)):
-    db_region = db.query(Region).filter(Region.id == region_id).first()
+def read_region(region_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    db_region = db.query(Region).filter(Region.id == region_id).options(
+        selectinload(Region.pricing).joinedload(ProductPricing.product),
+        selectinload(Region.pricing).joinedload(ProductPricing.rental_period)
+    ).first()
     if db_region is None:
         raise HTTPException(status_code=404, detail="Region not found")
     
+    rows = [db_region, *(row for price in db_region.pricing for row in (price, price.product, price.rental_period))]
+    not_modified = check_not_modified(request, response, *row_validators(rows))
+    if not_modified:
+        return not_modified
+    
     # Get pricing information
     pricing = []
     for price in db_region.pricing:
@@ -72,7 +118,7 @@ def read_region(region_id: int, db: Session = Depends(get_db)):
         })
     
     # Create response with nested data
-    response = RegionDetailResponse(
+    detail = RegionDetailResponse(
         id=db_region.id,
         name=db_region.name,
         code=db_region.code,
@@ -82,7 +128,96 @@ def read_region(region_id: int, db: Session = Depends(get_db)):
         pricing=pricing
     )
     
-    return response
+    return detail
+
+
+@router.get(
+    "/regions/{region_id}/price-matrix",
+    response_model=PriceMatrixResponse,
+    responses={200: {"content": {"text/csv": {}}}},
+)
+def read_region_price_matrix(
+    region_id: int,
+    request: Request,
+    response: Response,
+    format: PriceMatrixFormat = PriceMatrixFormat.JSON,
+    is_active: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Rate card of a region: every priced product against every rental period, from one joined query.
+    
+    Cells carry no active flag, so the matrix holds the active prices only, or the
+    inactive ones with ``is_active=false``.
+    """
+    if db.get(Region, region_id) is None:
+        raise HTTPException(status_code=404, detail="Region not found")
+    
+    # Product and period names are part of the matrix, so their tables version it too
+    versions = db.execute(collection_version(ProductPricing, Product, RentalPeriod)).all()
+    etag = collection_etag(request, versions)
+    not_modified = check_not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    
+    query = (
+        select(
+            ProductPricing.product_id, ProductPricing.rental_period_id, ProductPricing.price,
+            Product.name, Product.sku, RentalPeriod.name, RentalPeriod.days,
+        )
+        .join(Product, ProductPricing.product_id == Product.id)
+        .join(RentalPeriod, ProductPricing.rental_period_id == RentalPeriod.id)
+        .where(ProductPricing.region_id == region_id, ProductPricing.is_active == is_active)
+        .order_by(ProductPricing.product_id)
+    )
+    matrix = _build_price_matrix(region_id, db.execute(query).all())
+    
+    if format == PriceMatrixFormat.CSV:
+        return Response(
+            content=_price_matrix_csv(matrix),
+            media_type="text/csv",
+            headers={**response.headers, "Content-Disposition": f'attachment; filename="region-{region_id}-prices.csv"'},
+        )
+    return model_response(matrix, response)
+
+
+def _build_price_matrix(region_id: int, rows) -> PriceMatrixResponse:
+    products = {}
+    periods = {}
+    for product_id, rental_period_id, _, product_name, sku, period_name, days in rows:
+        products.setdefault(product_id, (product_name, sku))
+        periods.setdefault(rental_period_id, (period_name, days))
+    
+    # Shortest periods first, as on a printed rate card
+    period_ids = sorted(periods, key=lambda period_id: (periods[period_id][1], period_id))
+    row_of = {product_id: i for i, product_id in enumerate(products)}
+    column_of = {period_id: j for j, period_id in enumerate(period_ids)}
+    prices = [None] * (len(products) * len(period_ids))
+    for product_id, rental_period_id, price, *_ in rows:
+        prices[row_of[product_id] * len(period_ids) + column_of[rental_period_id]] = float(price)
+    
+    return PriceMatrixResponse(
+        region_id=region_id,
+        product_ids=list(products),
+        product_names=[name for name, _ in products.values()],
+        product_skus=[sku for _, sku in products.values()],
+        period_ids=period_ids,
+        period_names=[periods[period_id][0] for period_id in period_ids],
+        period_days=[periods[period_id][1] for period_id in period_ids],
+        prices=prices,
+    )
+
+
+def _price_matrix_csv(matrix: PriceMatrixResponse) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["product_id", "sku", "name", *matrix.period_names])
+    width = len(matrix.period_ids)
+    for i, product_id in enumerate(matrix.product_ids):
+        prices = matrix.prices[i * width:(i + 1) * width]
+        writer.writerow([product_id, matrix.product_skus[i], matrix.product_names[i],
+                         *("" if price is None else f"{price:.2f}" for price in prices)])
+    return buffer.getvalue()
 
 
 @router.put("/regions/{region_id}", response_model=RegionResponse)
@@ -100,6 +235,7 @@ def update_region(region_id: int, region: RegionUpdate, db: Session = Depends(ge
         setattr(db_region, key, value)
     
     db.commit()
+    response_cache.invalidate("regions")
     db.refresh(db_region)
     return db_region
 
@@ -112,4 +248,5 @@ def delete_region(region_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_region)
     db.commit()
+    response_cache.invalidate("regions")
     return {"detail": "Region has been deleted"}
\ No newline at end of file
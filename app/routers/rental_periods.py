@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 
+from app.conditional import check_not_modified, collection_etag, collection_version, row_validators
 from app.database import get_db
+from app.pagination import keyset_paginate, finish_page
+from app.response_cache import cache_control, response_cache
+from app.serialization import serialize_rows
 from app.models.rental_period import RentalPeriod
+from app.models.product_pricing import ProductPricing
 from app.schemas.rental_period import RentalPeriodCreate, RentalPeriodUpdate, RentalPeriodResponse, RentalPeriodDetailResponse
 
 router = APIRouter()
 
+# Cache tags of the list response, the tables it is read from
+RENTAL_PERIODS_CACHE_TAGS = ("rental_periods",)
+
 
 @router.post("/rental-periods", response_model=RentalPeriodResponse, status_code=status.HTTP_201_CREATED)
 def create_rental_period(rental_period: RentalPeriodCreate, db: Session = Depends(get_db)):
@@ -19,19 +27,36 @@ def create_rental_period(rental_period: RentalPeriodCreate, db: Session = Depend
     db_rental_period = RentalPeriod(**rental_period.dict())
     db.add(db_rental_period)
     db.commit()
+    response_cache.invalidate("rental_periods")
     db.refresh(db_rental_period)
     return db_rental_period
 
 
-@router.get("/rental-periods", response_model=List[RentalPeriodResponse])
+@router.get(
+    "/rental-periods",
+    response_model=List[RentalPeriodResponse],
+    dependencies=[Depends(cache_control("public, no-cache"))],
+)
 def read_rental_periods(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
     name: Optional[str] = None,
     days: Optional[int] = None,
     is_active: Optional[bool] = None,
     db: Session = Depends(get_db)
 ):
+    cached, cache_key = response_cache.lookup(request, response, RENTAL_PERIODS_CACHE_TAGS)
+    if cached:
+        return cached
+    
+    versions = db.execute(collection_version(RentalPeriod)).all()
+    not_modified = check_not_modified(request, response, collection_etag(request, versions))
+    if not_modified:
+        return not_modified
+    
     query = db.query(RentalPeriod)
     
     if name:
@@ -43,15 +68,31 @@ def read_rental_periods(
     if is_active is not None:
         query = query.filter(RentalPeriod.is_active == is_active)
     
-    return query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        # Keyset pagination: page N costs the same as page 1
+        rows = keyset_paginate(query, cursor, (RentalPeriod.id,), limit).all()
+        rows = finish_page(response, rows, (RentalPeriod.id,), limit)
+    else:
+        rows = query.offset(skip).limit(limit).all()
+    
+    # Serialise once here so cache hits skip both the query and response validation
+    return response_cache.store(cache_key, response, serialize_rows(RentalPeriodResponse, rows))
 
 
 @router.get("/rental-periods/{rental_period_id}", response_model=RentalPeriodDetailResponse)
-def read_rental_period(rental_period_id: int, db: Session = Depends(get_db)):
-    db_rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == rental_period_id).first()
+def read_rental_period(rental_period_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    db_rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == rental_period_id).options(
+        selectinload(RentalPeriod.pricing).joinedload(ProductPricing.product),
+        selectinload(RentalPeriod.pricing).joinedload(ProductPricing.region)
+    ).first()
     if db_rental_period is None:
         raise HTTPException(status_code=404, detail="Rental period not found")
     
+    rows = [db_rental_period, *(row for price in db_rental_period.pricing for row in (price, price.product, price.region))]
+    not_modified = check_not_modified(request, response, *row_validators(rows))
+    if not_modified:
+        return not_modified
+    
     # Get pricing information
     pricing = []
     for price in db_rental_period.pricing:
@@ -72,7 +113,7 @@ def read_rental_period(rental_period_id: int, db: Session = Depends(get_db)):
         })
     
     # Create response with nested data
-    response = RentalPeriodDetailResponse(
+    detail = RentalPeriodDetailResponse(
         id=db_rental_period.id,
         name=db_rental_period.name,
         days=db_rental_period.days,
@@ -82,7 +123,7 @@ def read_rental_period(rental_period_id: int, db: Session = Depends(get_db)):
         pricing=pricing
     )
     
-    return response
+    return detail
 
 
 @router.put("/rental-periods/{rental_period_id}", response_model=RentalPeriodResponse)
@@ -100,6 +141,7 @@ def update_rental_period(rental_period_id: int, rental_period: RentalPeriodUpdat
         setattr(db_rental_period, key, value)
     
     db.commit()
+    response_cache.invalidate("rental_periods")
     db.refresh(db_rental_period)
     return db_rental_period
 
@@ -112,4 +154,5 @@ def delete_rental_period(rental_period_id: int, db: Session = Depends(get_db)):
     
     db.delete(db_rental_period)
     db.commit()
+    response_cache.invalidate("rental_periods")
     return {"detail": "Rental period has been deleted"}
\ No newline at end of file
@@ -1,31 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Body
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta
+from decimal import Decimal
+import csv
+import enum
+import io
+import json
 
-from app.database import get_db
+from app.database import get_async_db
+from app.pagination import keyset_paginate, finish_page
 from app.models.rental_transaction import RentalTransaction, TransactionStatus
 from app.models.product import Product
 from app.models.region import Region
 from app.models.rental_period import RentalPeriod
 from app.models.product_pricing import ProductPricing
-from app.schemas.rental_transaction import RentalTransactionCreate, RentalTransactionUpdate, RentalTransactionResponse, RentalTransactionDetailResponse, RentalTransactionCheck, RentalTransactionCheckResponse
+from app.schemas.rental_transaction import RentalTransactionCreate, RentalTransactionUpdate, RentalTransactionResponse, RentalTransactionDetailResponse, RentalTransactionCheck, RentalTransactionCheckResponse, ExportFormat
+from app.cache import MISSING
+from app.schemas.product_pricing import ProductPricingResponse
+from app.services.booking import BookingConflictError, lock_product_bookings, run_booking
+from app.services.booking_index import booking_index
+from app.services.pricing_cache import pricing_cache
+# Registers the flush hook that keeps the revenue rollups in step with transaction writes
+from app.services import revenue_rollups  # noqa: F401
 
 router = APIRouter()
 
 
+async def _get_by_ids(db: AsyncSession, model, object_ids) -> dict:
+    result = await db.execute(select(model).where(model.id.in_(object_ids)))
+    return {obj.id: obj for obj in result.scalars()}
+
+
+async def _has_overlapping_transaction(db: AsyncSession, product_id: int, start_date: datetime, end_date: datetime, exclude_id: Optional[int] = None) -> bool:
+    query = select(RentalTransaction.id).where(
+        RentalTransaction.product_id == product_id,
+        RentalTransaction.status == TransactionStatus.CONFIRMED,
+        RentalTransaction.start_date <= end_date,
+        RentalTransaction.end_date >= start_date
+    )
+    if exclude_id is not None:
+        query = query.where(RentalTransaction.id != exclude_id)
+    result = await db.execute(query.limit(1))
+    return result.first() is not None
+
+
 @router.post("/rental-transactions", response_model=RentalTransactionResponse, status_code=status.HTTP_201_CREATED)
-def create_rental_transaction(transaction: RentalTransactionCreate, db: Session = Depends(get_db)):
+async def create_rental_transaction(transaction: RentalTransactionCreate, db: AsyncSession = Depends(get_async_db)):
     # Verify that product, region, and rental period exist
-    product = db.query(Product).filter(Product.id == transaction.product_id).first()
+    product = await db.get(Product, transaction.product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    region = db.query(Region).filter(Region.id == transaction.region_id).first()
+    region = await db.get(Region, transaction.region_id)
     if not region:
         raise HTTPException(status_code=404, detail="Region not found")
     
-    rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == transaction.rental_period_id).first()
+    rental_period = await db.get(RentalPeriod, transaction.rental_period_id)
     if not rental_period:
         raise HTTPException(status_code=404, detail="Rental period not found")
     
@@ -33,31 +67,43 @@ def create_rental_transaction(transaction: RentalTransactionCreate, db: Session
     if transaction.start_date >= transaction.end_date:
         raise HTTPException(status_code=400, detail="End date must be after start date")
     
-    # Check if product is already rented for the requested period
-    overlapping_transactions = db.query(RentalTransaction).filter(
-        RentalTransaction.product_id == transaction.product_id,
-        RentalTransaction.status == TransactionStatus.CONFIRMED,
-        RentalTransaction.start_date <= transaction.end_date,
-        RentalTransaction.end_date >= transaction.start_date
-    ).all()
-    
-    if overlapping_transactions:
+    async def book():
+        # Check if product is already rented for the requested period. Bookings are
+        # checked against the database under the product's booking lock, so writes
+        # from other workers are seen and cannot slip in before the insert.
+        await db.run_sync(lock_product_bookings, transaction.product_id)
+        await _ensure_available(db, transaction.product_id, transaction.start_date, transaction.end_date)
+        
+        db_transaction = RentalTransaction(**transaction.dict())
+        db.add(db_transaction)
+        await db.commit()
+        return db_transaction
+    
+    db_transaction = await _run_booking(db, book)
+    await db.refresh(db_transaction)
+    booking_index.sync(db_transaction)
+    return db_transaction
+
+
+async def _ensure_available(db: AsyncSession, product_id: int, start_date: datetime, end_date: datetime, exclude_id: Optional[int] = None) -> None:
+    if await _has_overlapping_transaction(db, product_id, start_date, end_date, exclude_id=exclude_id):
+        # Release the booking lock before answering
+        await db.rollback()
         raise HTTPException(
             status_code=400, 
             detail="Product is already rented for the requested period"
         )
-    
-    db_transaction = RentalTransaction(**transaction.dict())
-    db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
-    return db_transaction
 
 
-@router.get("/rental-transactions", response_model=List[RentalTransactionResponse])
-def read_rental_transactions(
-    skip: int = 0, 
-    limit: int = 100, 
+async def _run_booking(db: AsyncSession, book):
+    try:
+        return await run_booking(db, book)
+    except BookingConflictError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _filter_transactions(
+    query,
     product_id: Optional[int] = None,
     region_id: Optional[int] = None,
     rental_period_id: Optional[int] = None,
@@ -66,46 +112,173 @@ def read_rental_transactions(
     start_date_from: Optional[datetime] = None,
     start_date_to: Optional[datetime] = None,
     end_date_from: Optional[datetime] = None,
-    end_date_to: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    end_date_to: Optional[datetime] = None
 ):
-    query = db.query(RentalTransaction)
-    
     if product_id:
-        query = query.filter(RentalTransaction.product_id == product_id)
+        query = query.where(RentalTransaction.product_id == product_id)
     
     if region_id:
-        query = query.filter(RentalTransaction.region_id == region_id)
+        query = query.where(RentalTransaction.region_id == region_id)
     
     if rental_period_id:
-        query = query.filter(RentalTransaction.rental_period_id == rental_period_id)
+        query = query.where(RentalTransaction.rental_period_id == rental_period_id)
     
     if customer_email:
-        query = query.filter(RentalTransaction.customer_email.ilike(f"%{customer_email}%"))
+        query = query.where(RentalTransaction.customer_email.ilike(f"%{customer_email}%"))
     
     if status:
-        query = query.filter(RentalTransaction.status == status)
+        query = query.where(RentalTransaction.status == status)
     
     if start_date_from:
-        query = query.filter(RentalTransaction.start_date >= start_date_from)
+        query = query.where(RentalTransaction.start_date >= start_date_from)
     
     if start_date_to:
-        query = query.filter(RentalTransaction.start_date <= start_date_to)
+        query = query.where(RentalTransaction.start_date <= start_date_to)
     
     if end_date_from:
-        query = query.filter(RentalTransaction.end_date >= end_date_from)
+        query = query.where(RentalTransaction.end_date >= end_date_from)
     
     if end_date_to:
-        query = query.filter(RentalTransaction.end_date <= end_date_to)
+        query = query.where(RentalTransaction.end_date <= end_date_to)
     
-    return query.order_by(RentalTransaction.created_at.desc()).offset(skip).limit(limit).all()
+    return query
+
+
+@router.get("/rental-transactions", response_model=List[RentalTransactionResponse])
+async def read_rental_transactions(
+    response: Response,
+    skip: int = 0, 
+    limit: int = 100, 
+    cursor: Optional[str] = None,
+    product_id: Optional[int] = None,
+    region_id: Optional[int] = None,
+    rental_period_id: Optional[int] = None,
+    customer_email: Optional[str] = None,
+    status: Optional[TransactionStatus] = None,
+    start_date_from: Optional[datetime] = None,
+    start_date_to: Optional[datetime] = None,
+    end_date_from: Optional[datetime] = None,
+    end_date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    query = _filter_transactions(
+        select(RentalTransaction),
+        product_id=product_id,
+        region_id=region_id,
+        rental_period_id=rental_period_id,
+        customer_email=customer_email,
+        status=status,
+        start_date_from=start_date_from,
+        start_date_to=start_date_to,
+        end_date_from=end_date_from,
+        end_date_to=end_date_to
+    )
+    
+    if cursor is not None:
+        # Keyset pagination on (created_at, id): page N costs the same as page 1
+        columns = (RentalTransaction.created_at, RentalTransaction.id)
+        result = await db.execute(keyset_paginate(query, cursor, columns, limit, descending=True))
+        return finish_page(response, result.scalars().all(), columns, limit)
+    
+    result = await db.execute(query.order_by(RentalTransaction.created_at.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+# Rows fetched from the server-side cursor per round trip during an export
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+async def _export_rows(result, columns: List[str], format: ExportFormat):
+    # One chunk of output per batch keeps memory flat regardless of the export size
+    if format == ExportFormat.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+    async for rows in result.partitions():
+        if format == ExportFormat.CSV:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_export_value(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+        else:
+            yield "".join(
+                json.dumps(dict(zip(columns, (_export_value(value) for value in row)))) + "\n"
+                for row in rows
+            )
+
+
+@router.get(
+    "/rental-transactions/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}}
+)
+async def export_rental_transactions(
+    format: ExportFormat = ExportFormat.NDJSON,
+    product_id: Optional[int] = None,
+    region_id: Optional[int] = None,
+    rental_period_id: Optional[int] = None,
+    customer_email: Optional[str] = None,
+    status: Optional[TransactionStatus] = None,
+    start_date_from: Optional[datetime] = None,
+    start_date_to: Optional[datetime] = None,
+    end_date_from: Optional[datetime] = None,
+    end_date_to: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stream the rental ledger as NDJSON or CSV, with the same filters as the list endpoint"""
+    # Plain columns rather than ORM objects, streamed from a server-side cursor
+    table_columns = list(RentalTransaction.__table__.columns)
+    query = _filter_transactions(
+        select(*table_columns),
+        product_id=product_id,
+        region_id=region_id,
+        rental_period_id=rental_period_id,
+        customer_email=customer_email,
+        status=status,
+        start_date_from=start_date_from,
+        start_date_to=start_date_to,
+        end_date_from=end_date_from,
+        end_date_to=end_date_to
+    ).order_by(RentalTransaction.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    result = await db.stream(query)
+    return StreamingResponse(
+        _export_rows(result, [column.name for column in table_columns], format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="rental-transactions.{format.value}"'}
+    )
 
 
 @router.get("/rental-transactions/{transaction_id}", response_model=RentalTransactionDetailResponse)
-def read_rental_transaction(transaction_id: int, db: Session = Depends(get_db)):
+async def read_rental_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
+    response = await db.run_sync(_build_transaction_detail, transaction_id)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Rental transaction not found")
+    
+    return response
+
+
+def _build_transaction_detail(db: Session, transaction_id: int) -> Optional[RentalTransactionDetailResponse]:
+    # Runs inside AsyncSession.run_sync so the relationships below can lazy load
     db_transaction = db.query(RentalTransaction).filter(RentalTransaction.id == transaction_id).first()
     if db_transaction is None:
-        raise HTTPException(status_code=404, detail="Rental transaction not found")
+        return None
     
     # Create response with nested data
     response = RentalTransactionDetailResponse(
@@ -144,8 +317,8 @@ def read_rental_transaction(transaction_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/rental-transactions/{transaction_id}", response_model=RentalTransactionResponse)
-def update_rental_transaction(transaction_id: int, transaction: RentalTransactionUpdate, db: Session = Depends(get_db)):
-    db_transaction = db.query(RentalTransaction).filter(RentalTransaction.id == transaction_id).first()
+async def update_rental_transaction(transaction_id: int, transaction: RentalTransactionUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_transaction = await db.get(RentalTransaction, transaction_id)
     if db_transaction is None:
         raise HTTPException(status_code=404, detail="Rental transaction not found")
     
@@ -153,17 +326,17 @@ def update_rental_transaction(transaction_id: int, transaction: RentalTransactio
     
     # If updating product, region, or rental period, verify they exist
     if "product_id" in update_data:
-        product = db.query(Product).filter(Product.id == update_data["product_id"]).first()
+        product = await db.get(Product, update_data["product_id"])
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
     
     if "region_id" in update_data:
-        region = db.query(Region).filter(Region.id == update_data["region_id"]).first()
+        region = await db.get(Region, update_data["region_id"])
         if not region:
             raise HTTPException(status_code=404, detail="Region not found")
     
     if "rental_period_id" in update_data:
-        rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == update_data["rental_period_id"]).first()
+        rental_period = await db.get(RentalPeriod, update_data["rental_period_id"])
         if not rental_period:
             raise HTTPException(status_code=404, detail="Rental period not found")
     
@@ -174,66 +347,131 @@ def update_rental_transaction(transaction_id: int, transaction: RentalTransactio
     if start_date >= end_date:
         raise HTTPException(status_code=400, detail="End date must be after start date")
     
-    # Check for overlapping rentals if changing dates or product
-    if ("start_date" in update_data or "end_date" in update_data or "product_id" in update_data) and \
-       (update_data.get("status", db_transaction.status) == TransactionStatus.CONFIRMED):
-        
+    async def book():
+        db_transaction = await db.get(RentalTransaction, transaction_id)
+        # Check for overlapping rentals if changing dates or product, or confirming
         product_id = update_data.get("product_id", db_transaction.product_id)
+        confirming = update_data.get("status", db_transaction.status) == TransactionStatus.CONFIRMED
+        if confirming and ({"start_date", "end_date", "product_id"} & update_data.keys()
+                           or db_transaction.status != TransactionStatus.CONFIRMED):
+            await db.run_sync(lock_product_bookings, product_id)
+            # Re-read under the lock, the row may have changed since it was validated
+            db_transaction = await db.get(RentalTransaction, transaction_id, populate_existing=True)
+            if db_transaction is None:
+                raise HTTPException(status_code=404, detail="Rental transaction not found")
+            await _ensure_available(
+                db,
+                product_id,
+                update_data.get("start_date", db_transaction.start_date),
+                update_data.get("end_date", db_transaction.end_date),
+                exclude_id=transaction_id
+            )
         
-        overlapping_transactions = db.query(RentalTransaction).filter(
-            RentalTransaction.product_id == product_id,
-            RentalTransaction.status == TransactionStatus.CONFIRMED,
-            RentalTransaction.id != transaction_id,
-            RentalTransaction.start_date <= end_date,
-            RentalTransaction.end_date >= start_date
-        ).all()
+        for key, value in update_data.items():
+            setattr(db_transaction, key, value)
         
-        if overlapping_transactions:
-            raise HTTPException(
-                status_code=400, 
-                detail="Product is already rented for the requested period"
-            )
-    
-    for key, value in update_data.items():
-        setattr(db_transaction, key, value)
+        await db.commit()
+        return db_transaction
     
-    db.commit()
-    db.refresh(db_transaction)
+    db_transaction = await _run_booking(db, book)
+    await db.refresh(db_transaction)
+    booking_index.sync(db_transaction)
     return db_transaction
 
 
 @router.delete("/rental-transactions/{transaction_id}", status_code=status.HTTP_200_OK)
-def delete_rental_transaction(transaction_id: int, db: Session = Depends(get_db)):
-    db_transaction = db.query(RentalTransaction).filter(RentalTransaction.id == transaction_id).first()
+async def delete_rental_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_transaction = await db.get(RentalTransaction, transaction_id)
     if db_transaction is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
-    db.delete(db_transaction)
-    db.commit()
+    await db.delete(db_transaction)
+    await db.commit()
+    booking_index.discard(transaction_id)
     return {"detail": "Rental transaction has been deleted"}
 
 
 @router.put("/rental-transactions/{transaction_id}/status", response_model=RentalTransactionResponse)
-def update_transaction_status(
+async def update_transaction_status(
     transaction_id: int, 
     status: TransactionStatus, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_transaction = db.query(RentalTransaction).filter(RentalTransaction.id == transaction_id).first()
+    db_transaction = await db.get(RentalTransaction, transaction_id)
     if db_transaction is None:
         raise HTTPException(status_code=404, detail="Rental transaction not found")
     
-    db_transaction.status = status
-    db.commit()
-    db.refresh(db_transaction)
+    async def book():
+        db_transaction = await db.get(RentalTransaction, transaction_id)
+        if status == TransactionStatus.CONFIRMED and db_transaction.status != TransactionStatus.CONFIRMED:
+            # Re-confirming a booking must not overlap bookings made in the meantime
+            await db.run_sync(lock_product_bookings, db_transaction.product_id)
+            db_transaction = await db.get(RentalTransaction, transaction_id, populate_existing=True)
+            if db_transaction is None:
+                raise HTTPException(status_code=404, detail="Rental transaction not found")
+            await _ensure_available(db, db_transaction.product_id, db_transaction.start_date, db_transaction.end_date, exclude_id=transaction_id)
+        
+        db_transaction.status = status
+        await db.commit()
+        return db_transaction
+    
+    db_transaction = await _run_booking(db, book)
+    await db.refresh(db_transaction)
+    booking_index.sync(db_transaction)
     return db_transaction
 
 
-@router.post("/check-rental", response_model=RentalTransactionCheckResponse)
-async def check_rental_transaction(check: RentalTransactionCheck = Body(...), db: Session = Depends(get_db)):
-    """Check if a product is available for rental based on pricing_id and date range"""
+# Upper bound on the number of checks accepted by a single batch request
+MAX_BATCH_CHECKS = 1000
+
+
+async def _get_pricing(db: AsyncSession, checks: List[RentalTransactionCheck]) -> dict:
+    # Answer from the pricing cache where the cached row for the requested combination
+    # is the one referenced by the check, and fetch the rest with a single IN query
+    pricing_by_id = {}
+    for check in checks:
+        cached = pricing_cache.get(check.product_id, check.region_id, check.rental_period_id)
+        if cached is not MISSING and cached is not None and cached["id"] == check.pricing_id:
+            pricing_by_id[check.pricing_id] = ProductPricingResponse.model_validate(cached)
+    
+    missing_ids = {check.pricing_id for check in checks} - pricing_by_id.keys()
+    if missing_ids:
+        generation = pricing_cache.generation
+        fetched = await _get_by_ids(db, ProductPricing, missing_ids)
+        for pricing in fetched.values():
+            pricing_cache.store(pricing.product_id, pricing.region_id, pricing.rental_period_id, pricing, generation)
+        pricing_by_id.update(fetched)
+    return pricing_by_id
+
+
+async def _check_availability(checks: List[RentalTransactionCheck], db: AsyncSession) -> List[RentalTransactionCheckResponse]:
+    """
+    Evaluate availability checks with a fixed number of set-based queries.
+
+    Pricing rows come from the pricing cache or a single IN query, the referenced
+    products, regions and rental periods are each fetched with one IN query, and
+    overlaps are answered from the booking index after loading every cold product
+    at once. Results keep the input order.
+    """
+    if not checks:
+        return []
+    
+    pricing_by_id = await _get_pricing(db, checks)
+    products = await _get_by_ids(db, Product, {check.product_id for check in checks})
+    regions = await _get_by_ids(db, Region, {check.region_id for check in checks})
+    rental_periods = await _get_by_ids(db, RentalPeriod, {check.rental_period_id for check in checks})
+    await db.run_sync(booking_index.ensure_loaded, {check.product_id for check in checks})
+    
+    now = datetime.now()
+    return [
+        await _evaluate_check(check, now, pricing_by_id, products, regions, rental_periods, db)
+        for check in checks
+    ]
+
+
+async def _evaluate_check(check, now, pricing_by_id, products, regions, rental_periods, db):
     # 1. Verify that pricing exists and retrieve its information
-    pricing = db.query(ProductPricing).filter(ProductPricing.id == check.pricing_id).first()
+    pricing = pricing_by_id.get(check.pricing_id)
     if not pricing:
         return RentalTransactionCheckResponse(
             available=False,
@@ -257,11 +495,11 @@ async def check_rental_transaction(check: RentalTransactionCheck = Body(...), db
         )
     
     # 4. Set default dates if not provided
-    start_date = check.start_date or datetime.now()
+    start_date = check.start_date or now
     
     # Get rental period days if end_date isn't provided
+    rental_period = rental_periods.get(check.rental_period_id)
     if not check.end_date:
-        rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == check.rental_period_id).first()
         if not rental_period:
             return RentalTransactionCheckResponse(
                 available=False,
@@ -278,24 +516,26 @@ async def check_rental_transaction(check: RentalTransactionCheck = Body(...), db
             message="End date must be after start date"
         )
     
-    # 6. Check if product is available for the requested period
-    overlapping_transactions = db.query(RentalTransaction).filter(
-        RentalTransaction.product_id == check.product_id,
-        RentalTransaction.status == TransactionStatus.CONFIRMED,
-        RentalTransaction.start_date <= end_date,
-        RentalTransaction.end_date >= start_date
-    ).all()
+    # 6. Check if product is available for the requested period, answered from the
+    # in-memory booking index and only falling back to the database while it is cold
+    is_booked = booking_index.overlaps(check.product_id, start_date, end_date)
+    if is_booked is None:
+        is_booked = await _has_overlapping_transaction(db, check.product_id, start_date, end_date)
     
-    if overlapping_transactions:
+    if is_booked:
         return RentalTransactionCheckResponse(
             available=False,
             message="Product is already rented for the requested period"
         )
     
     # 7. Get information about related entities for the response
-    product = db.query(Product).filter(Product.id == check.product_id).first()
-    region = db.query(Region).filter(Region.id == check.region_id).first()
-    rental_period = db.query(RentalPeriod).filter(RentalPeriod.id == check.rental_period_id).first()
+    product = products.get(check.product_id)
+    region = regions.get(check.region_id)
+    if not product or not region or not rental_period:
+        return RentalTransactionCheckResponse(
+            available=False,
+            message="Product, region, or rental period not found"
+        )
     
     # 8. Return success response
     return RentalTransactionCheckResponse(
@@ -320,4 +560,22 @@ async def check_rental_transaction(check: RentalTransactionCheck = Body(...), db
             "price": float(pricing.price) if pricing.price else None
         },
         message="Product is available for rental during the requested period"
-    )
\ No newline at end of file
+    )
+
+
+@router.post("/check-rental", response_model=RentalTransactionCheckResponse)
+async def check_rental_transaction(check: RentalTransactionCheck = Body(...), db: AsyncSession = Depends(get_async_db)):
+    """Check if a product is available for rental based on pricing_id and date range"""
+    return (await _check_availability([check], db))[0]
+
+
+@router.post("/check-rental/batch", response_model=List[RentalTransactionCheckResponse])
+async def check_rental_transactions_batch(checks: List[RentalTransactionCheck] = Body(...), db: AsyncSession = Depends(get_async_db)):
+    """Check availability for many products and date windows in one request, results in input order"""
+    if len(checks) > MAX_BATCH_CHECKS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may contain at most {MAX_BATCH_CHECKS} checks"
+        )
+    
+    return await _check_availability(checks, db)
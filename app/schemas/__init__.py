@@ -5,4 +5,6 @@ from app.schemas.attribute_value import AttributeValueCreate, AttributeValueUpda
 from app.schemas.region import RegionCreate, RegionUpdate, RegionResponse
 from app.schemas.rental_period import RentalPeriodCreate, RentalPeriodUpdate, RentalPeriodResponse
 from app.schemas.product_pricing import ProductPricingCreate, ProductPricingUpdate, ProductPricingResponse
-from app.schemas.rental_transaction import RentalTransactionCreate, RentalTransactionUpdate, RentalTransactionResponse
\ No newline at end of file
+from app.schemas.rental_transaction import RentalTransactionCreate, RentalTransactionUpdate, RentalTransactionResponse
+from app.schemas.quote import QuoteRequest, QuoteResponse
+from app.schemas.job import JobResponse
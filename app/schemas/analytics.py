@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional
+from decimal import Decimal
+import enum
+
+
+class RevenueGroup(str, enum.Enum):
+    REGION = "region"
+    RENTAL_PERIOD = "rental_period"
+    PRODUCT = "product"
+    DAY = "day"
+    MONTH = "month"
+
+
+class RevenueRow(BaseModel):
+    """One group of a revenue report; keys that are not grouped on are null"""
+    period: Optional[str] = None
+    region_id: Optional[int] = None
+    rental_period_id: Optional[int] = None
+    product_id: Optional[int] = None
+    transactions: int
+    revenue: Decimal
+    booked_days: int
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    id: int
+    type: str
+    status: JobStatus
+    total: Optional[int] = None
+    completed: int
+    result: Dict[str, Any] = {}
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -14,6 +14,19 @@ class ProductCreate(ProductBase):
     pass
 
 
+class ProductBulkItem(ProductCreate):
+    # None leaves the product's attribute values untouched, a list replaces them
+    attribute_value_ids: Optional[List[int]] = None
+
+
+class ProductBulkResult(BaseModel):
+    index: int
+    sku: Optional[str] = None
+    status: str  # created, updated, skipped or failed
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
 class ProductUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -35,4 +48,35 @@ class ProductDetailResponse(ProductResponse):
     pricing: List[Dict[str, Any]] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ProductFacetValue(BaseModel):
+    id: int
+    value: str
+    count: int
+
+
+class ProductFacet(BaseModel):
+    attribute_id: int
+    name: str
+    values: List[ProductFacetValue] = []
+
+
+class ProductSearchResponse(BaseModel):
+    total: int
+    items: List[ProductResponse] = []
+    facets: List[ProductFacet] = []
+
+
+class AvailabilityInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class ProductAvailabilityResponse(BaseModel):
+    product_id: int
+    start: datetime
+    end: datetime
+    booked: List[AvailabilityInterval] = []
+    free: List[AvailabilityInterval] = []
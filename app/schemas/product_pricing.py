@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -39,4 +39,16 @@ class ProductPricingDetailResponse(ProductPricingResponse):
     rental_period: dict = {}
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ProductPricingBulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class ProductPricingBulkResponse(BaseModel):
+    received: int
+    upserted: int
+    failed: int
+    errors: List[ProductPricingBulkError] = []
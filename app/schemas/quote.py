@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+
+
+class QuoteRequest(BaseModel):
+    product_ids: List[int]
+    region_id: int
+    start_date: datetime
+    end_date: datetime
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "product_ids": [1, 2, 3],
+                "region_id": 1,
+                "start_date": "2024-06-01T10:00:00",
+                "end_date": "2024-06-18T10:00:00"
+            }
+        }
+
+
+class QuoteLine(BaseModel):
+    rental_period_id: int
+    name: str
+    days: int
+    quantity: int
+    unit_price: Decimal
+    subtotal: Decimal
+
+
+class ProductQuote(BaseModel):
+    product_id: int
+    priced: bool
+    total: Optional[Decimal] = None
+    days_covered: Optional[int] = None
+    lines: List[QuoteLine] = []
+    message: Optional[str] = None
+
+
+class QuoteResponse(BaseModel):
+    region_id: int
+    start_date: datetime
+    end_date: datetime
+    days: int
+    quotes: List[ProductQuote]
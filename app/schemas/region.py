@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+import enum
 
 
 class RegionBase(BaseModel):
@@ -32,4 +33,21 @@ class RegionDetailResponse(RegionResponse):
     pricing: List[dict] = []
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class PriceMatrixFormat(str, enum.Enum):
+    JSON = "json"
+    CSV = "csv"
+
+
+class PriceMatrixResponse(BaseModel):
+    """Product x rental period prices of a region; ``prices[i * len(period_ids) + j]`` is product i in period j, null when unpriced"""
+    region_id: int
+    product_ids: List[int]
+    product_names: List[str]
+    product_skus: List[str]
+    period_ids: List[int]
+    period_names: List[str]
+    period_days: List[int]
+    prices: List[Optional[float]]
@@ -11,6 +11,11 @@ class TransactionStatus(str, enum.Enum):
     COMPLETED = "completed"
 
 
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class RentalTransactionBase(BaseModel):
     product_id: int
     region_id: int
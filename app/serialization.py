@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import List, Sequence, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response class of routes that return plain data; orjson renders several times faster when installed
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def json_response(body: bytes, response: Response) -> Response:
+    """Send a serialised JSON ``body`` with the headers already set on ``response``."""
+    return Response(content=body, headers=dict(response.headers), media_type="application/json")
+
+
+def model_response(model: BaseModel, response: Response) -> Response:
+    """
+    Serialise a response model built by the handler itself.
+
+    FastAPI would dump the model, validate the dump against ``response_model`` again
+    and encode the result field by field; the model is already valid, so it is
+    written straight to JSON by pydantic-core instead.
+    """
+    return json_response(model.model_dump_json(), response)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def serialize_rows(schema: Type[BaseModel], rows: Sequence) -> bytes:
+    """
+    Validate trusted ORM ``rows`` against ``schema`` once and write them to JSON.
+
+    Rows whose loaded state already holds every field are read from their
+    ``__dict__``, skipping SQLAlchemy's attribute instrumentation, which costs more
+    than the validation itself. Other rows, e.g. with lazy relationships in the
+    schema, are read attribute by attribute.
+    """
+    fields = schema.model_fields.keys()
+    items = [row.__dict__ if fields <= row.__dict__.keys() else row for row in rows]
+    adapter = _list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+
+def rows_response(schema: Type[BaseModel], rows: Sequence, response: Response) -> Response:
+    """Send ``rows`` as a list of ``schema`` without FastAPI's second validation and encoding pass."""
+    return json_response(serialize_rows(schema, rows), response)
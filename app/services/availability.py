@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.rental_transaction import RentalTransaction, TransactionStatus
+from app.services.booking_index import booking_index
+
+Interval = Tuple[datetime, datetime]
+
+
+def load_bookings(db: Session, product_ids: Iterable[int]) -> Dict[int, List[Interval]]:
+    """
+    Return the CONFIRMED ``(start, end)`` bookings of each product, sorted by start.
+
+    Bookings come from the booking index, which loads every cold product with one
+    query; products it could not warm are read from the database in one more query.
+    """
+    product_ids = set(product_ids)
+    booking_index.ensure_loaded(db, product_ids)
+
+    bookings: Dict[int, List[Interval]] = {}
+    cold = []
+    for product_id in product_ids:
+        product_bookings = booking_index.bookings(product_id)
+        if product_bookings is None:
+            cold.append(product_id)
+        else:
+            bookings[product_id] = product_bookings
+
+    if cold:
+        bookings.update({product_id: [] for product_id in cold})
+        rows = db.query(
+            RentalTransaction.product_id,
+            RentalTransaction.start_date,
+            RentalTransaction.end_date,
+        ).filter(
+            RentalTransaction.product_id.in_(cold),
+            RentalTransaction.status == TransactionStatus.CONFIRMED,
+        ).order_by(RentalTransaction.start_date).all()
+        for product_id, start, end in rows:
+            bookings[product_id].append((start, end))
+    return bookings
+
+
+def availability(bookings: List[Interval], start: datetime, end: datetime) -> Tuple[List[Interval], List[Interval]]:
+    """
+    Split ``[start, end]`` into merged booked intervals and the free gaps between them.
+
+    ``bookings`` must be sorted by start. Booked intervals are clipped to the window
+    and, like the booking overlap check, include both of their ends, so a free
+    interval that touches a booking is open on that side.
+    """
+    booked: List[List[datetime]] = []
+    for booking_start, booking_end in bookings:
+        if booking_start > end:
+            break
+        if booking_end < start:
+            continue
+        booking_start, booking_end = max(booking_start, start), min(booking_end, end)
+        if booked and booking_start <= booked[-1][1]:
+            booked[-1][1] = max(booked[-1][1], booking_end)
+        else:
+            booked.append([booking_start, booking_end])
+
+    free: List[Interval] = []
+    cursor = start
+    for booking_start, booking_end in booked:
+        if booking_start > cursor:
+            free.append((cursor, booking_start))
+        cursor = max(cursor, booking_end)
+    if cursor < end:
+        free.append((cursor, end))
+    return [tuple(interval) for interval in booked], free
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+import random
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Attempts made for a booking write before giving up on lock conflicts
+BOOKING_ATTEMPTS = int(os.getenv("BOOKING_ATTEMPTS", "5"))
+
+# Base delay in seconds before retrying, doubled after each conflict and jittered
+BOOKING_RETRY_DELAY = float(os.getenv("BOOKING_RETRY_DELAY", "0.02"))
+
+# PostgreSQL SQLSTATEs that mean "try again": serialization failure, deadlock, lock timeout
+RETRYABLE_SQLSTATES = {"40001", "40P01", "55P03"}
+
+# Dialects without row locks that unlocked booking writes were already logged for
+_UNLOCKED_DIALECTS = set()
+
+
+class BookingConflictError(Exception):
+    """Raised when a booking write keeps losing lock conflicts after every retry."""
+
+
+def is_lock_conflict(error: DBAPIError) -> bool:
+    """Return whether ``error`` is a transient lock conflict worth retrying."""
+    original = error.orig
+    sqlstate = getattr(original, "sqlstate", None) or getattr(original, "pgcode", None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return True
+    message = str(original).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def lock_product_bookings(db: Session, product_id: int) -> None:
+    """
+    Serialise booking writes for ``product_id`` until the transaction ends.
+
+    On PostgreSQL this locks the product row, so bookings of different products
+    proceed in parallel. SQLite only has a database-wide write lock, which
+    ``BEGIN IMMEDIATE`` takes up front instead of on the first INSERT, so the
+    overlap check and the write cannot interleave with another writer. It must
+    therefore be called before the transaction writes anything.
+
+    Other dialects lock the product row with ``SELECT ... FOR UPDATE`` where they
+    support it. Elsewhere the write goes ahead unlocked, and a warning is logged
+    once, since two concurrent bookings of one product may then overlap.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name == "sqlite":
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+    elif dialect.name == "postgresql" or dialect.supports_for_update_of:
+        db.execute(select(Product.id).where(Product.id == product_id).with_for_update())
+    elif dialect.name not in _UNLOCKED_DIALECTS:
+        _UNLOCKED_DIALECTS.add(dialect.name)
+        logger.warning("Booking writes are not locked on %s; concurrent bookings may overlap", dialect.name)
+
+
+async def run_booking(db: AsyncSession, attempt: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run a booking write, retrying it from scratch when it loses a lock conflict.
+
+    ``attempt`` must take its lock with ``lock_product_bookings``, re-read whatever it
+    depends on and commit. The session is rolled back before every retry.
+
+    Raises:
+        BookingConflictError: If every attempt hit a lock conflict
+    """
+    for attempt_number in range(BOOKING_ATTEMPTS):
+        try:
+            return await attempt()
+        except DBAPIError as error:
+            await db.rollback()
+            if not is_lock_conflict(error):
+                raise
+        await asyncio.sleep(BOOKING_RETRY_DELAY * 2 ** attempt_number * random.uniform(0.5, 1.5))
+    raise BookingConflictError("Too many concurrent bookings for this product, please retry")
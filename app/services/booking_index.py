@@ -0,0 +1,237 @@
+import bisect
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.rental_transaction import RentalTransaction, TransactionStatus
+
+
+def _naive(value: datetime) -> datetime:
+    # Dates are stored without timezone information, so compare them the same way
+    return value.replace(tzinfo=None) if value.tzinfo is not None else value
+
+
+class ProductBookings:
+    """
+    CONFIRMED bookings of a single product, sorted by start date.
+
+    ``max_ends[i]`` holds the latest end date among the first ``i + 1`` bookings,
+    which turns an overlap test into a single bisect on ``starts``.
+    """
+
+    __slots__ = ("starts", "ends", "ids", "max_ends", "loaded_at")
+
+    def __init__(self, loaded_at: float):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.ids: List[int] = []
+        self.max_ends: List[datetime] = []
+        self.loaded_at = loaded_at
+
+    def add(self, transaction_id: int, start: datetime, end: datetime) -> None:
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, transaction_id)
+        self._rebuild_max_ends(i)
+
+    def remove(self, transaction_id: int) -> bool:
+        try:
+            i = self.ids.index(transaction_id)
+        except ValueError:
+            return False
+        del self.starts[i], self.ends[i], self.ids[i]
+        self._rebuild_max_ends(i)
+        return True
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        # Same inclusive semantics as the SQL check: start_date <= end AND end_date >= start
+        i = bisect.bisect_right(self.starts, end) - 1
+        return i >= 0 and self.max_ends[i] >= start
+
+    def _rebuild_max_ends(self, i: int) -> None:
+        del self.max_ends[i:]
+        current = self.max_ends[-1] if self.max_ends else None
+        for end in self.ends[i:]:
+            current = end if current is None or end > current else current
+            self.max_ends.append(current)
+
+
+class BookingIndex:
+    """
+    Process-local interval index of CONFIRMED rental transactions per product.
+
+    The index is loaded at startup and kept in sync by the rental transaction
+    router after each commit. Products that have not been loaded (or whose data
+    is older than ``ttl`` seconds) are "cold" and are read from the database on
+    demand through ``ensure_loaded``.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._products: Dict[int, ProductBookings] = {}
+        self._owners: Dict[int, int] = {}
+        self._writes: Dict[int, int] = {}
+        self._write_seq = 0
+        self._loaded_at: Optional[float] = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._products.clear()
+            self._owners.clear()
+            self._writes.clear()
+            self._write_seq = 0
+            self._loaded_at = None
+
+    def _fresh(self, loaded_at: Optional[float]) -> bool:
+        if loaded_at is None:
+            return False
+        return not self.ttl or time.monotonic() - loaded_at < self.ttl
+
+    def is_warm(self, product_id: int) -> bool:
+        with self._lock:
+            return self._is_warm(product_id)
+
+    def _is_warm(self, product_id: int) -> bool:
+        bookings = self._products.get(product_id)
+        if bookings is not None:
+            return self._fresh(bookings.loaded_at)
+        # After a full load, a product without an entry simply has no bookings
+        return self._fresh(self._loaded_at)
+
+    def load(self, db: Session) -> None:
+        """Load every CONFIRMED booking, replacing the current contents."""
+        with self._lock:
+            write_seq = self._write_seq
+        rows = db.query(
+            RentalTransaction.id,
+            RentalTransaction.product_id,
+            RentalTransaction.start_date,
+            RentalTransaction.end_date,
+        ).filter(RentalTransaction.status == TransactionStatus.CONFIRMED).all()
+
+        loaded_at = time.monotonic()
+        products: Dict[int, ProductBookings] = {}
+        owners: Dict[int, int] = {}
+        for transaction_id, product_id, start, end in sorted(rows, key=lambda row: row[2]):
+            bookings = products.get(product_id)
+            if bookings is None:
+                bookings = products[product_id] = ProductBookings(loaded_at)
+            bookings.starts.append(start)
+            bookings.ends.append(end)
+            bookings.ids.append(transaction_id)
+            owners[transaction_id] = product_id
+        for bookings in products.values():
+            bookings._rebuild_max_ends(0)
+
+        with self._lock:
+            # A booking committed while we were reading may be missing from the snapshot;
+            # stay cold and let ensure_loaded fill products in on demand instead.
+            if self._write_seq != write_seq:
+                return
+            self._products = products
+            self._owners = owners
+            self._loaded_at = loaded_at
+
+    def ensure_loaded(self, db: Session, product_ids: Iterable[int]) -> None:
+        """Load the bookings of any cold product in ``product_ids`` with a single query."""
+        with self._lock:
+            cold = {product_id for product_id in product_ids if not self._is_warm(product_id)}
+            writes = {product_id: self._writes.get(product_id, 0) for product_id in cold}
+        if not cold:
+            return
+
+        rows = db.query(
+            RentalTransaction.id,
+            RentalTransaction.product_id,
+            RentalTransaction.start_date,
+            RentalTransaction.end_date,
+        ).filter(
+            RentalTransaction.product_id.in_(cold),
+            RentalTransaction.status == TransactionStatus.CONFIRMED,
+        ).all()
+
+        loaded_at = time.monotonic()
+        products = {product_id: ProductBookings(loaded_at) for product_id in cold}
+        for transaction_id, product_id, start, end in sorted(rows, key=lambda row: row[2]):
+            bookings = products[product_id]
+            bookings.starts.append(start)
+            bookings.ends.append(end)
+            bookings.ids.append(transaction_id)
+
+        with self._lock:
+            for product_id, bookings in products.items():
+                if self._writes.get(product_id, 0) != writes[product_id]:
+                    continue
+                old = self._products.get(product_id)
+                if old is not None:
+                    for transaction_id in old.ids:
+                        self._owners.pop(transaction_id, None)
+                bookings._rebuild_max_ends(0)
+                self._products[product_id] = bookings
+                for transaction_id in bookings.ids:
+                    self._owners[transaction_id] = product_id
+
+    def overlaps(self, product_id: int, start: datetime, end: datetime) -> Optional[bool]:
+        """
+        Return whether a CONFIRMED booking overlaps ``[start, end]``.
+
+        Returns None when the product is cold and the answer must come from the database.
+        """
+        with self._lock:
+            if not self._is_warm(product_id):
+                return None
+            bookings = self._products.get(product_id)
+            return bookings is not None and bookings.overlaps(_naive(start), _naive(end))
+
+    def bookings(self, product_id: int) -> Optional[List[Tuple[datetime, datetime]]]:
+        """Return the sorted ``(start, end)`` pairs of a warm product, or None when cold."""
+        with self._lock:
+            if not self._is_warm(product_id):
+                return None
+            bookings = self._products.get(product_id)
+            return list(zip(bookings.starts, bookings.ends)) if bookings else []
+
+    def sync(self, transaction: RentalTransaction) -> None:
+        """Reflect a committed create, update or status change of ``transaction``."""
+        with self._lock:
+            self._discard(transaction.id)
+            self._touch(transaction.product_id)
+            if transaction.status != TransactionStatus.CONFIRMED:
+                return
+            bookings = self._products.get(transaction.product_id)
+            if bookings is None:
+                if not self._fresh(self._loaded_at):
+                    # Cold product, the next ensure_loaded reads it from the database
+                    return
+                bookings = self._products[transaction.product_id] = ProductBookings(self._loaded_at)
+            bookings.add(transaction.id, _naive(transaction.start_date), _naive(transaction.end_date))
+            self._owners[transaction.id] = transaction.product_id
+
+    def discard(self, transaction_id: int) -> None:
+        """Reflect a committed delete of a rental transaction."""
+        with self._lock:
+            self._discard(transaction_id)
+
+    def _discard(self, transaction_id: int) -> None:
+        product_id = self._owners.pop(transaction_id, None)
+        if product_id is None:
+            return
+        self._touch(product_id)
+        bookings = self._products.get(product_id)
+        if bookings is not None:
+            bookings.remove(transaction_id)
+
+    def _touch(self, product_id: int) -> None:
+        self._writes[product_id] = self._writes.get(product_id, 0) + 1
+        self._write_seq += 1
+
+
+# Seconds after which loaded bookings are considered cold again (0 keeps them forever).
+# Set this when running several workers so bookings made elsewhere are picked up.
+booking_index = BookingIndex(ttl=float(os.getenv("BOOKING_INDEX_TTL", "0")) or None)
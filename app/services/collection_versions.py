@@ -0,0 +1,116 @@
+"""
+Per-table write counters that version the list responses and their ETags.
+
+A table's counter changes with every committed transaction that writes to it,
+however soon after the previous one, unlike ``updated_at`` with its one-second
+resolution on SQLite. Session events note the versioned tables a transaction
+inserts into, updates or deletes from, through a flush or a DML statement, and
+bump their counters once, just before the commit.
+
+The write cost is one upsert per transaction, covering the counter row of every
+versioned table the transaction wrote, whatever the number of rows. On PostgreSQL
+those counter rows stay locked only from that upsert to the commit, so concurrent
+writers to a table queue on each other for the commit alone. Writes made around
+the Session, e.g. with ``Connection.execute``, do not bump the counters.
+"""
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.database import Base
+from app.models.collection_version import CollectionVersion
+from app.services.upsert import UPSERT_INSERTS
+
+# Tables whose list responses are versioned
+VERSIONED_TABLES = ("products", "product_pricing", "regions", "rental_periods", "attributes")
+
+# Session.info key of the versioned tables the current transaction wrote
+_WRITTEN = "collection_versions_written"
+
+
+@lru_cache(maxsize=None)
+def _cascades() -> Dict[str, Set[str]]:
+    # Versioned tables whose rows the database deletes along with a row of another table
+    cascades = defaultdict(set)
+    for name in VERSIONED_TABLES:
+        for foreign_key in Base.metadata.tables[name].foreign_keys:
+            if foreign_key.ondelete and foreign_key.ondelete.upper() == "CASCADE":
+                cascades[foreign_key.column.table.name].add(name)
+    return dict(cascades)
+
+
+def _note(session: Session, tables: Iterable[str], deleted: bool = False) -> None:
+    written = set()
+    for table in tables:
+        written.add(table)
+        if deleted:
+            written.update(_cascades().get(table, ()))
+    written.intersection_update(VERSIONED_TABLES)
+    if written:
+        session.info.setdefault(_WRITTEN, set()).update(written)
+
+
+def _track_flush(session: Session, flush_context) -> None:
+    # The new, dirty and deleted collections still hold what this flush wrote
+    _note(session, (obj.__tablename__ for obj in session.new))
+    _note(session, (obj.__tablename__ for obj in session.dirty if session.is_modified(obj)))
+    _note(session, (obj.__tablename__ for obj in session.deleted), deleted=True)
+
+
+def _track_statement(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        _note(state.session, (state.statement.table.name,), deleted=state.is_delete)
+
+
+def bump_versions(session: Session, tables: Iterable[str]) -> None:
+    """Add one to the counters of ``tables`` in the session's transaction."""
+    # Sorted, so that transactions bumping several counters lock them in the same order
+    rows = [{"table_name": name, "version": 1} for name in sorted(set(tables))]
+    if not rows:
+        return
+    table = CollectionVersion.__table__
+    insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is not None:
+        statement = insert(table)
+        session.execute(statement.on_conflict_do_update(index_elements=["table_name"], set_={"version": table.c.version + 1}), rows)
+        return
+    names = [row["table_name"] for row in rows]
+    session.execute(table.update().where(table.c.table_name.in_(names)).values(version=table.c.version + 1))
+    existing = set(session.scalars(select(table.c.table_name).where(table.c.table_name.in_(names))))
+    missing = [row for row in rows if row["table_name"] not in existing]
+    if missing:
+        session.execute(table.insert(), missing)
+
+
+def _bump_before_commit(session: Session) -> None:
+    # Savepoints are released into the enclosing transaction, which bumps on its commit
+    if session.in_nested_transaction():
+        return
+    # Flushed first, so that the changes the commit would flush are counted too
+    session.flush()
+    bump_versions(session, session.info.pop(_WRITTEN, ()))
+
+
+def _forget_on_end(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_WRITTEN, None)
+
+
+event.listen(Session, "after_flush", _track_flush)
+event.listen(Session, "do_orm_execute", _track_statement)
+event.listen(Session, "before_commit", _bump_before_commit)
+event.listen(Session, "after_transaction_end", _forget_on_end)
+
+
+def drop_version_triggers(connection) -> None:
+    """Drop the triggers that bumped the counters on every written row before this module did."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for table in VERSIONED_TABLES:
+            for operation in ("insert", "update", "delete"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS collection_versions_{table}_{operation}"))
+    elif dialect == "postgresql":
+        connection.execute(text("DROP FUNCTION IF EXISTS bump_collection_version() CASCADE"))
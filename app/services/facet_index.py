@@ -0,0 +1,259 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.attribute import Attribute, AttributeValue
+from app.models.product import Product
+from app.models.product_attribute_value import ProductAttributeValue
+
+# Attempts made by ensure_loaded when writes keep invalidating the snapshot being read
+LOAD_ATTEMPTS = 3
+
+
+def _bitmap(product_ids: Iterable[int]) -> int:
+    # Setting bits in a bytearray and converting once is linear, unlike repeated |=
+    product_ids = list(product_ids)
+    if not product_ids:
+        return 0
+    bits = bytearray(max(product_ids) // 8 + 1)
+    for product_id in product_ids:
+        bits[product_id >> 3] |= 1 << (product_id & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _bitmap_ids(bitmap: int, skip: int, limit: int) -> List[int]:
+    # bin() runs in C; reversing it puts bit i at position i so str.find walks the ids in order
+    bits = bin(bitmap)[:1:-1]
+    product_ids = []
+    position = bits.find("1")
+    while position != -1 and len(product_ids) < skip + limit:
+        product_ids.append(position)
+        position = bits.find("1", position + 1)
+    return product_ids[skip:]
+
+
+class FacetSearchResult:
+    __slots__ = ("total", "product_ids", "facets")
+
+    def __init__(self, total: int, product_ids: List[int], facets: List[dict]):
+        self.total = total
+        self.product_ids = product_ids
+        self.facets = facets
+
+
+class FacetIndex:
+    """
+    Process-local inverted index from filterable attribute values to product bitmaps.
+
+    Each bitmap is a Python int whose bit ``i`` is set when product ``i`` carries the
+    value, so filters are a handful of big-integer AND/OR operations and facet counts
+    are popcounts, independent of how many products match. The index is loaded on
+    first use and kept in sync by the product and attribute routers after each commit;
+    changes to attributes themselves drop it so the next search reloads it.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._write_seq = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._loaded_at: Optional[float] = None
+        self._attributes: Dict[int, str] = {}
+        self._values: Dict[int, Tuple[int, str]] = {}
+        self._bitmaps: Dict[int, int] = {}
+        self._products = 0
+        self._active = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._write_seq += 1
+            self._reset()
+
+    def is_warm(self) -> bool:
+        with self._lock:
+            return self._is_warm()
+
+    def _is_warm(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return not self.ttl or time.monotonic() - self._loaded_at < self.ttl
+
+    def load(self, db: Session) -> bool:
+        """Load filterable attributes, their values and product links, replacing the current contents."""
+        with self._lock:
+            write_seq = self._write_seq
+
+        attributes = dict(db.query(Attribute.id, Attribute.name).filter(Attribute.is_filterable.is_(True)).all())
+        values = {
+            value_id: (attribute_id, value)
+            for value_id, attribute_id, value in db.query(
+                AttributeValue.id, AttributeValue.attribute_id, AttributeValue.value
+            ).filter(AttributeValue.attribute_id.in_(attributes)).all()
+        } if attributes else {}
+        products = db.query(Product.id, Product.is_active).all()
+        links: Dict[int, List[int]] = {value_id: [] for value_id in values}
+        if values:
+            rows = db.query(ProductAttributeValue.attribute_value_id, ProductAttributeValue.product_id).join(
+                AttributeValue, AttributeValue.id == ProductAttributeValue.attribute_value_id
+            ).filter(AttributeValue.attribute_id.in_(attributes)).all()
+            for value_id, product_id in rows:
+                links[value_id].append(product_id)
+
+        bitmaps = {value_id: _bitmap(product_ids) for value_id, product_ids in links.items()}
+        all_products = _bitmap(product_id for product_id, _ in products)
+        active = _bitmap(product_id for product_id, is_active in products if is_active)
+
+        with self._lock:
+            # A write committed while we were reading may be missing from the snapshot
+            if self._write_seq != write_seq:
+                return False
+            self._attributes = attributes
+            self._values = values
+            self._bitmaps = bitmaps
+            self._products = all_products
+            self._active = active
+            self._loaded_at = time.monotonic()
+            return True
+
+    def ensure_loaded(self, db: Session) -> bool:
+        """Load the index if it is cold. Returns False if concurrent writes kept it from loading."""
+        for _ in range(LOAD_ATTEMPTS):
+            if self.is_warm() or self.load(db):
+                return True
+        return False
+
+    def search(self, value_ids: Iterable[int], is_active: Optional[bool] = None,
+               skip: int = 0, limit: int = 100) -> Optional[FacetSearchResult]:
+        """
+        Return products carrying the given attribute values and per-value facet counts.
+
+        Values of the same attribute are ORed and attributes are ANDed. The counts of an
+        attribute's values ignore that attribute's own selection, so the alternatives
+        stay visible while it is filtered. Returns None when the index is cold.
+
+        Raises:
+            ValueError: If a value does not belong to a filterable attribute
+        """
+        with self._lock:
+            if not self._is_warm():
+                return None
+            groups: Dict[int, int] = {}
+            for value_id in value_ids:
+                if value_id not in self._values:
+                    raise ValueError(f"Attribute value {value_id} does not belong to a filterable attribute")
+                attribute_id = self._values[value_id][0]
+                groups[attribute_id] = groups.get(attribute_id, 0) | self._bitmaps.get(value_id, 0)
+            attributes = dict(self._attributes)
+            values = dict(self._values)
+            bitmaps = dict(self._bitmaps)
+            base = self._products
+            if is_active is True:
+                base = self._active
+            elif is_active is False:
+                base = self._products & ~self._active
+
+        # Bitmaps are immutable ints, so the heavy lifting happens outside the lock
+        matches = base
+        for mask in groups.values():
+            matches &= mask
+
+        values_by_attribute: Dict[int, List[Tuple[int, str]]] = {attribute_id: [] for attribute_id in attributes}
+        for value_id, (attribute_id, value) in sorted(values.items()):
+            values_by_attribute[attribute_id].append((value_id, value))
+
+        facets = []
+        for attribute_id, name in sorted(attributes.items()):
+            scope = base
+            for other_id, mask in groups.items():
+                if other_id != attribute_id:
+                    scope &= mask
+            facets.append({
+                "attribute_id": attribute_id,
+                "name": name,
+                "values": [
+                    {"id": value_id, "value": value, "count": (scope & bitmaps.get(value_id, 0)).bit_count()}
+                    for value_id, value in values_by_attribute[attribute_id]
+                ],
+            })
+
+        return FacetSearchResult(matches.bit_count(), _bitmap_ids(matches, skip, limit), facets)
+
+    def sync_product(self, product: Product) -> None:
+        """Reflect a committed create or update of ``product``."""
+        with self._lock:
+            self._write_seq += 1
+            if not self._is_warm():
+                return
+            bit = 1 << product.id
+            self._products |= bit
+            self._active = self._active | bit if product.is_active else self._active & ~bit
+
+    def discard_product(self, product_id: int) -> None:
+        """Reflect a committed delete of a product and its attribute links."""
+        with self._lock:
+            self._write_seq += 1
+            if not self._is_warm():
+                return
+            mask = ~(1 << product_id)
+            self._products &= mask
+            self._active &= mask
+            for value_id, bitmap in self._bitmaps.items():
+                if bitmap >> product_id & 1:
+                    self._bitmaps[value_id] = bitmap & mask
+
+    def sync_products(self, active: Dict[int, bool], values: Dict[int, Iterable[int]]) -> None:
+        """
+        Reflect a committed bulk upsert.
+
+        ``active`` maps every written product id to its active flag and ``values`` maps
+        the products whose attribute values were replaced to their new value ids. Each
+        bitmap is rebuilt once for the whole batch rather than once per product.
+        """
+        with self._lock:
+            self._write_seq += 1
+            if not self._is_warm():
+                return
+            written = _bitmap(active)
+            self._products |= written
+            self._active = self._active & ~written | _bitmap(product_id for product_id, is_active in active.items() if is_active)
+            if not values:
+                return
+            replaced = ~_bitmap(values)
+            links: Dict[int, List[int]] = {}
+            for product_id, value_ids in values.items():
+                for value_id in value_ids:
+                    if value_id in self._values:
+                        links.setdefault(value_id, []).append(product_id)
+            for value_id in self._values:
+                bitmap = self._bitmaps.get(value_id, 0) & replaced | _bitmap(links.get(value_id, ()))
+                self._bitmaps[value_id] = bitmap
+
+    def sync_value(self, value: AttributeValue) -> None:
+        """Reflect a committed create or update of an attribute value."""
+        with self._lock:
+            self._write_seq += 1
+            if not self._is_warm():
+                return
+            current = self._values.get(value.id)
+            if current is not None and current[0] != value.attribute_id:
+                # Moving a value between attributes changes facets in ways a reload handles best
+                self._reset()
+            elif value.attribute_id in self._attributes:
+                self._values[value.id] = (value.attribute_id, value.value)
+
+    def discard_value(self, value_id: int) -> None:
+        """Reflect a committed delete of an attribute value."""
+        with self._lock:
+            self._write_seq += 1
+            self._values.pop(value_id, None)
+            self._bitmaps.pop(value_id, None)
+
+
+# Seconds after which the index is reloaded from the database (0 keeps it forever).
+# Set this when running several workers so writes made elsewhere are picked up.
+facet_index = FacetIndex(ttl=float(os.getenv("FACET_INDEX_TTL", "0")) or None)
@@ -0,0 +1,277 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.job import Job, JobRow, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Jobs run at the same time by one process; 0 leaves them to other processes
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Seconds between polls for jobs created by other processes or left behind by a crash
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+
+# Seconds without a heartbeat after which a running job is considered abandoned
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))
+
+# Longest error message stored on a failed job
+MAX_JOB_ERROR_LENGTH = 2000
+
+# Input rows staged per INSERT when a job is created
+JOB_ROW_BATCH = 5000
+
+
+class JobContext:
+    """
+    What a chunk handler sees of its job.
+
+    Handlers read ``params`` and resume from ``state``, then record their progress
+    in ``state``, ``result``, ``total`` and ``completed``. All of it is saved after
+    every chunk, once the chunk has committed its own writes.
+    """
+
+    def __init__(self, job: Job):
+        self.id = job.id
+        self.params = job.params
+        self.state = dict(job.state or {})
+        self.result = dict(job.result or {})
+        self.total = job.total
+        self.completed = job.completed
+
+
+# Runs one chunk of a job and commits it; returns True once the job is finished.
+# A chunk may run again after a crash, so it must be idempotent.
+JobHandler = Callable[[Session, JobContext], bool]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(job_type: str):
+    """Register the chunk handler of ``job_type``."""
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = handler
+        return handler
+    return register
+
+
+def create_job(db: Session, job_type: str, params: Dict[str, Any], rows: Optional[Sequence[Any]] = None) -> Job:
+    """
+    Persist a pending job; the runner picks it up once it is committed and woken.
+
+    ``rows`` are staged in ``job_rows`` rather than in ``params``, so each chunk reads
+    only its own rows; ``total`` starts out as their count.
+    """
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    job = Job(type=job_type, params=params, state={}, result={}, total=len(rows) if rows is not None else None)
+    db.add(job)
+    db.flush()
+    if rows:
+        for start in range(0, len(rows), JOB_ROW_BATCH):
+            db.execute(JobRow.__table__.insert(), [
+                {"job_id": job.id, "index": index, "data": row}
+                for index, row in enumerate(rows[start:start + JOB_ROW_BATCH], start)
+            ])
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def read_job_rows(db: Session, job_id: int, start: int, stop: int) -> List[Any]:
+    """The staged input rows ``start`` to ``stop`` (exclusive) of a job, in order."""
+    return db.execute(
+        select(JobRow.data)
+        .where(JobRow.job_id == job_id, JobRow.index >= start, JobRow.index < stop)
+        .order_by(JobRow.index)
+    ).scalars().all()
+
+
+class JobRunner:
+    """
+    Runs persisted jobs chunk by chunk on a bounded thread pool.
+
+    A poller claims pending jobs, and running jobs whose heartbeat is older than
+    ``stale_after``, with an atomic UPDATE that also sets a fresh claim token, so
+    several processes can share the jobs table and a job abandoned by a crashed
+    process resumes from its last saved state. While a job runs, a heartbeat thread
+    refreshes it every third of ``stale_after``, however long a chunk takes. Every
+    write to the job is conditional on its claim token, so a runner whose job was
+    reclaimed stops instead of overwriting the new owner's progress. On shutdown,
+    running jobs stop after their current chunk and go back to pending.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, stale_after: float, session_factory=SessionLocal):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._heart_stopping = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._poller: Optional[threading.Thread] = None
+        self._heart: Optional[threading.Thread] = None
+        # Claim tokens of the jobs this runner is running, by job id
+        self._claims: Dict[int, str] = {}
+
+    def start(self) -> None:
+        with self._lock:
+            if self.workers < 1 or self._poller is not None:
+                return
+            self._stopping.clear()
+            self._heart_stopping.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._poller = threading.Thread(target=self._poll, name="job-poller", daemon=True)
+            self._heart = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+            self._poller.start()
+            self._heart.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            poller, heart, executor = self._poller, self._heart, self._executor
+            self._poller = self._heart = self._executor = None
+        if poller is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        poller.join()
+        executor.shutdown(wait=True)
+        # Running jobs keep their heartbeat until they have stopped
+        self._heart_stopping.set()
+        heart.join()
+
+    def wake(self) -> None:
+        """Poll now rather than at the next interval, e.g. after creating a job."""
+        self._wake.set()
+
+    def _poll(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._claim_jobs()
+            except Exception:
+                logger.exception("Polling for jobs failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _beat(self) -> None:
+        while not self._heart_stopping.wait(self.stale_after / 3):
+            with self._lock:
+                claims = list(self._claims.values())
+            if not claims:
+                continue
+            try:
+                with self.session_factory() as db:
+                    db.execute(update(Job).where(Job.claim.in_(claims)).values(heartbeat_at=datetime.utcnow()))
+                    db.commit()
+            except Exception:
+                logger.exception("Refreshing job heartbeats failed")
+
+    def _claim_jobs(self) -> None:
+        with self._lock:
+            free = self.workers - len(self._claims)
+        if free < 1:
+            return
+        with self.session_factory() as db:
+            claimable = self._claimable()
+            for job_id in db.execute(select(Job.id).where(claimable).order_by(Job.id).limit(free)).scalars().all():
+                claim = uuid.uuid4().hex
+                # Another process may have claimed it since the SELECT
+                claimed = db.execute(
+                    update(Job).where(Job.id == job_id, self._claimable())
+                    .values(status=JobStatus.RUNNING, claim=claim, heartbeat_at=datetime.utcnow())
+                ).rowcount
+                db.commit()
+                if claimed:
+                    with self._lock:
+                        self._claims[job_id] = claim
+                    self._executor.submit(self._run_claimed, job_id, claim)
+
+    def _claimable(self):
+        stale = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        return or_(
+            Job.status == JobStatus.PENDING,
+            (Job.status == JobStatus.RUNNING) & (Job.heartbeat_at < stale),
+        )
+
+    def _run_claimed(self, job_id: int, claim: str) -> None:
+        try:
+            with self.session_factory() as db:
+                run_job(db, job_id, claim, self._stopping)
+        except Exception:
+            logger.exception("Job %s crashed", job_id)
+        finally:
+            with self._lock:
+                self._claims.pop(job_id, None)
+            # A slot is free again
+            self._wake.set()
+
+
+def run_job(db: Session, job_id: int, claim: str, stopping: Optional[threading.Event] = None) -> Optional[JobStatus]:
+    """
+    Run the remaining chunks of a job claimed with ``claim`` in this thread and record the outcome.
+
+    Returns:
+        Optional[JobStatus]: SUCCEEDED or FAILED, PENDING if ``stopping`` was set first,
+        or None if another runner reclaimed the job meanwhile
+    """
+    job = db.get(Job, job_id)
+    context = JobContext(job)
+    handler = JOB_HANDLERS.get(job.type)
+    owned = (Job.id == job_id) & (Job.claim == claim)
+
+    def save(**values) -> bool:
+        if not db.execute(update(Job).where(owned).values(**values)).rowcount:
+            db.rollback()
+            logger.warning("Job %s was reclaimed by another runner", job_id)
+            return False
+        if values.get("status") in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+            # Staged input is only needed while the job can still run
+            db.execute(delete(JobRow).where(JobRow.job_id == job_id))
+        db.commit()
+        return True
+
+    if job.started_at is None and not save(started_at=datetime.utcnow()):
+        return None
+
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job type: {job.type}")
+        while True:
+            finished = handler(db, context)
+            status = JobStatus.SUCCEEDED if finished else JobStatus.RUNNING
+            if not finished and stopping is not None and stopping.is_set():
+                status = JobStatus.PENDING
+            if not save(
+                status=status,
+                state=context.state,
+                result=context.result,
+                total=context.total,
+                completed=context.completed,
+                heartbeat_at=datetime.utcnow(),
+                finished_at=datetime.utcnow() if finished else None,
+            ):
+                return None
+            if status != JobStatus.RUNNING:
+                return status
+    except Exception as error:
+        db.rollback()
+        logger.exception("Job %s failed", job_id)
+        saved = save(
+            status=JobStatus.FAILED,
+            error=f"{error.__class__.__name__}: {error}"[:MAX_JOB_ERROR_LENGTH],
+            finished_at=datetime.utcnow(),
+        )
+        return JobStatus.FAILED if saved else None
+
+
+job_runner = JobRunner(JOB_WORKERS, JOB_POLL_INTERVAL, JOB_STALE_AFTER)
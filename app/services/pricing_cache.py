@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from app.cache import create_cache
+from app.models.product_pricing import ProductPricing
+
+# Seconds a cached price stays valid, bounding staleness across workers without a shared backend
+PRICING_CACHE_TTL = float(os.getenv("PRICING_CACHE_TTL", "300"))
+
+# Maximum number of product/region/rental period combinations kept in process memory
+PRICING_CACHE_SIZE = int(os.getenv("PRICING_CACHE_SIZE", "10000"))
+
+
+def pricing_snapshot(pricing: ProductPricing) -> Dict[str, Any]:
+    """Plain, JSON-serialisable copy of a pricing row as stored in the cache."""
+    return {
+        "id": pricing.id,
+        "product_id": pricing.product_id,
+        "region_id": pricing.region_id,
+        "rental_period_id": pricing.rental_period_id,
+        "price": str(pricing.price),
+        "is_active": pricing.is_active,
+        "created_at": pricing.created_at.isoformat() if pricing.created_at else None,
+        "updated_at": pricing.updated_at.isoformat() if pricing.updated_at else None,
+    }
+
+
+class PricingCache:
+    """
+    Pricing rows keyed by (product_id, region_id, rental_period_id).
+
+    A combination without pricing is cached as None so repeated misses stay off the
+    database as well. Writers invalidate the combinations they touch; readers pass the
+    ``generation`` taken before their query to ``store`` so that a row read before a
+    concurrent invalidation is not written back into the cache.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @staticmethod
+    def _key(product_id: int, region_id: int, rental_period_id: int) -> str:
+        return f"{product_id}:{region_id}:{rental_period_id}"
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, product_id: int, region_id: int, rental_period_id: int) -> Any:
+        """Return the cached snapshot, None for a combination without pricing, or ``MISSING``."""
+        return self.backend.get(self._key(product_id, region_id, rental_period_id))
+
+    def store(self, product_id: int, region_id: int, rental_period_id: int,
+              pricing: Optional[ProductPricing], generation: int) -> None:
+        snapshot = pricing_snapshot(pricing) if pricing is not None else None
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.backend.set(self._key(product_id, region_id, rental_period_id), snapshot)
+
+    def invalidate(self, product_id: int, region_id: int, rental_period_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self.backend.delete(self._key(product_id, region_id, rental_period_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+
+pricing_cache = PricingCache(create_cache("pricing", PRICING_CACHE_SIZE, PRICING_CACHE_TTL))
@@ -0,0 +1,106 @@
+from typing import Any, Dict, List
+
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.product_pricing import ProductPricing
+from app.models.region import Region
+from app.models.rental_period import RentalPeriod
+from app.schemas.product_pricing import ProductPricingCreate
+from app.services.pricing_cache import pricing_cache
+from app.services.upsert import UPSERT_INSERTS, format_validation_error
+
+# Rows written per transaction
+CHUNK_SIZE = 5000
+
+def _existing_ids(db: Session, model, ids) -> set:
+    return {row[0] for row in db.query(model.id).filter(model.id.in_(ids)).all()}
+
+
+def upsert_pricing(db: Session, rows: List[Dict[str, Any]], chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Insert or update pricing rows on the product/region/rental period combination.
+
+    Rows are validated individually, foreign keys are checked with one IN query per
+    referenced table and chunk, and each chunk is upserted with a single executemany
+    on the ``uix_product_region_period`` constraint and committed on its own, after
+    which its combinations are dropped from the pricing cache. When the same
+    combination appears more than once, the last row wins.
+
+    Returns:
+        dict: Counts of received, upserted and failed rows plus per-row errors
+    """
+    insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        raise NotImplementedError(f"Bulk pricing upsert is not supported on {db.get_bind().dialect.name}")
+
+    errors = []
+    valid = {}
+    for index, row in enumerate(rows):
+        try:
+            pricing = ProductPricingCreate.model_validate(row)
+        except ValidationError as error:
+            errors.append({"index": index, "detail": format_validation_error(error)})
+            continue
+        key = (pricing.product_id, pricing.region_id, pricing.rental_period_id)
+        # Re-inserting moves the key to the end so chunks follow the input order
+        valid.pop(key, None)
+        valid[key] = (index, pricing)
+
+    statement = insert(ProductPricing.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["product_id", "region_id", "rental_period_id"],
+        set_={
+            "price": statement.excluded.price,
+            "is_active": statement.excluded.is_active,
+            "updated_at": func.now(),
+        },
+    )
+
+    upserted = 0
+    items = list(valid.values())
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        products = _existing_ids(db, Product, {pricing.product_id for _, pricing in chunk})
+        regions = _existing_ids(db, Region, {pricing.region_id for _, pricing in chunk})
+        rental_periods = _existing_ids(db, RentalPeriod, {pricing.rental_period_id for _, pricing in chunk})
+
+        params = []
+        indexes = []
+        keys = []
+        for index, pricing in chunk:
+            if pricing.product_id not in products:
+                errors.append({"index": index, "detail": "Product not found"})
+            elif pricing.region_id not in regions:
+                errors.append({"index": index, "detail": "Region not found"})
+            elif pricing.rental_period_id not in rental_periods:
+                errors.append({"index": index, "detail": "Rental period not found"})
+            else:
+                params.append(pricing.model_dump())
+                indexes.append(index)
+                keys.append((pricing.product_id, pricing.region_id, pricing.rental_period_id))
+
+        if not params:
+            db.rollback()
+            continue
+        try:
+            db.execute(statement, params)
+            db.commit()
+        except SQLAlchemyError as error:
+            db.rollback()
+            errors.extend({"index": index, "detail": f"Database error: {error.__class__.__name__}"} for index in indexes)
+            continue
+        for key in keys:
+            pricing_cache.invalidate(*key)
+        upserted += len(params)
+
+    errors.sort(key=lambda error: error["index"])
+    return {
+        "received": len(rows),
+        "upserted": upserted,
+        "failed": len(errors),
+        "errors": errors,
+    }
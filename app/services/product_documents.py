@@ -0,0 +1,318 @@
+import logging
+import queue
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, func, select, text
+from sqlalchemy.orm import Session, selectinload
+
+from app.conditional import row_validators
+from app.database import Base, SessionLocal
+from app.models.attribute import AttributeValue
+from app.models.product import Product
+from app.models.product_attribute_value import ProductAttributeValue
+from app.models.product_document import ProductDocument
+from app.models.product_pricing import ProductPricing
+from app.schemas.product import ProductDetailResponse
+
+logger = logging.getLogger(__name__)
+
+# Loader options for the product detail graph. Each collection is loaded with one
+# SELECT ... IN query that joins in its many-to-one parents, so a product detail
+# costs three queries however many attributes and price points it has.
+PRODUCT_DETAIL_OPTIONS = (
+    selectinload(Product.attribute_values)
+    .joinedload(ProductAttributeValue.attribute_value)
+    .joinedload(AttributeValue.attribute),
+    selectinload(Product.pricing).joinedload(ProductPricing.region),
+    selectinload(Product.pricing).joinedload(ProductPricing.rental_period),
+)
+
+
+# Documents stored per transaction by the background writer
+DOCUMENT_WRITE_BATCH = 500
+
+# Built documents waiting to be stored; beyond this, reads skip storing theirs
+MAX_PENDING_DOCUMENTS = 10000
+
+# Dialects whose triggers keep the stored documents current. Elsewhere the detail
+# is built from the product graph on every read.
+DOCUMENT_DIALECTS = {"sqlite", "postgresql"}
+
+# Products whose document a change to each table makes stale, as SQL over the old or
+# new row. Attribute value, attribute, region and rental period inserts are not
+# listed: no document refers to such a row yet.
+_STALE_PRODUCTS = {
+    "products": ("UPDATE",),
+    "product_attribute_values": ("INSERT", "UPDATE", "DELETE"),
+    "product_pricing": ("INSERT", "UPDATE", "DELETE"),
+    "attribute_values": ("UPDATE", "DELETE"),
+    "attributes": ("UPDATE", "DELETE"),
+    "regions": ("UPDATE", "DELETE"),
+    "rental_periods": ("UPDATE", "DELETE"),
+}
+
+
+def _stale_condition(table: str, row: str) -> str:
+    if table == "products":
+        return f"product_id = {row}.id"
+    if table in ("product_attribute_values", "product_pricing"):
+        return f"product_id = {row}.product_id"
+    if table == "attribute_values":
+        return f"product_id IN (SELECT product_id FROM product_attribute_values WHERE attribute_value_id = {row}.id)"
+    if table == "attributes":
+        return (
+            "product_id IN (SELECT pav.product_id FROM product_attribute_values pav "
+            f"JOIN attribute_values av ON av.id = pav.attribute_value_id WHERE av.attribute_id = {row}.id)"
+        )
+    if table == "regions":
+        return f"product_id IN (SELECT product_id FROM product_pricing WHERE region_id = {row}.id)"
+    return f"product_id IN (SELECT product_id FROM product_pricing WHERE rental_period_id = {row}.id)"
+
+
+def _statements(table: str, operation: str) -> str:
+    # Every product has a document row from its insert on, so that each write leaves
+    # a new version behind even when no document has been built yet
+    if table == "products" and operation == "INSERT":
+        return "INSERT INTO product_documents (product_id, version) VALUES (new.id, 0) ON CONFLICT (product_id) DO NOTHING;"
+    if table == "products" and operation == "DELETE":
+        return "DELETE FROM product_documents WHERE product_id = old.id;"
+    if operation not in _STALE_PRODUCTS.get(table, ()):
+        return ""
+    # Updates can move a row to another product, so both versions are stale
+    rows = {"INSERT": ("new",), "UPDATE": ("old", "new"), "DELETE": ("old",)}[operation]
+    return " ".join(
+        "UPDATE product_documents SET body = NULL, etag = NULL, version = version + 1 "
+        f"WHERE {_stale_condition(table, row)};"
+        for row in rows
+    )
+
+
+def _triggers():
+    for table in _STALE_PRODUCTS:
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            statements = _statements(table, operation)
+            if statements:
+                yield f"product_documents_{table}_{operation.lower()}", table, operation, statements
+
+
+def _postgres_function(table: str) -> str:
+    branches = " ".join(
+        f"{'IF' if operation == 'INSERT' else 'ELSIF'} TG_OP = '{operation}' THEN {_statements(table, operation) or 'NULL;'}"
+        for operation in ("INSERT", "UPDATE", "DELETE")
+    )
+    return (
+        f"CREATE OR REPLACE FUNCTION product_documents_{table}() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        f"BEGIN {branches} END IF; RETURN NULL; END $$"
+    )
+
+
+def install_document_triggers(connection) -> None:
+    """Create the triggers that mark product documents stale, if they do not exist yet."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for name, table, operation, statements in _triggers():
+            connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {operation} ON {table} BEGIN {statements} END"))
+    elif dialect == "postgresql":
+        for table in _STALE_PRODUCTS:
+            connection.execute(text(_postgres_function(table)))
+            connection.execute(text(f"DROP TRIGGER IF EXISTS product_documents_stale ON {table}"))
+            connection.execute(text(
+                f"CREATE TRIGGER product_documents_stale AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION product_documents_{table}()"
+            ))
+
+
+def drop_document_triggers(connection) -> None:
+    # The triggers live on the source tables, so they outlive the documents table
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        for name, *_ in _triggers():
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    elif dialect == "postgresql":
+        for table in _STALE_PRODUCTS:
+            connection.execute(text(f"DROP FUNCTION IF EXISTS product_documents_{table}() CASCADE"))
+
+
+# The triggers reference every source table, so they are created once all tables exist
+event.listen(Base.metadata, "after_create", lambda target, connection, **kw: install_document_triggers(connection))
+event.listen(ProductDocument.__table__, "before_drop", lambda target, connection, **kw: drop_document_triggers(connection))
+
+
+def product_detail_rows(db_product: Product) -> list:
+    # Every row the product detail is built from, so any change yields a new ETag
+    rows = [db_product]
+    for pav in db_product.attribute_values:
+        rows.extend((pav, pav.attribute_value, pav.attribute_value.attribute))
+    for price in db_product.pricing:
+        rows.extend((price, price.region, price.rental_period))
+    return rows
+
+
+def build_product_detail(db_product: Product) -> ProductDetailResponse:
+    # Expects the relationships in PRODUCT_DETAIL_OPTIONS to be loaded already
+    
+    # Get attribute values with their attribute information
+    attribute_values = []
+    for pav in db_product.attribute_values:
+        av = pav.attribute_value
+        attribute_values.append({
+            "id": av.id,
+            "attribute": {
+                "id": av.attribute.id,
+                "name": av.attribute.name,
+                "type": av.attribute.type
+            },
+            "value": av.value
+        })
+    
+    # Get pricing information
+    pricing = []
+    for price in db_product.pricing:
+        pricing.append({
+            "id": price.id,
+            "region": {
+                "id": price.region.id,
+                "name": price.region.name,
+                "code": price.region.code
+            },
+            "rental_period": {
+                "id": price.rental_period.id,
+                "name": price.rental_period.name,
+                "days": price.rental_period.days
+            },
+            "price": float(price.price),
+            "is_active": price.is_active
+        })
+    
+    # Create response with nested data
+    response = ProductDetailResponse(
+        id=db_product.id,
+        name=db_product.name,
+        description=db_product.description,
+        sku=db_product.sku,
+        is_active=db_product.is_active,
+        created_at=db_product.created_at,
+        updated_at=db_product.updated_at,
+        attribute_values=attribute_values,
+        pricing=pricing
+    )
+    
+    return response
+
+
+# Body, ETag and Last-Modified of a product detail response
+Document = Tuple[str, str, Optional[datetime]]
+
+
+def load_product_graph(db: Session, product_id: int) -> Optional[Product]:
+    return db.execute(select(Product).where(Product.id == product_id).options(*PRODUCT_DETAIL_OPTIONS)).scalars().first()
+
+
+def _build_document(db_product: Product) -> Document:
+    etag, last_modified = row_validators(product_detail_rows(db_product))
+    return build_product_detail(db_product).model_dump_json(), etag, last_modified
+
+
+class DocumentWriter:
+    """
+    Stores the documents that reads had to build, on a background thread.
+
+    Reads never write: a read that finds no current document builds it and queues it
+    here with the document version it saw. The writer stores queued documents in
+    batches with an UPDATE conditional on that version, so a document built before a
+    concurrent write is dropped rather than stored over the write's change; the next
+    read builds it again.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = DOCUMENT_WRITE_BATCH):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=MAX_PENDING_DOCUMENTS)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, product_id: int, version: int, document: Document) -> None:
+        body, etag, last_modified = document
+        try:
+            self._queue.put_nowait({
+                "b_product_id": product_id, "b_version": version,
+                "body": body, "etag": etag, "last_modified": last_modified,
+            })
+        except queue.Full:
+            # Under a burst of cold reads, later reads build the document again
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="document-writer", daemon=True)
+                self._thread.start()
+
+    def flush(self) -> None:
+        """Wait until every queued document has been written or dropped."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            entries = [self._queue.get()]
+            while len(entries) < self.batch_size:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                # Of several builds of one product, the last one queued is written
+                self._write(list({entry["b_product_id"]: entry for entry in entries}.values()))
+            except Exception:
+                logger.exception("Storing %d product documents failed", len(entries))
+            finally:
+                for _ in entries:
+                    self._queue.task_done()
+
+    def _write(self, entries: List[dict]) -> None:
+        table = ProductDocument.__table__
+        statement = (
+            table.update()
+            .where(table.c.product_id == bindparam("b_product_id"), table.c.version == bindparam("b_version"))
+            .values(body=bindparam("body"), etag=bindparam("etag"), last_modified=bindparam("last_modified"), built_at=func.now())
+        )
+        with self.session_factory() as db:
+            db.execute(statement, entries)
+            db.commit()
+
+
+document_writer = DocumentWriter()
+
+
+def read_product_document(db: Session, product_id: int) -> Optional[Document]:
+    """
+    Serialised detail response of ``product_id``, or None if there is no such product.
+
+    A current stored document is a single primary-key read. Otherwise the detail is
+    built from the product graph and handed to ``document_writer`` with the version
+    read beforehand; every write to a row of the graph bumps that version first, so
+    a build that raced a write is never stored.
+    """
+    if db.get_bind().dialect.name not in DOCUMENT_DIALECTS:
+        db_product = load_product_graph(db, product_id)
+        return _build_document(db_product) if db_product is not None else None
+
+    # Joined from products so that a missing product is also answered by this one read
+    stored = db.execute(
+        select(Product.id, ProductDocument.version, ProductDocument.body, ProductDocument.etag, ProductDocument.last_modified)
+        .outerjoin(ProductDocument, ProductDocument.product_id == Product.id)
+        .where(Product.id == product_id)
+    ).first()
+    if stored is None:
+        return None
+    if stored.body is not None:
+        return stored.body, stored.etag, stored.last_modified
+
+    db_product = load_product_graph(db, product_id)
+    if db_product is None:
+        return None
+    document = _build_document(db_product)
+    # Products without a document row predate the triggers and are not stored
+    if stored.version is not None:
+        document_writer.submit(product_id, stored.version, document)
+    return document
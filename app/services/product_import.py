@@ -0,0 +1,136 @@
+from typing import Any, Dict, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.attribute import AttributeValue
+from app.models.product import Product
+from app.models.product_attribute_value import ProductAttributeValue
+from app.schemas.product import ProductBulkItem
+from app.services.facet_index import facet_index
+from app.services.jobs import JobContext, job_handler, read_job_rows
+from app.services.upsert import UPSERT_INSERTS, format_validation_error
+
+# Products written per transaction; each chunk costs a fixed handful of statements
+CHUNK_SIZE = 2000
+
+# Failed and skipped rows listed in the result of an import job; the counts cover every row
+MAX_JOB_ROW_ERRORS = 1000
+
+
+def _result(index: int, status: str, sku=None, id=None, detail=None) -> Dict[str, Any]:
+    return {"index": index, "sku": sku, "status": status, "id": id, "detail": detail}
+
+
+def upsert_products(db: Session, rows: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+    """
+    Insert or update one chunk of ``(index, row)`` products on their SKU and commit it.
+
+    Existing SKUs and names are looked up with one IN query and referenced attribute
+    values with another. Products are then written with a single executemany upsert,
+    and the attribute values of rows that list ``attribute_value_ids`` are replaced
+    with one DELETE and one executemany INSERT. When a SKU appears more than once in
+    the chunk the last row wins and the earlier ones are reported as skipped.
+
+    Returns:
+        list: One result per row, in input order, with the product id on success
+    """
+    insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        raise NotImplementedError(f"Bulk product upsert is not supported on {db.get_bind().dialect.name}")
+
+    results = {}
+    valid: Dict[str, Tuple[int, ProductBulkItem]] = {}
+    for index, row in rows:
+        try:
+            item = ProductBulkItem.model_validate(row)
+        except ValidationError as error:
+            sku = row.get("sku") if isinstance(row, dict) else None
+            results[index] = _result(index, "failed", sku=sku, detail=format_validation_error(error))
+            continue
+        if item.sku in valid:
+            skipped = valid[item.sku][0]
+            results[skipped] = _result(skipped, "skipped", sku=item.sku, detail=f"Superseded by row {index} with the same SKU")
+        valid[item.sku] = (index, item)
+
+    existing = db.execute(select(Product.id, Product.sku, Product.name).where(or_(
+        Product.sku.in_(valid),
+        Product.name.in_({item.name for _, item in valid.values()}),
+    ))).all()
+    ids_by_sku = {sku: product_id for product_id, sku, _ in existing}
+    name_owners = {name: sku for _, sku, name in existing}
+    value_ids = {value_id for _, item in valid.values() for value_id in item.attribute_value_ids or ()}
+    known_values = set(db.execute(select(AttributeValue.id).where(AttributeValue.id.in_(value_ids))).scalars()) if value_ids else set()
+
+    accepted = []
+    for index, item in valid.values():
+        missing = sorted(set(item.attribute_value_ids or ()) - known_values)
+        if missing:
+            results[index] = _result(index, "failed", sku=item.sku, detail=f"Attribute values not found: {missing}")
+        elif name_owners.setdefault(item.name, item.sku) != item.sku:
+            # Names are unique across products, as in create_product
+            results[index] = _result(index, "failed", sku=item.sku, detail="Product with this name already exists.")
+        else:
+            accepted.append((index, item))
+    if not accepted:
+        db.rollback()
+        return [results[index] for index, _ in rows]
+
+    statement = insert(Product.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["sku"],
+        set_={
+            "name": statement.excluded.name,
+            "description": statement.excluded.description,
+            "is_active": statement.excluded.is_active,
+            "updated_at": func.now(),
+        },
+    )
+    try:
+        db.execute(statement, [item.model_dump(exclude={"attribute_value_ids"}) for _, item in accepted])
+        created = {item.sku for _, item in accepted if item.sku not in ids_by_sku}
+        if created:
+            ids_by_sku.update(db.execute(select(Product.sku, Product.id).where(Product.sku.in_(created))).all())
+
+        values = {
+            ids_by_sku[item.sku]: sorted(set(item.attribute_value_ids))
+            for _, item in accepted if item.attribute_value_ids is not None
+        }
+        if values:
+            db.execute(delete(ProductAttributeValue).where(ProductAttributeValue.product_id.in_(values)))
+            links = [
+                {"product_id": product_id, "attribute_value_id": value_id}
+                for product_id, value_ids in values.items() for value_id in value_ids
+            ]
+            if links:
+                db.execute(ProductAttributeValue.__table__.insert(), links)
+        db.commit()
+    except SQLAlchemyError as error:
+        db.rollback()
+        for index, item in accepted:
+            results[index] = _result(index, "failed", sku=item.sku, detail=f"Database error: {error.__class__.__name__}")
+        return [results[index] for index, _ in rows]
+
+    for index, item in accepted:
+        status = "created" if item.sku in created else "updated"
+        results[index] = _result(index, status, sku=item.sku, id=ids_by_sku[item.sku])
+    facet_index.sync_products({ids_by_sku[item.sku]: item.is_active for _, item in accepted}, values)
+    return [results[index] for index, _ in rows]
+
+
+@job_handler("product_import")
+def import_products_chunk(db: Session, job: JobContext) -> bool:
+    """Upsert the next chunk of the staged rows of a product import job, counting the results by status."""
+    start = job.state.get("next_row", 0)
+    rows = read_job_rows(db, job.id, start, start + CHUNK_SIZE)
+    results = upsert_products(db, list(enumerate(rows, start)))
+    counts = job.result.setdefault("counts", {})
+    errors = job.result.setdefault("errors", [])
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        if result["status"] in ("failed", "skipped") and len(errors) < MAX_JOB_ROW_ERRORS:
+            errors.append(result)
+    job.state["next_row"] = job.completed = start + len(results)
+    return job.completed >= job.total
@@ -0,0 +1,92 @@
+import re
+from typing import List, Tuple
+
+from sqlalchemy import column, event, func, literal_column, table, text
+from sqlalchemy.sql import Select
+
+from app.models.product import Product
+
+# Name matches outrank description matches by this factor
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# SQLite: external-content FTS5 table over products, kept in sync by triggers. The
+# prefix option indexes 2 and 3 character prefixes so short "term*" queries stay fast.
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, description, content='products', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+# Handle on the FTS5 table for joins, it is not part of the ORM metadata
+products_fts = table("products_fts", column("rowid"))
+
+# PostgreSQL: GIN expression index. Queries must spell out the same expression.
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple'::regconfig, coalesce(products.name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(products.description, '')), 'B')"
+)
+POSTGRES_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING gin (({POSTGRES_DOCUMENT}))",
+)
+
+
+def install_search_index(connection) -> None:
+    """Create the full-text index of the products table if it does not exist yet."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")).first()
+        for statement in SQLITE_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Index the rows that predate the table
+            connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.execute(text(statement))
+
+
+def drop_search_index(connection) -> None:
+    # Triggers and the PostgreSQL index go away with the products table itself
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS products_fts"))
+
+
+event.listen(Product.__table__, "after_create", lambda target, connection, **kw: install_search_index(connection))
+event.listen(Product.__table__, "before_drop", lambda target, connection, **kw: drop_search_index(connection))
+
+
+def search_terms(q: str) -> List[str]:
+    """Split a user query into word terms, dropping any query syntax characters."""
+    return re.findall(r"\w+", q)
+
+
+def apply_text_search(query: Select, dialect: str, terms: List[str]) -> Tuple[Select, object]:
+    """
+    Restrict a products query to rows matching every term, each as a prefix.
+
+    Returns the filtered query and an expression to order by for relevance (best first).
+
+    Raises:
+        NotImplementedError: If the database backend has no full-text index
+    """
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        rank = func.bm25(literal_column("products_fts"), NAME_WEIGHT, DESCRIPTION_WEIGHT)
+        query = query.join(products_fts, products_fts.c.rowid == Product.id).where(
+            literal_column("products_fts").op("MATCH")(match)
+        )
+        return query, rank
+    if dialect == "postgresql":
+        document = literal_column(f"({POSTGRES_DOCUMENT})")
+        tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+        query = query.where(document.op("@@")(tsquery))
+        return query, func.ts_rank(document, tsquery).desc()
+    raise NotImplementedError(f"Full-text search is not supported on {dialect}")
@@ -0,0 +1,143 @@
+import math
+from datetime import datetime, timezone
+from decimal import Decimal
+from operator import add
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.product_pricing import ProductPricing
+from app.models.rental_period import RentalPeriod
+
+# Longest rental that can be quoted; the cost table holds one row per day
+MAX_QUOTE_DAYS = 730
+
+# Prices are planned in integer cents so that totals compare exactly
+CENT = Decimal("0.01")
+
+UNPRICED = float("inf")
+
+
+def _amount(cents: int) -> Decimal:
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+def _utc(value: datetime) -> datetime:
+    # Naive UTC, so that an aware date and a naive one can be subtracted
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+
+
+def rental_days(start_date: datetime, end_date: datetime) -> int:
+    """
+    Days between ``start_date`` and ``end_date``, where a started day counts as a whole one.
+
+    Either date may carry a timezone; naive dates are taken as UTC, like the stored ones.
+    """
+    return math.ceil((_utc(end_date) - _utc(start_date)).total_seconds() / 86400)
+
+
+def cheapest_plans(days: int, lengths: Sequence[int], sheets: Sequence[Sequence[Optional[int]]]) -> List[Optional[Tuple[int, List[int]]]]:
+    """
+    Cheapest mix of rental periods covering at least ``days`` days, for many price sheets at once.
+
+    Each sheet holds the price in cents of every period in ``lengths``, or None where
+    the period is not offered. This is an unbounded knapsack over days:
+
+        cost[d] = min over periods p of cost[max(d - lengths[p], 0)] + price[p]
+
+    solved for all sheets together. Every day costs one ``map`` per period over the
+    column of sheets, so the interpreter overhead grows with days and periods while
+    the per-sheet work runs in C.
+
+    Returns:
+        list: Per sheet, the total in cents and the quantity of every period, or None
+        when the sheet prices no period
+    """
+    columns = [[UNPRICED if sheet[p] is None else sheet[p] for sheet in sheets] for p in range(len(lengths))]
+    if not columns:
+        return [None] * len(sheets)
+
+    cost = [[0] * len(sheets)]
+    for day in range(1, days + 1):
+        candidates = [map(add, cost[max(day - length, 0)], column) for length, column in zip(lengths, columns)]
+        cost.append(list(map(min, *candidates)) if len(candidates) > 1 else list(candidates[0]))
+
+    plans = []
+    for index, sheet in enumerate(sheets):
+        if cost[days][index] == UNPRICED:
+            plans.append(None)
+            continue
+        # Walk back through the table, taking any period that explains the cost of the day
+        quantities = [0] * len(lengths)
+        day = days
+        while day > 0:
+            for p, length in enumerate(lengths):
+                previous = max(day - length, 0)
+                if sheet[p] is not None and cost[previous][index] + sheet[p] == cost[day][index]:
+                    quantities[p] += 1
+                    day = previous
+                    break
+        plans.append((cost[days][index], quantities))
+    return plans
+
+
+def quote_products(db: Session, product_ids: List[int], region_id: int, days: int) -> List[Dict[str, Any]]:
+    """
+    Price a ``days`` long rental of every product in ``region_id``, in input order.
+
+    Reads the products and their active pricing with active rental periods in two
+    queries. Products with the same prices share one price sheet, which is planned
+    once by ``cheapest_plans``.
+    """
+    products = dict(db.execute(select(Product.id, Product.is_active).where(Product.id.in_(set(product_ids)))).all())
+    rows = db.execute(
+        select(ProductPricing.product_id, ProductPricing.price, RentalPeriod.id, RentalPeriod.name, RentalPeriod.days)
+        .join(RentalPeriod, ProductPricing.rental_period_id == RentalPeriod.id)
+        .where(
+            ProductPricing.product_id.in_(set(product_ids)),
+            ProductPricing.region_id == region_id,
+            ProductPricing.is_active.is_(True),
+            RentalPeriod.is_active.is_(True),
+            RentalPeriod.days > 0,
+        )
+    ).all()
+
+    # Longest periods first, so that among equally cheap plans the one with fewer lines wins
+    periods = sorted({(period_id, name, length) for _, _, period_id, name, length in rows}, key=lambda period: (-period[2], period[0]))
+    position = {period[0]: p for p, period in enumerate(periods)}
+    prices: Dict[int, List[Optional[int]]] = {}
+    for product_id, price, period_id, _, _ in rows:
+        prices.setdefault(product_id, [None] * len(periods))[position[period_id]] = int(Decimal(price).quantize(CENT) * 100)
+
+    sheets = list({tuple(sheet) for sheet in prices.values()})
+    plans = dict(zip(sheets, cheapest_plans(days, [period[2] for period in periods], sheets)))
+
+    quotes = []
+    for product_id in product_ids:
+        quote = {"product_id": product_id, "priced": False}
+        if product_id not in products:
+            quote["message"] = "Product not found"
+        elif not products[product_id]:
+            quote["message"] = "Product is not active"
+        elif product_id not in prices:
+            quote["message"] = "No active pricing for this product in the region"
+        else:
+            sheet = tuple(prices[product_id])
+            total, quantities = plans[sheet]
+            lines = [
+                {
+                    "rental_period_id": period_id, "name": name, "days": length, "quantity": quantity,
+                    "unit_price": _amount(sheet[p]), "subtotal": _amount(sheet[p] * quantity),
+                }
+                for p, ((period_id, name, length), quantity) in enumerate(zip(periods, quantities)) if quantity
+            ]
+            quote.update(
+                priced=True,
+                total=_amount(total),
+                days_covered=sum(line["days"] * line["quantity"] for line in lines),
+                lines=lines,
+            )
+        quotes.append(quote)
+    return quotes
@@ -0,0 +1,220 @@
+"""
+Revenue rollups: confirmed and completed rental transactions summed per region,
+rental period, product and start day.
+
+Every ORM flush that creates, changes or deletes rental transactions applies the
+difference to the rollups in the same database transaction, on SQLite and
+PostgreSQL; elsewhere the writes go through without it and a warning is logged.
+Transactions written around the ORM are picked up by a backfill:
+
+    python -m app.services.revenue_rollups [--window-days 31]
+"""
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.orm import Session
+
+from app.models.rental_transaction import RentalTransaction, TransactionStatus
+from app.models.revenue_rollup import RevenueRollup
+from app.services.jobs import JobContext, job_handler
+from app.services.upsert import UPSERT_INSERTS
+from app.services.quotes import rental_days
+
+logger = logging.getLogger(__name__)
+
+# Statuses that count as revenue; cancelled transactions drop out of the rollups
+COUNTED_STATUSES = {TransactionStatus.CONFIRMED, TransactionStatus.COMPLETED}
+
+# Days of transactions recomputed per backfill transaction
+BACKFILL_WINDOW_DAYS = 31
+
+# Transaction columns a rollup row depends on, in the argument order of ``contribution``
+CONTRIBUTING_COLUMNS = ("region_id", "rental_period_id", "product_id", "start_date", "end_date", "price", "status")
+
+# (region_id, rental_period_id, product_id, day) of a rollup row
+Key = Tuple[int, int, int, date]
+
+ROLLUP_KEY = ("region_id", "rental_period_id", "product_id", "day")
+
+# Dialects without an upsert that live rollups were already skipped on, so each warns once
+_SKIPPED_DIALECTS = set()
+
+
+def contribution(region_id, rental_period_id, product_id, start_date, end_date, price, status) -> Optional[Tuple[Key, Tuple[int, int, int]]]:
+    """Rollup key and (transactions, revenue in cents, booked days) of one transaction, or None if it does not count."""
+    if status is None or TransactionStatus(status) not in COUNTED_STATUSES:
+        return None
+    cents = int(Decimal(str(price)).quantize(Decimal("0.01")) * 100)
+    return (region_id, rental_period_id, product_id, start_date.date()), (1, cents, max(rental_days(start_date, end_date), 0))
+
+
+def _add(deltas: Dict[Key, List[int]], values, sign: int) -> None:
+    counted = contribution(*values)
+    if counted is not None:
+        key, amounts = counted
+        totals = deltas[key]
+        for i, amount in enumerate(amounts):
+            totals[i] += sign * amount
+
+
+def apply_deltas(connection, deltas: Dict[Key, List[int]]) -> None:
+    """Add ``deltas`` to the rollup rows with one upsert, removing rows left without transactions."""
+    insert = UPSERT_INSERTS.get(connection.dialect.name)
+    if insert is None:
+        raise NotImplementedError(f"Revenue rollups are not supported on {connection.dialect.name}")
+    rows = [
+        {**dict(zip(ROLLUP_KEY, key)), "transactions": count, "revenue_cents": cents, "booked_days": days}
+        for key, (count, cents, days) in deltas.items() if count or cents or days
+    ]
+    if not rows:
+        return
+    table = RevenueRollup.__table__
+    statement = insert(table)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY),
+        set_={
+            "transactions": table.c.transactions + statement.excluded.transactions,
+            "revenue_cents": table.c.revenue_cents + statement.excluded.revenue_cents,
+            "booked_days": table.c.booked_days + statement.excluded.booked_days,
+            "updated_at": func.now(),
+        },
+    ), rows)
+    for row in rows:
+        if row["transactions"] < 0:
+            connection.execute(delete(table).where(
+                *(table.c[column] == row[column] for column in ROLLUP_KEY),
+                table.c.transactions <= 0,
+            ))
+
+
+def _track_transaction_changes(session: Session, flush_context, instances) -> None:
+    created = [obj for obj in session.new if isinstance(obj, RentalTransaction)]
+    changed = [obj for obj in session.dirty if isinstance(obj, RentalTransaction) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, RentalTransaction)]
+    if not (created or changed or deleted):
+        return
+    # Failing here would fail every flush that touches a rental transaction
+    dialect = session.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        if dialect not in _SKIPPED_DIALECTS:
+            _SKIPPED_DIALECTS.add(dialect)
+            logger.warning("Revenue rollups are not maintained on %s; run a backfill to rebuild them", dialect)
+        return
+
+    deltas: Dict[Key, List[int]] = defaultdict(lambda: [0, 0, 0])
+    previous_ids = [obj.id for obj in (*changed, *deleted) if obj.id is not None]
+    if previous_ids:
+        # The rows are not flushed yet, so the database still holds what they contributed
+        columns = [getattr(RentalTransaction, column) for column in CONTRIBUTING_COLUMNS]
+        for values in session.connection().execute(select(*columns).where(RentalTransaction.id.in_(previous_ids))):
+            _add(deltas, values, -1)
+    for obj in (*created, *changed):
+        _add(deltas, [getattr(obj, column) for column in CONTRIBUTING_COLUMNS], 1)
+    apply_deltas(session.connection(), deltas)
+
+
+event.listen(Session, "before_flush", _track_transaction_changes)
+
+
+def _lock_rollups(db: Session) -> None:
+    # Live deltas must wait for a window to be recomputed, or they would be overwritten
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+    elif dialect == "postgresql":
+        db.connection().exec_driver_sql("LOCK TABLE revenue_rollups IN SHARE ROW EXCLUSIVE MODE")
+
+
+def backfill_windows(db: Session, window_days: int = BACKFILL_WINDOW_DAYS) -> List[Tuple[date, date]]:
+    """Half-open day ranges covering every transaction start day and every existing rollup row."""
+    first_start, last_start = db.execute(select(func.min(RentalTransaction.start_date), func.max(RentalTransaction.start_date))).one()
+    first_day, last_day = db.execute(select(func.min(RevenueRollup.day), func.max(RevenueRollup.day))).one()
+    days = [value.date() if isinstance(value, datetime) else value for value in (first_start, last_start, first_day, last_day) if value is not None]
+    if not days:
+        return []
+    start, end = min(days), max(days) + timedelta(days=1)
+    return [(day, min(day + timedelta(days=window_days), end)) for day in _steps(start, end, window_days)]
+
+
+def _steps(start: date, end: date, window_days: int) -> Iterable[date]:
+    while start < end:
+        yield start
+        start += timedelta(days=window_days)
+
+
+def backfill_window(db: Session, start: date, end: date) -> int:
+    """
+    Replace the rollups of days in ``[start, end)`` with totals recomputed from the transactions, and commit.
+
+    Windows are independent and idempotent, so a backfill can stop and resume at any
+    window and runs alongside live writes.
+
+    Returns:
+        int: The number of transactions counted
+    """
+    _lock_rollups(db)
+    columns = [getattr(RentalTransaction, column) for column in CONTRIBUTING_COLUMNS]
+    result = db.execute(select(*columns).where(
+        RentalTransaction.start_date >= datetime.combine(start, time.min),
+        RentalTransaction.start_date < datetime.combine(end, time.min),
+        RentalTransaction.status.in_(COUNTED_STATUSES),
+    ))
+    totals: Dict[Key, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for values in result:
+        _add(totals, values, 1)
+
+    db.execute(delete(RevenueRollup).where(RevenueRollup.day >= start, RevenueRollup.day < end))
+    if totals:
+        db.execute(RevenueRollup.__table__.insert(), [
+            {**dict(zip(ROLLUP_KEY, key)), "transactions": count, "revenue_cents": cents, "booked_days": days}
+            for key, (count, cents, days) in totals.items()
+        ])
+    db.commit()
+    return sum(count for count, _, _ in totals.values())
+
+
+def backfill(db: Session, window_days: int = BACKFILL_WINDOW_DAYS,
+             progress: Optional[Callable[[date, date, int], None]] = None) -> int:
+    """Rebuild every rollup from the rental transactions, one committed window at a time."""
+    counted = 0
+    for start, end in backfill_windows(db, window_days):
+        window_count = backfill_window(db, start, end)
+        counted += window_count
+        if progress is not None:
+            progress(start, end, window_count)
+    return counted
+
+
+@job_handler("revenue_backfill")
+def backfill_chunk(db: Session, job: JobContext) -> bool:
+    """Recompute the next window of a backfill job. The windows are planned once, so a resumed job keeps them."""
+    if "windows" not in job.state:
+        windows = backfill_windows(db, job.params.get("window_days", BACKFILL_WINDOW_DAYS))
+        job.state["windows"] = [[start.isoformat(), end.isoformat()] for start, end in windows]
+        job.total = len(windows)
+    windows = job.state["windows"]
+    if job.completed < len(windows):
+        start, end = (date.fromisoformat(day) for day in windows[job.completed])
+        job.result["transactions"] = job.result.get("transactions", 0) + backfill_window(db, start, end)
+        job.completed += 1
+    return job.completed >= len(windows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the revenue rollups from the rental transactions")
+    parser.add_argument("--window-days", type=int, default=BACKFILL_WINDOW_DAYS, help="Days recomputed per database transaction")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+    with SessionLocal() as db:
+        counted = backfill(db, args.window_days, progress=lambda start, end, count: print(f"{start} - {end}: {count} transactions"))
+    print(f"Backfilled {counted} transactions")
+
+
+if __name__ == "__main__":
+    main()
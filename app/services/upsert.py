@@ -0,0 +1,15 @@
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """One-line summary of a row's validation errors, as ``field: message`` pairs."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
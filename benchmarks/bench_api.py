@@ -0,0 +1,216 @@
+"""
+In-process load test of the main API endpoints.
+
+Seeds a synthetic dataset into a fresh SQLite database, then drives the ASGI app
+through httpx with concurrent clients, one endpoint at a time, and reports
+p50/p95/p99 latency and throughput per endpoint. ``--save`` writes the results
+as a JSON baseline; ``--compare`` checks a run against one and exits with status
+1 when an endpoint's p95 latency or throughput regressed beyond ``--threshold``.
+
+Usage:
+    python -m benchmarks.bench_api [--products 2000] [--concurrency 8] [--requests 400]
+    python -m benchmarks.bench_api --save benchmarks/baseline.json
+    python -m benchmarks.bench_api --compare benchmarks/baseline.json --threshold 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.seed import BOOKING_EPOCH, WORDS, Scale
+
+# (method, path, query params, JSON body) of one request
+Call = Tuple[str, str, Optional[dict], Optional[dict]]
+
+
+def scenarios(scale: Scale) -> Dict[str, Callable[[random.Random], Call]]:
+    """Request factories per endpoint, drawing ids that exist at ``scale``."""
+    def product(rng):
+        return rng.randint(1, scale.products)
+
+    def combination(rng):
+        return product(rng), rng.randint(1, scale.regions), rng.randint(1, scale.periods)
+
+    def check_rental(rng):
+        product_id, region_id, rental_period_id = combination(rng)
+        start = BOOKING_EPOCH + timedelta(days=rng.randint(0, 365))
+        return "POST", "/api/v1/check-rental", None, {
+            "product_id": product_id, "region_id": region_id, "rental_period_id": rental_period_id,
+            "pricing_id": scale.pricing_id(product_id, region_id, rental_period_id),
+            "start_date": start.isoformat(), "end_date": (start + timedelta(days=3)).isoformat(),
+        }
+
+    def pricing_lookup(rng):
+        product_id, region_id, rental_period_id = combination(rng)
+        return "GET", "/api/v1/pricing", {
+            "product_id": product_id, "region_id": region_id, "rental_period_id": rental_period_id,
+        }, None
+
+    def facet_search(rng):
+        value_ids = [(a - 1) * scale.values_per_attribute + rng.randint(1, scale.values_per_attribute)
+                     for a in range(1, min(scale.attributes, 2) + 1)]
+        return "GET", "/api/v1/products/search", {"attribute_value_ids": value_ids, "limit": 20}, None
+
+    return {
+        "products.list": lambda rng: ("GET", "/api/v1/products", {"skip": rng.randint(0, max(scale.products - 50, 0)), "limit": 50}, None),
+        "products.detail": lambda rng: ("GET", f"/api/v1/products/{product(rng)}", None, None),
+        "products.text_search": lambda rng: ("GET", "/api/v1/products", {"q": rng.choice(WORDS)[:4], "limit": 20}, None),
+        "products.facet_search": facet_search,
+        "products.availability": lambda rng: ("GET", f"/api/v1/products/{product(rng)}/availability", {"from": BOOKING_EPOCH.isoformat()}, None),
+        "pricing.lookup": pricing_lookup,
+        "pricing.detail": lambda rng: ("GET", f"/api/v1/pricing/{scale.pricing_id(*combination(rng))}", None, None),
+        "regions.list": lambda rng: ("GET", "/api/v1/regions", None, None),
+        "rental_transactions.list": lambda rng: ("GET", "/api/v1/rental-transactions", {"limit": 50, "product_id": product(rng)}, None),
+        "check_rental": check_rental,
+        "analytics.revenue": lambda rng: ("GET", "/api/v1/analytics/revenue", {
+            "group_by": rng.choice([["month", "region"], ["month", "rental_period"], ["day"]]),
+            "region_id": rng.randint(1, scale.regions),
+        }, None),
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_endpoint(client, factory, requests: int, concurrency: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    calls = [factory(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(worker_calls):
+        nonlocal errors
+        for method, path, params, body in worker_calls:
+            start = time.perf_counter()
+            response = await client.request(method, path, params=params, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(calls[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run(args, scale: Scale) -> Dict[str, dict]:
+    import httpx
+    from app.database import async_engine
+    from app.main import app
+
+    selected = scenarios(scale)
+    if args.endpoints:
+        selected = {name: factory for name, factory in selected.items() if name in args.endpoints}
+
+    results = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name, factory in selected.items():
+            # Warm caches and indexes so every endpoint is measured in its steady state
+            await run_endpoint(client, factory, min(args.warmup, args.requests), args.concurrency, args.seed + 1)
+            results[name] = await run_endpoint(client, factory, args.requests, args.concurrency, args.seed)
+    await async_engine.dispose()
+    return results
+
+
+def print_results(results: Dict[str, dict]) -> None:
+    print(f"{'endpoint':<26} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, result in results.items():
+        print(f"{name:<26} {result['throughput']:>9.1f} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}")
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Describe every endpoint whose p95 latency or throughput is worse than ``baseline`` by more than ``threshold``."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["p95_ms"] > reference["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.2f} ms vs {reference['p95_ms']:.2f} ms")
+        if result["throughput"] < reference["throughput"] / (1 + threshold):
+            regressions.append(f"{name}: {result['throughput']:.1f} req/s vs {reference['throughput']:.1f} req/s")
+        if result["errors"] > reference["errors"]:
+            regressions.append(f"{name}: {result['errors']} errors vs {reference['errors']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    scale_defaults = Scale()
+    for field in ("products", "regions", "periods", "attributes", "values_per_attribute", "transactions"):
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=getattr(scale_defaults, field))
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=400, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per endpoint before measuring")
+    parser.add_argument("--endpoints", nargs="*", help="Only run these endpoints")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="Write the results to this baseline JSON file")
+    parser.add_argument("--compare", help="Fail if results regress against this baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression, 0.25 = 25%%")
+    args = parser.parse_args()
+    scale = Scale(**{field: getattr(args, field) for field in scale_defaults.__dataclass_fields__})
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The app reads its database URL at import time, so set it before importing
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "60000")
+        from app.database import engine
+        from app.database import SessionLocal
+        from app.main import create_schema
+        from app.services.revenue_rollups import backfill
+        from benchmarks.seed import seed
+
+        create_schema()
+
+        started = time.perf_counter()
+        seed(engine, scale, args.seed)
+        # The seed writes around the ORM, so the revenue rollups are built afterwards
+        with SessionLocal() as db:
+            backfill(db)
+        print(f"Seeded {scale} in {time.perf_counter() - started:.1f} s")
+
+        results = asyncio.run(run(args, scale))
+        engine.dispose()
+
+    print_results(results)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"scale": scale.__dict__, "results": results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != scale.__dict__:
+            print(f"Warning: baseline was recorded at scale {baseline.get('scale')}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
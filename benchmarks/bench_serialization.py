@@ -0,0 +1,95 @@
+"""
+Per-item serialisation cost of product and pricing responses.
+
+Compares FastAPI's default response path (validation against ``response_model``,
+``jsonable_encoder`` and ``json.dumps``) with the trusted paths in
+``app.serialization``. No database is needed: the ORM rows are built in memory.
+
+Usage:
+    python -m benchmarks.bench_serialization [--rows 1000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models.product import Product
+from app.models.product_pricing import ProductPricing
+from app.schemas.product import ProductResponse
+from app.schemas.product_pricing import ProductPricingResponse
+from app.serialization import DefaultJSONResponse, rows_response
+
+
+def make_products(count: int) -> List[Product]:
+    now = datetime(2024, 1, 1, 12, 30)
+    return [
+        Product(id=i, name=f"Product {i}", description=f"Description of product {i}", sku=f"SKU-{i}",
+                is_active=True, created_at=now, updated_at=now)
+        for i in range(1, count + 1)
+    ]
+
+
+def make_pricing(count: int) -> List[ProductPricing]:
+    now = datetime(2024, 1, 1, 12, 30)
+    return [
+        ProductPricing(id=i, product_id=i, region_id=1, rental_period_id=1, price=Decimal("19.99"),
+                       is_active=True, created_at=now, updated_at=now)
+        for i in range(1, count + 1)
+    ]
+
+
+def fastapi_default(schema, response_class, loop):
+    field = create_response_field(name="Response", type_=List[schema], mode="serialization")
+
+    def render(rows):
+        content = loop.run_until_complete(serialize_response(field=field, response_content=rows))
+        return response_class(content).body
+    return render
+
+
+def trusted(schema):
+    return lambda rows: rows_response(schema, rows, Response()).body
+
+
+def measure(render, rows, repeat: int) -> float:
+    render(rows)  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per variant, the best one is reported")
+    args = parser.parse_args()
+    loop = asyncio.new_event_loop()
+
+    print(f"{'payload':<10} {'path':<32} {'page ms':>9} {'us/item':>9}")
+    for name, schema, rows in (
+        ("products", ProductResponse, make_products(args.rows)),
+        ("pricing", ProductPricingResponse, make_pricing(args.rows)),
+    ):
+        variants = (
+            ("response_model + JSONResponse", fastapi_default(schema, JSONResponse, loop)),
+            ("response_model + default class", fastapi_default(schema, DefaultJSONResponse, loop)),
+            ("trusted rows_response", trusted(schema)),
+        )
+        for label, render in variants:
+            seconds = measure(render, rows, args.repeat)
+            print(f"{name:<10} {label:<32} {seconds * 1000:>9.2f} {seconds / len(rows) * 1e6:>9.2f}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Synthetic dataset for the API benchmarks.
+
+Rows are written with Core executemany statements and explicit ids, so the ids
+of every table are known without reading them back and a scale of tens of
+thousands of products seeds in seconds. This module does not import the app at
+import time, so DATABASE_URL can still be pointed at a scratch database.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+# Rows per executemany call
+BATCH_SIZE = 5000
+
+WORDS = (
+    "camping", "tent", "kayak", "bike", "stove", "lantern", "drill", "ladder", "camera", "tripod",
+    "speaker", "projector", "canoe", "helmet", "backpack", "cooler", "grill", "saw", "mixer", "trailer",
+)
+
+PERIOD_DAYS = (1, 7, 30, 90, 365)
+
+# Start of the window that synthetic bookings fall in
+BOOKING_EPOCH = datetime(2024, 1, 1)
+
+
+@dataclass
+class Scale:
+    products: int = 2000
+    regions: int = 5
+    periods: int = 3
+    attributes: int = 3
+    values_per_attribute: int = 5
+    transactions: int = 20000
+
+    def pricing_id(self, product_id: int, region_id: int, rental_period_id: int) -> int:
+        """Id of the pricing row of a combination, every combination is priced."""
+        return ((product_id - 1) * self.regions + region_id - 1) * self.periods + rental_period_id
+
+
+def _insert(connection, model, rows) -> None:
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(insert(model.__table__), rows[start:start + BATCH_SIZE])
+
+
+def seed(engine, scale: Scale, seed: int = 42) -> None:
+    """Fill an empty database with ``scale`` rows, reproducibly for a given ``seed``."""
+    # Imported here rather than at module level: importing the models creates the
+    # app's engines, which must happen after callers have set DATABASE_URL
+    from app.models.attribute import Attribute, AttributeValue
+    from app.models.product import Product
+    from app.models.product_attribute_value import ProductAttributeValue
+    from app.models.product_pricing import ProductPricing
+    from app.models.region import Region
+    from app.models.rental_period import RentalPeriod
+    from app.models.rental_transaction import RentalTransaction, TransactionStatus
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    stamps = {"created_at": now, "updated_at": now}
+
+    with engine.begin() as connection:
+        _insert(connection, Region, [
+            {"id": i, "name": f"Region {i}", "code": f"R{i}", "is_active": True, **stamps}
+            for i in range(1, scale.regions + 1)
+        ])
+        _insert(connection, RentalPeriod, [
+            {"id": i, "name": f"{PERIOD_DAYS[(i - 1) % len(PERIOD_DAYS)]} days #{i}",
+             "days": PERIOD_DAYS[(i - 1) % len(PERIOD_DAYS)], "is_active": True, **stamps}
+            for i in range(1, scale.periods + 1)
+        ])
+        _insert(connection, Attribute, [
+            {"id": i, "name": f"Attribute {i}", "type": "text", "is_filterable": True, "is_required": False, **stamps}
+            for i in range(1, scale.attributes + 1)
+        ])
+        _insert(connection, AttributeValue, [
+            {"id": (a - 1) * scale.values_per_attribute + v, "attribute_id": a, "value": f"Value {a}.{v}", **stamps}
+            for a in range(1, scale.attributes + 1)
+            for v in range(1, scale.values_per_attribute + 1)
+        ])
+        _insert(connection, Product, [
+            {"id": i, "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}", "sku": f"SKU-{i:07d}",
+             "description": " ".join(rng.choices(WORDS, k=12)), "is_active": rng.random() < 0.9, **stamps}
+            for i in range(1, scale.products + 1)
+        ])
+        _insert(connection, ProductAttributeValue, [
+            {"product_id": i, "attribute_value_id": (a - 1) * scale.values_per_attribute + rng.randint(1, scale.values_per_attribute), **stamps}
+            for i in range(1, scale.products + 1)
+            for a in range(1, scale.attributes + 1)
+        ])
+        _insert(connection, ProductPricing, [
+            {"id": scale.pricing_id(p, r, rp), "product_id": p, "region_id": r, "rental_period_id": rp,
+             "price": Decimal(rng.randint(500, 50000)) / 100, "is_active": True, **stamps}
+            for p in range(1, scale.products + 1)
+            for r in range(1, scale.regions + 1)
+            for rp in range(1, scale.periods + 1)
+        ])
+        transactions = []
+        for i in range(1, scale.transactions + 1):
+            start = BOOKING_EPOCH + timedelta(days=rng.randint(0, 365), hours=rng.randint(0, 23))
+            transactions.append({
+                "id": i, "product_id": rng.randint(1, scale.products), "region_id": rng.randint(1, scale.regions),
+                "rental_period_id": rng.randint(1, scale.periods), "customer_name": f"Customer {i % 997}",
+                "customer_email": f"customer{i % 997}@example.com", "customer_address": f"{i} Main Street",
+                "start_date": start, "end_date": start + timedelta(days=rng.randint(1, 14)),
+                "price": Decimal(rng.randint(1000, 90000)) / 100, "status": rng.choice(list(TransactionStatus)),
+                **stamps,
+            })
+        _insert(connection, RentalTransaction, transactions)
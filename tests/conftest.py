@@ -1,26 +1,66 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, SessionLocal, get_db, get_async_db, make_async_url
+from app.instrumentation import instrument_engine
+from app.response_cache import response_cache
+from app.services.booking_index import booking_index
+from app.services.facet_index import facet_index
+from app.services.jobs import job_runner
+from app.services.product_documents import document_writer
+from app.services.pricing_cache import pricing_cache
 
-# Create a test database in memory
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Create a test database in a temporary file so the sync and async engines share it
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Every TestClient runs its own event loop, so async connections must not be pooled
+async_engine = create_async_engine(make_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Report the statements of the test engines in Server-Timing and /metrics like the application engines
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+@pytest.fixture
+def count_queries():
+    """Count the statements both test engines execute inside a ``with`` block."""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engines = (engine, async_engine.sync_engine)
+        for target in engines:
+            event.listen(target, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+    return counter
+
 @pytest.fixture(scope="function")
 def db():
     # Create the test database and tables
     Base.metadata.create_all(bind=engine)
-    
+
     # Create a new session for the test
     db = TestingSessionLocal()
     try:
@@ -38,11 +78,33 @@ def client(db):
             yield db
         finally:
             db.close()
-    
+
+    # Override the get_async_db dependency
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+
     app.dependency_overrides[get_db] = override_get_db
-    
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Background jobs and document writes open their own sessions, on the test database
+    job_runner.session_factory = TestingSessionLocal
+    document_writer.session_factory = TestingSessionLocal
+
     with TestClient(app) as test_client:
+        # Startup warms the index from the application database, not the test one
+        booking_index.clear()
+        pricing_cache.clear()
+        response_cache.clear()
+        facet_index.clear()
         yield test_client
-    
+
+    booking_index.clear()
+    pricing_cache.clear()
+    response_cache.clear()
+    facet_index.clear()
+    document_writer.flush()
+    job_runner.session_factory = SessionLocal
+    document_writer.session_factory = SessionLocal
+
     # Clear the dependency override after the test
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
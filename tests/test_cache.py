@@ -0,0 +1,115 @@
+import time
+
+import pytest
+from sqlalchemy import delete
+
+from app.cache import MISSING, LRUCache
+from app.models.collection_version import CollectionVersion
+from app.models.region import Region
+from app.models.rental_period import RentalPeriod
+
+
+def test_lru_cache_evicts_least_recently_used_entries():
+    cache = LRUCache(max_entries=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", None)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 1)
+
+
+def test_lru_cache_expires_entries_after_ttl():
+    cache = LRUCache(max_entries=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is MISSING
+    assert cache.stats()["expirations"] == 1
+
+
+def test_list_response_cache_skips_database_until_invalidated(client, count_queries):
+    client.post("/api/v1/attributes", json={"name": "Color", "type": "text"})
+    attribute = client.get("/api/v1/attributes").json()[0]
+    client.post("/api/v1/attribute-values", json={"attribute_id": attribute["id"], "value": "Red"})
+
+    first = client.get("/api/v1/attribute-values", params={"limit": 10})
+    with count_queries() as statements:
+        cached = client.get("/api/v1/attribute-values", params={"limit": 10})
+    assert statements == []
+    assert cached.json() == first.json() and cached.json()[0]["attribute"]["name"] == "Color"
+    assert cached.headers["cache-control"] == "public, max-age=60"
+
+    # Writes to any table the response is read from invalidate it
+    client.put(f"/api/v1/attributes/{attribute['id']}", json={"name": "Colour"})
+    assert client.get("/api/v1/attribute-values", params={"limit": 10}).json()[0]["attribute"]["name"] == "Colour"
+
+
+def test_list_response_cache_answers_conditional_requests(client, count_queries):
+    client.post("/api/v1/regions", json={"name": "North", "code": "N"})
+    etag = client.get("/api/v1/regions").headers["etag"]
+    with count_queries() as statements:
+        response = client.get("/api/v1/regions", headers={"If-None-Match": etag})
+    assert statements == []
+    # Clients revalidate every time, so they never hold a list past a write
+    assert response.status_code == 304 and response.headers["cache-control"] == "public, no-cache"
+
+    client.post("/api/v1/regions", json={"name": "South", "code": "S"})
+    response = client.get("/api/v1/regions", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and len(response.json()) == 2
+
+
+@pytest.mark.parametrize("path, create, update", [
+    ("/api/v1/regions", {"name": "North", "code": "N"}, {"name": "Northern"}),
+    ("/api/v1/rental-periods", {"name": "Daily", "days": 1}, {"name": "Day"}),
+    ("/api/v1/attributes", {"name": "Color", "type": "text"}, {"name": "Colour"}),
+    ("/api/v1/products", {"name": "Tent", "sku": "TENT"}, {"name": "Big tent"}),
+])
+def test_list_etag_changes_on_an_update_within_the_same_second(client, path, create, update):
+    row = client.post(path, json=create).json()
+    etag = client.get(path).headers["etag"]
+
+    # updated_at has one-second resolution on SQLite, so the version must not rely on it
+    client.put(f"{path}/{row['id']}", json=update)
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()[0]["name"] == update["name"]
+
+
+def test_collection_versions_bump_once_per_transaction(client, db):
+    def versions():
+        db.expire_all()
+        return dict(db.query(CollectionVersion.table_name, CollectionVersion.version).all())
+
+    db.add_all([Region(name=f"Region {i}", code=f"R{i}") for i in range(20)])
+    db.add(RentalPeriod(name="Daily", days=1))
+    db.commit()
+    before = versions()
+    assert (before["regions"], before["rental_periods"]) == (1, 1)
+
+    # Many rows and several flushes in one transaction still cost one bump
+    for region in db.query(Region).all():
+        region.name += " updated"
+        db.flush()
+    db.commit()
+    assert versions()["regions"] == before["regions"] + 1
+
+    # Rolled back writes leave the version alone
+    db.add(Region(name="Gone", code="G"))
+    db.flush()
+    db.rollback()
+    assert versions()["regions"] == before["regions"] + 1
+
+    # Core DML through the session counts too, and so do rows the database deletes
+    # through a cascade
+    product = client.post("/api/v1/products", json={"name": "Tent", "sku": "TENT"}).json()
+    region_id, period_id = db.query(Region.id).first()[0], db.query(RentalPeriod.id).scalar()
+    rows = [{"product_id": product["id"], "region_id": region_id, "rental_period_id": period_id, "price": "5"}]
+    assert client.post("/api/v1/pricing/bulk", json=rows).json()["upserted"] == 1
+    priced = versions()["product_pricing"]
+    db.execute(delete(Region).where(Region.id == region_id))
+    db.commit()
+    assert versions()["product_pricing"] == priced + 1
@@ -0,0 +1,61 @@
+import os
+import sqlite3
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import desc, select
+
+from app.models.attribute import AttributeValue
+from app.models.product import Product
+from app.models.product_pricing import ProductPricing
+from app.models.rental_transaction import RentalTransaction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _plan(db, statement) -> str:
+    sql = statement.compile(bind=db.get_bind(), compile_kwargs={"literal_binds": True})
+    return " | ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+@pytest.mark.parametrize("statement, index", [
+    (select(Product).where(Product.name == "Tent"), "ix_products_name"),
+    (select(ProductPricing).where(ProductPricing.region_id == 1, ProductPricing.rental_period_id == 2),
+     "ix_product_pricing_region_period"),
+    (select(ProductPricing.id).where(ProductPricing.rental_period_id == 2), "ix_product_pricing_rental_period"),
+    (select(RentalTransaction).order_by(desc(RentalTransaction.created_at), desc(RentalTransaction.id)).limit(50),
+     "ix_rental_transactions_created"),
+    (select(AttributeValue).where(AttributeValue.attribute_id == 1, AttributeValue.value == "Red"),
+     "ix_attribute_values_attribute_value"),
+])
+def test_hot_lookups_use_an_index(db, statement, index):
+    assert index in _plan(db, statement)
+
+
+def _config(path) -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+    return config
+
+
+def test_migrations_match_the_models(tmp_path):
+    config = _config(tmp_path / "migrated.db")
+    command.upgrade(config, "head")
+    # Raises when autogenerate finds differences between the migrated schema and the models
+    command.check(config)
+
+
+def test_upgrading_a_stamped_database_adds_the_search_index(tmp_path):
+    # Revision 0001 stands for the tables a pre-migration database already has, so it
+    # must not carry the search index those databases may lack
+    config = _config(tmp_path / "stamped.db")
+    command.upgrade(config, "0001")
+    with sqlite3.connect(tmp_path / "stamped.db") as connection:
+        assert connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'").fetchone() is None
+        connection.execute("INSERT INTO products (name, description, sku, is_active) VALUES ('Red tent', 'Sleeps four', 'TENT', 1)")
+
+    command.upgrade(config, "head")
+    with sqlite3.connect(tmp_path / "stamped.db") as connection:
+        assert connection.execute("SELECT rowid FROM products_fts WHERE products_fts MATCH 'tent'").fetchall() == [(1,)]
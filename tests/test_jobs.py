@@ -0,0 +1,137 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job import Job, JobRow, JobStatus
+from app.models.product import Product
+from app.models.region import Region
+from app.models.rental_period import RentalPeriod
+from app.models.rental_transaction import RentalTransaction, TransactionStatus
+from app.models.revenue_rollup import RevenueRollup
+from app.services import product_import
+from app.services.jobs import JOB_HANDLERS, JobRunner, create_job, job_runner, run_job
+
+START = datetime(2024, 5, 30, 9, 0)
+
+
+def _wait(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_product_import_job_reports_progress_and_results(client, db, monkeypatch):
+    monkeypatch.setattr(product_import, "CHUNK_SIZE", 2)
+    rows = [{"sku": f"SKU-{i}", "name": f"Product {i}"} for i in range(5)] + [{"name": "No SKU"}]
+    response = client.post("/api/v1/products/bulk/jobs", json=rows)
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+
+    job = _wait(client, response.json()["id"])
+    assert job["status"] == "succeeded"
+    assert (job["completed"], job["total"]) == (6, 6)
+    assert job["result"]["counts"] == {"created": 5, "failed": 1}
+    assert [error["index"] for error in job["result"]["errors"]] == [5]
+    assert db.query(Product).count() == 5
+
+    assert client.get("/api/v1/jobs/999999").status_code == 404
+    assert client.post("/api/v1/products/bulk/jobs", content=b"{").status_code == 400
+
+
+def test_revenue_backfill_job(client, db):
+    product, region, rental_period = Product(name="Tent", sku="TENT"), Region(name="West", code="W"), RentalPeriod(name="Daily", days=1)
+    db.add_all([product, region, rental_period])
+    db.commit()
+    # Rows written around the ORM reach the rollups through a backfill
+    db.execute(RentalTransaction.__table__.insert(), [
+        {"product_id": product.id, "region_id": region.id, "rental_period_id": rental_period.id,
+         "customer_name": "Ada", "customer_email": "ada@example.com", "customer_address": "1 Main Street",
+         "start_date": START + timedelta(days=10 * i), "end_date": START + timedelta(days=10 * i + 1),
+         "price": Decimal("12.25"), "status": TransactionStatus.CONFIRMED}
+        for i in range(4)
+    ])
+    db.commit()
+
+    response = client.post("/api/v1/analytics/revenue/backfill", params={"window_days": 7})
+    assert response.status_code == 202
+    job = _wait(client, response.json()["id"])
+    assert job["status"] == "succeeded"
+    assert (job["completed"], job["total"]) == (5, 5)
+    assert job["result"] == {"transactions": 4}
+    assert db.query(RevenueRollup).count() == 4
+
+
+def _running_import(db, rows, claim):
+    # Created as running and without a heartbeat, so the app's runner leaves it alone
+    job = Job(type="product_import", params={}, state={}, result={}, total=len(rows), status=JobStatus.RUNNING, claim=claim)
+    db.add(job)
+    db.flush()
+    db.add_all([JobRow(job_id=job.id, index=index, data=row) for index, row in enumerate(rows)])
+    db.commit()
+    return job
+
+
+def test_stopped_job_resumes_after_its_last_chunk(client, db, monkeypatch):
+    monkeypatch.setattr(product_import, "CHUNK_SIZE", 2)
+    job = _running_import(db, [{"sku": f"SKU-{i}", "name": f"Product {i}"} for i in range(6)], "first")
+
+    # Stopping finishes the current chunk and hands the job back to the queue
+    stopping = threading.Event()
+    stopping.set()
+    assert run_job(db, job.id, "first", stopping) == JobStatus.PENDING
+    db.refresh(job)
+    assert (job.state, job.completed) == ({"next_row": 2}, 2)
+
+    # A job left running by a crashed process is claimed once its heartbeat is stale
+    db.query(Product).delete()
+    job.status = JobStatus.RUNNING
+    job.heartbeat_at = datetime.utcnow() - timedelta(seconds=job_runner.stale_after + 1)
+    db.commit()
+    job_runner.wake()
+
+    finished = _wait(client, job.id)
+    assert finished["status"] == "succeeded"
+    assert finished["result"]["counts"] == {"created": 6}
+    # Rows committed before the stop are not imported again
+    assert sorted(sku for (sku,) in db.query(Product.sku)) == [f"SKU-{i}" for i in range(2, 6)]
+    # Staged input goes away with the finished job
+    assert db.query(JobRow).filter_by(job_id=job.id).count() == 0
+
+
+def test_reclaimed_job_rejects_the_previous_runner(client, db):
+    job = _running_import(db, [{"sku": "SKU-1", "name": "Product 1"}], "new-owner")
+
+    assert run_job(db, job.id, "old-owner") is None
+    db.refresh(job)
+    assert (job.status, job.completed, job.state) == (JobStatus.RUNNING, 0, {})
+
+
+def test_heartbeat_outlives_a_chunk_longer_than_the_stale_timeout(db, monkeypatch):
+    runs = []
+
+    def slow_chunk(chunk_db, context):
+        runs.append(context.completed)
+        time.sleep(0.6)
+        context.completed += 1
+        return context.completed == 2
+
+    monkeypatch.setitem(JOB_HANDLERS, "slow", slow_chunk)
+    runner = JobRunner(workers=2, poll_interval=0.05, stale_after=0.3, session_factory=sessionmaker(bind=db.get_bind()))
+    job = create_job(db, "slow", {})
+    runner.start()
+    try:
+        deadline = time.monotonic() + 10
+        while db.get(Job, job.id).status != JobStatus.SUCCEEDED and time.monotonic() < deadline:
+            time.sleep(0.05)
+            db.expire_all()
+    finally:
+        runner.stop()
+    # Without heartbeats during the chunks, the poller would have claimed the job again
+    assert db.get(Job, job.id).status == JobStatus.SUCCEEDED
+    assert runs == [0, 1]
@@ -0,0 +1,59 @@
+import re
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.instrumentation import RequestStats, _request_stats
+
+
+def test_server_timing_reports_query_count_and_db_time(client, db):
+    response = client.get("/api/v1/products/1")
+    assert response.status_code == 404
+
+    timing = response.headers["server-timing"]
+    assert re.search(r'db;desc="1 queries";dur=[\d.]+', timing)
+    assert "db-slowest;dur=" in timing and "app;dur=" in timing
+
+
+def test_failing_statements_do_not_skew_later_timings(db):
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        connection = db.connection()
+        info = dict(connection.info)
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM no_such_table"))
+            db.rollback()
+            connection = db.connection()
+        connection.execute(text("SELECT 1"))
+    finally:
+        _request_stats.reset(token)
+    # Only the statement that ran is recorded, and the pooled connection keeps no start times
+    assert stats.query_count == 1 and stats.slowest_statement == "SELECT 1"
+    assert connection.info == info
+
+
+def test_prometheus_metrics_include_per_route_histograms(client, db):
+    client.get("/api/v1/products/1")
+    client.get("/api/v1/products/2")
+    client.get("/no-such-path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE http_request_db_queries histogram" in body
+    count = re.search(r'http_request_db_queries_count\{method="GET",route="/api/v1/products/\{product_id\}"\} (\d+)', body)
+    assert count and int(count.group(1)) >= 2
+    assert 'route="unmatched"' in body
+    # Running totals are counters, so rate() survives restarts; current values stay gauges
+    assert "# TYPE db_pool_sync_total counter" in body
+    assert 'db_pool_sync_total{stat="checkouts"}' in body
+    assert 'db_pool_sync_total{stat="wait_seconds"}' in body
+    assert "# TYPE cache_pricing_total counter" in body
+    assert 'cache_pricing_total{stat="hits"}' in body
+    assert "# TYPE cache_pricing gauge" in body
+    assert 'cache_pricing{stat="entries"}' in body
+    assert 'cache_pricing{stat="hits"}' not in body
@@ -0,0 +1,152 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.product import Product
+from app.models.product_pricing import ProductPricing
+from app.models.region import Region
+from app.models.rental_period import RentalPeriod
+from app.services import upsert
+
+
+@pytest.fixture
+def references(db):
+    products = [Product(name=f"Product {i}", sku=f"SKU-{i}") for i in range(3)]
+    region = Region(name="West", code="W")
+    rental_periods = [RentalPeriod(name="Daily", days=1), RentalPeriod(name="Weekly", days=7)]
+    db.add_all([*products, region, *rental_periods])
+    db.commit()
+    return {
+        "products": [product.id for product in products],
+        "region": region.id,
+        "rental_periods": [rental_period.id for rental_period in rental_periods],
+    }
+
+
+def test_bulk_pricing_upserts_json_rows_and_reports_errors(client, db, references):
+    product_id = references["products"][0]
+    db.add(ProductPricing(product_id=product_id, region_id=references["region"], rental_period_id=references["rental_periods"][0], price=Decimal("1.00")))
+    db.commit()
+
+    rows = [
+        {"product_id": product_id, "region_id": references["region"], "rental_period_id": references["rental_periods"][0], "price": "5.50"},
+        {"product_id": product_id, "region_id": references["region"], "rental_period_id": references["rental_periods"][1], "price": "30"},
+        {"product_id": 999, "region_id": references["region"], "rental_period_id": references["rental_periods"][1], "price": "30"},
+        {"product_id": product_id, "region_id": references["region"], "price": "30"},
+    ]
+    response = client.post("/api/v1/pricing/bulk", json=rows)
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["received"], result["upserted"], result["failed"]) == (4, 2, 2)
+    assert [error["index"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["detail"] == "Product not found"
+
+    prices = client.get("/api/v1/pricing", params={"product_id": product_id}).json()
+    assert sorted(price["price"] for price in prices) == ["30.00", "5.50"]
+
+
+def test_bulk_pricing_accepts_csv_uploads(client, references):
+    lines = ["product_id,region_id,rental_period_id,price,is_active"]
+    for product_id in references["products"]:
+        for rental_period_id in references["rental_periods"]:
+            lines.append(f"{product_id},{references['region']},{rental_period_id},{rental_period_id * 10},")
+    lines.append(f"{references['products'][0]},{references['region']},{references['rental_periods'][0]},99,false")
+    content = "\n".join(lines).encode()
+
+    response = client.post("/api/v1/pricing/bulk", files={"file": ("pricing.csv", content, "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["upserted"] == 6
+
+    response = client.post("/api/v1/pricing/bulk", content=content, headers={"content-type": "text/csv"})
+    assert response.json()["failed"] == 0
+
+    prices = client.get("/api/v1/pricing", params={"product_id": references["products"][0], "rental_period_id": references["rental_periods"][0]}).json()
+    assert prices[0]["price"] == "99.00" and prices[0]["is_active"] is False
+
+
+def test_bulk_pricing_rejects_dialects_without_an_upsert(client, db, references, monkeypatch):
+    monkeypatch.delitem(upsert.UPSERT_INSERTS, "sqlite")
+    row = {"product_id": references["products"][0], "region_id": references["region"], "rental_period_id": references["rental_periods"][0], "price": "5"}
+    response = client.post("/api/v1/pricing/bulk", json=[row])
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Bulk pricing upsert is not supported on sqlite"
+    assert db.query(ProductPricing).count() == 0
+
+
+def test_pricing_lookup_by_combination_is_cached_until_updated(client, references, count_queries):
+    params = {"product_id": references["products"][0], "region_id": references["region"], "rental_period_id": references["rental_periods"][0]}
+    assert client.get("/api/v1/pricing", params=params).json() == []
+
+    pricing = client.post("/api/v1/pricing", json={**params, "price": "12.00"}).json()
+    assert [row["id"] for row in client.get("/api/v1/pricing", params=params).json()] == [pricing["id"]]
+
+    with count_queries() as statements:
+        rows = client.get("/api/v1/pricing", params=params).json()
+    assert statements == []
+    assert rows[0]["price"] == "12.00"
+
+    client.put(f"/api/v1/pricing/{pricing['id']}", json={"price": "15.00"})
+    assert client.get("/api/v1/pricing", params=params).json()[0]["price"] == "15.00"
+    assert client.get("/api/v1/pricing", params={**params, "min_price": 20}).json() == []
+
+    client.delete(f"/api/v1/pricing/{pricing['id']}")
+    assert client.get("/api/v1/pricing", params=params).json() == []
+
+    stats = client.get("/metrics/cache").json()["pricing"]
+    assert stats["hits"] >= 2 and stats["misses"] >= 3
+
+
+def test_region_price_matrix_is_columnar_and_exports_csv(client, db, references, count_queries):
+    daily, weekly = references["rental_periods"]
+    first, second, _ = references["products"]
+    db.add_all([
+        ProductPricing(product_id=first, region_id=references["region"], rental_period_id=weekly, price=Decimal("50.00")),
+        ProductPricing(product_id=first, region_id=references["region"], rental_period_id=daily, price=Decimal("10.00")),
+        ProductPricing(product_id=second, region_id=references["region"], rental_period_id=weekly, price=Decimal("45.50")),
+    ])
+    db.commit()
+
+    url = f"/api/v1/regions/{references['region']}/price-matrix"
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200
+    # Region check, the table versions and the matrix itself, however many rows
+    assert len(statements) == 3
+    assert response.json() == {
+        "region_id": references["region"],
+        "product_ids": [first, second],
+        "product_names": ["Product 0", "Product 1"],
+        "product_skus": ["SKU-0", "SKU-1"],
+        "period_ids": [daily, weekly],
+        "period_names": ["Daily", "Weekly"],
+        "period_days": [1, 7],
+        "prices": [10.0, 50.0, None, 45.5],
+    }
+    etag = response.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.get(url, params={"format": "csv"})
+    csv_etag = response.headers["etag"]
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines() == [
+        "product_id,sku,name,Daily,Weekly",
+        f"{first},SKU-0,Product 0,10.00,50.00",
+        f"{second},SKU-1,Product 1,,45.50",
+    ]
+
+    # A price edit in the same second as the last write still changes the ETag
+    pricing_id = db.query(ProductPricing.id).filter_by(product_id=second).scalar()
+    client.put(f"/api/v1/pricing/{pricing_id}", json={"price": "47.00"})
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
+    assert response.json()["prices"][3] == 47.0
+    csv = client.get(url, params={"format": "csv"}, headers={"If-None-Match": csv_etag})
+    assert csv.status_code == 200 and csv.text.splitlines()[2] == f"{second},SKU-1,Product 1,,47.00"
+
+    # Cells cannot tell active prices from inactive ones, so they are never mixed
+    client.put(f"/api/v1/pricing/{pricing_id}", json={"is_active": False})
+    assert client.get(url).json()["prices"] == [10.0, 50.0]
+    inactive = client.get(url, params={"is_active": "false"}).json()
+    assert (inactive["product_ids"], inactive["period_ids"], inactive["prices"]) == ([second], [weekly], [47.0])
+
+    assert client.get("/api/v1/regions/999/price-matrix").status_code == 404
@@ -0,0 +1,263 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.models.attribute import Attribute, AttributeValue
+from app.models.product import Product
+from app.models.product_attribute_value import ProductAttributeValue
+from app.models.product_document import ProductDocument
+from app.models.product_pricing import ProductPricing
+from app.models.region import Region
+from app.models.rental_period import RentalPeriod
+from app.services.product_documents import document_writer
+
+
+@pytest.fixture
+def detailed_product(db):
+    product = Product(name="Tent", sku="TENT-1", description="Four person tent")
+    regions = [Region(name=f"Region {i}", code=f"R{i}") for i in range(5)]
+    rental_periods = [RentalPeriod(name=f"{days} days", days=days) for days in (1, 7, 30)]
+    attributes = [Attribute(name=f"Attribute {i}", type="text") for i in range(4)]
+    db.add_all([product, *regions, *rental_periods, *attributes])
+    db.commit()
+
+    values = [AttributeValue(attribute_id=attribute.id, value=f"Value {i}") for attribute in attributes for i in range(5)]
+    db.add_all(values)
+    db.commit()
+
+    db.add_all([ProductAttributeValue(product_id=product.id, attribute_value_id=value.id) for value in values])
+    db.add_all([
+        ProductPricing(product_id=product.id, region_id=region.id, rental_period_id=rental_period.id, price=Decimal("10.00"))
+        for region in regions
+        for rental_period in rental_periods
+    ])
+    db.commit()
+    return product.id
+
+
+def test_read_product_returns_attribute_and_pricing_graph(client, detailed_product):
+    response = client.get(f"/api/v1/products/{detailed_product}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sku"] == "TENT-1"
+    assert len(data["attribute_values"]) == 20
+    assert len(data["pricing"]) == 15
+    assert {"id", "name", "type"} <= set(data["attribute_values"][0]["attribute"])
+    assert {"id", "name", "code"} <= set(data["pricing"][0]["region"])
+    assert {"id", "name", "days"} <= set(data["pricing"][0]["rental_period"])
+
+
+def test_read_product_query_count_does_not_grow_with_relationships(client, detailed_product, count_queries):
+    with count_queries() as statements:
+        response = client.get(f"/api/v1/products/{detailed_product}")
+        document_writer.flush()
+    assert response.status_code == 200
+    # Document lookup, product, attribute values (with attributes) and pricing (with
+    # regions and periods). The read itself writes nothing: the built document is
+    # stored afterwards by the background writer, conditional on its version
+    assert [statement.split()[0] for statement in statements] == ["SELECT"] * 4 + ["UPDATE"]
+
+    # Later reads serve the stored document
+    with count_queries() as statements:
+        assert client.get(f"/api/v1/products/{detailed_product}").json() == response.json()
+    assert len(statements) == 1
+
+
+def test_product_document_is_rebuilt_after_related_writes(client, db, detailed_product):
+    url = f"/api/v1/products/{detailed_product}"
+    product = client.get(url).json()
+    region_id = product["pricing"][0]["region"]["id"]
+    attribute_id = product["attribute_values"][0]["attribute"]["id"]
+    rental_period_id = product["pricing"][0]["rental_period"]["id"]
+
+    client.put(f"/api/v1/regions/{region_id}", json={"name": "Renamed region"})
+    client.put(f"/api/v1/attributes/{attribute_id}", json={"name": "Renamed attribute"})
+    client.put(f"/api/v1/rental-periods/{rental_period_id}", json={"name": "Fortnight", "days": 14})
+    product = client.get(url).json()
+    assert product["pricing"][0]["region"]["name"] == "Renamed region"
+    assert product["attribute_values"][0]["attribute"]["name"] == "Renamed attribute"
+    assert product["pricing"][0]["rental_period"]["name"] == "Fortnight"
+
+    # Core bulk writes bypass the ORM but not the triggers
+    client.post("/api/v1/pricing/bulk", json=[
+        {"product_id": detailed_product, "region_id": region_id, "rental_period_id": rental_period_id, "price": "99.00"},
+    ])
+    assert 99.0 in {price["price"] for price in client.get(url).json()["pricing"]}
+
+
+def test_product_document_built_before_a_write_is_not_stored(client, db, detailed_product):
+    url = f"/api/v1/products/{detailed_product}"
+    client.get(url)
+    document_writer.flush()
+    version = db.query(ProductDocument.version).filter_by(product_id=detailed_product).scalar()
+
+    # A read that built its document before this write hands it over too late
+    client.put(url, json={"name": "Bigger tent"})
+    document_writer.submit(detailed_product, version, ('{"name": "Tent"}', '"stale"', None))
+    document_writer.flush()
+    assert client.get(url).json()["name"] == "Bigger tent"
+
+    document_writer.flush()
+    db.expire_all()
+    stored = db.get(ProductDocument, detailed_product)
+    assert stored.version > version and '"Bigger tent"' in stored.body
+
+
+def test_read_product_not_found(client, db):
+    assert client.get("/api/v1/products/999").status_code == 404
+
+
+@pytest.fixture
+def faceted_catalog(db):
+    color = Attribute(name="Color", type="text", is_filterable=True)
+    size = Attribute(name="Size", type="text", is_filterable=True)
+    brand = Attribute(name="Brand", type="text")
+    db.add_all([color, size, brand])
+    db.commit()
+    values = {
+        name: AttributeValue(attribute_id=attribute.id, value=name)
+        for attribute, names in ((color, ("red", "blue")), (size, ("S", "L")), (brand, ("Acme",)))
+        for name in names
+    }
+    db.add_all(values.values())
+    products = {
+        sku: Product(name=sku, sku=sku, is_active=sku != "blue-L")
+        for sku in ("red-S", "red-L", "blue-S", "blue-L")
+    }
+    db.add_all(products.values())
+    db.commit()
+    db.add_all([
+        ProductAttributeValue(product_id=product.id, attribute_value_id=values[name].id)
+        for sku, product in products.items()
+        for name in (*sku.split("-"), "Acme")
+    ])
+    db.commit()
+    return {name: value.id for name, value in values.items()}
+
+
+def _facet_counts(body):
+    return {value["value"]: value["count"] for facet in body["facets"] for value in facet["values"]}
+
+
+def test_search_products_combines_attribute_filters_and_counts_facets(client, faceted_catalog):
+    values = faceted_catalog
+    body = client.get("/api/v1/products/search").json()
+    assert body["total"] == 4
+    assert _facet_counts(body) == {"red": 2, "blue": 2, "S": 2, "L": 2}
+
+    # OR within an attribute, AND across attributes
+    body = client.get("/api/v1/products/search", params={"attribute_value_ids": [values["red"], values["blue"], values["L"]]}).json()
+    assert sorted(item["sku"] for item in body["items"]) == ["blue-L", "red-L"]
+    # Counts of an attribute ignore its own selection
+    assert _facet_counts(body) == {"red": 1, "blue": 1, "S": 2, "L": 2}
+
+    body = client.get("/api/v1/products/search", params={"attribute_value_ids": [values["L"]], "is_active": True}).json()
+    assert [item["sku"] for item in body["items"]] == ["red-L"]
+
+    response = client.get("/api/v1/products/search", params={"attribute_value_ids": [values["Acme"]]})
+    assert response.status_code == 400
+
+
+def test_search_products_reflects_product_writes(client, faceted_catalog):
+    params = {"attribute_value_ids": [faceted_catalog["red"]], "limit": 1}
+    body = client.get("/api/v1/products/search", params=params).json()
+    assert body["total"] == 2 and len(body["items"]) == 1
+
+    product_id = body["items"][0]["id"]
+    client.put(f"/api/v1/products/{product_id}", json={"is_active": False})
+    assert client.get("/api/v1/products/search", params={**params, "is_active": True}).json()["total"] == 1
+
+    created = client.post("/api/v1/products", json={"name": "Plain", "sku": "PLAIN-1"}).json()
+    body = client.get("/api/v1/products/search", params={"is_active": True}).json()
+    assert body["total"] == 3 and created["id"] in [item["id"] for item in body["items"]]
+
+    client.delete(f"/api/v1/products/{created['id']}")
+    assert client.get("/api/v1/products/search", params={"is_active": True}).json()["total"] == 2
+
+
+def test_bulk_products_upsert_on_sku_and_stream_results(client, faceted_catalog):
+    search = {"attribute_value_ids": [faceted_catalog["red"]]}
+    assert client.get("/api/v1/products/search", params=search).json()["total"] == 2
+
+    rows = [
+        {"sku": "red-S", "name": "red-S", "is_active": False, "attribute_value_ids": [faceted_catalog["blue"]]},
+        {"sku": "NEW-1", "name": "Lantern", "attribute_value_ids": [faceted_catalog["red"], faceted_catalog["L"]]},
+        {"sku": "NEW-2", "name": "red-L"},
+        {"sku": "NEW-3", "name": "Stove", "attribute_value_ids": [999999]},
+        {"name": "No SKU"},
+        {"sku": "NEW-1", "name": "Lantern XL", "attribute_value_ids": [faceted_catalog["red"]]},
+    ]
+    response = client.post("/api/v1/products/bulk", json=rows)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["status"] for result in results] == ["updated", "skipped", "failed", "failed", "failed", "created"]
+    assert results[2]["detail"] == "Product with this name already exists."
+    assert "999999" in results[3]["detail"]
+
+    lantern = client.get(f"/api/v1/products/{results[5]['id']}").json()
+    assert lantern["name"] == "Lantern XL"
+    assert [value["value"] for value in lantern["attribute_values"]] == ["red"]
+    updated = client.get(f"/api/v1/products/{results[0]['id']}").json()
+    assert updated["is_active"] is False
+    assert [value["value"] for value in updated["attribute_values"]] == ["blue"]
+
+    # The facet index and the full-text index follow the bulk write
+    body = client.get("/api/v1/products/search", params=search).json()
+    assert sorted(item["sku"] for item in body["items"]) == ["NEW-1", "red-L"]
+    assert [product["sku"] for product in client.get("/api/v1/products", params={"q": "lantern"}).json()] == ["NEW-1"]
+
+    ndjson = '{"sku": "NEW-4", "name": "Tarp"}\nnot json\n'
+    response = client.post("/api/v1/products/bulk", content=ndjson, headers={"content-type": "application/x-ndjson"})
+    assert [json.loads(line)["status"] for line in response.text.splitlines()] == ["created", "failed"]
+    assert client.post("/api/v1/products/bulk", json={"sku": "X"}).status_code == 400
+
+
+def test_full_text_search_matches_prefixes_and_ranks_name_matches_first(client, db):
+    db.add_all([
+        Product(name="Camping stove", sku="STOVE-1", description="Compact burner for trips"),
+        Product(name="Tent", sku="TENT-2", description="Lightweight camping shelter"),
+        Product(name="Kayak", sku="KAYAK-1", description="Two person sea kayak"),
+    ])
+    db.commit()
+
+    skus = [product["sku"] for product in client.get("/api/v1/products", params={"q": "camp"}).json()]
+    assert skus == ["STOVE-1", "TENT-2"]
+
+    skus = [product["sku"] for product in client.get("/api/v1/products", params={"q": "light camp"}).json()]
+    assert skus == ["TENT-2"]
+
+    kayak_id = db.query(Product.id).filter(Product.sku == "KAYAK-1").scalar()
+    client.put(f"/api/v1/products/{kayak_id}", json={"description": "Camping kayak"})
+    skus = [product["sku"] for product in client.get("/api/v1/products", params={"q": "camping"}).json()]
+    assert sorted(skus) == ["KAYAK-1", "STOVE-1", "TENT-2"]
+
+    assert client.get("/api/v1/products", params={"q": "\"camp*"}).status_code == 200
+
+
+def test_read_product_answers_not_modified_until_it_changes(client, detailed_product):
+    url = f"/api/v1/products/{detailed_product}"
+    response = client.get(url)
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b"" and not_modified.headers["etag"] == etag
+    assert client.get(url, headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    client.put(url, json={"name": "Bigger tent"})
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_read_products_list_etag_tracks_table_and_query(client, db):
+    db.add(Product(name="Tent", sku="TENT-3"))
+    db.commit()
+    etag = client.get("/api/v1/products", params={"limit": 10}).headers["etag"]
+
+    assert client.get("/api/v1/products", params={"limit": 10}, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/v1/products", params={"limit": 5}, headers={"If-None-Match": etag}).status_code == 200
+
+    client.post("/api/v1/products", json={"name": "Stove", "sku": "STOVE-2"})
+    assert client.get("/api/v1/products", params={"limit": 10}, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,105 @@
+import itertools
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.models.product import Product
+from app.models.product_pricing import ProductPricing
+from app.models.region import Region
+from app.models.rental_period import RentalPeriod
+from app.services.quotes import cheapest_plans
+
+START = datetime(2024, 6, 1, 10, 0)
+
+
+def test_cheapest_plans_match_brute_force():
+    rng = random.Random(7)
+    lengths = [30, 7, 3, 1]
+    sheets = [[rng.choice([None, rng.randint(1, 400)]) for _ in lengths] for _ in range(40)]
+    for days in (1, 6, 17, 45):
+        plans = cheapest_plans(days, lengths, sheets)
+        for sheet, plan in zip(sheets, plans):
+            offered = [p for p, price in enumerate(sheet) if price is not None]
+            best = None
+            for quantities in itertools.product(*(range(days // lengths[p] + 2) for p in offered)):
+                if sum(lengths[p] * q for p, q in zip(offered, quantities)) >= days:
+                    total = sum(sheet[p] * q for p, q in zip(offered, quantities))
+                    best = total if best is None else min(best, total)
+            if best is None:
+                assert plan is None
+            else:
+                total, quantities = plan
+                assert total == best
+                assert sum(sheet[p] * q for p, q in enumerate(quantities) if q) == total
+                assert sum(length * q for length, q in zip(lengths, quantities)) >= days
+
+
+def test_quote_combines_periods_for_many_products(client, db):
+    products = [Product(name=f"Product {i}", sku=f"SKU-{i}") for i in range(3)]
+    inactive = Product(name="Retired", sku="SKU-R", is_active=False)
+    region = Region(name="West", code="W")
+    daily, weekly, monthly = RentalPeriod(name="Daily", days=1), RentalPeriod(name="Weekly", days=7), RentalPeriod(name="Monthly", days=30)
+    db.add_all([*products, inactive, region, daily, weekly, monthly])
+    db.commit()
+    for product in products[:2]:
+        db.add_all([
+            ProductPricing(product_id=product.id, region_id=region.id, rental_period_id=daily.id, price=Decimal("10.00")),
+            ProductPricing(product_id=product.id, region_id=region.id, rental_period_id=weekly.id, price=Decimal("50.00")),
+            ProductPricing(product_id=product.id, region_id=region.id, rental_period_id=monthly.id, price=Decimal("150.00")),
+        ])
+    db.commit()
+
+    response = client.post("/api/v1/quotes", json={
+        "product_ids": [products[1].id, products[2].id, 999, inactive.id, products[0].id],
+        "region_id": region.id,
+        "start_date": START.isoformat(),
+        "end_date": (START + timedelta(days=16, hours=2)).isoformat(),
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["days"] == 17
+    quotes = body["quotes"]
+    assert [quote["product_id"] for quote in quotes] == [products[1].id, products[2].id, 999, inactive.id, products[0].id]
+    # Two weeks and three days beat three weeks or a month
+    assert quotes[0]["priced"] and Decimal(quotes[0]["total"]) == Decimal("130.00")
+    assert [(line["name"], line["quantity"], Decimal(line["subtotal"])) for line in quotes[0]["lines"]] == [
+        ("Weekly", 2, Decimal("100.00")), ("Daily", 3, Decimal("30.00")),
+    ]
+    assert quotes[0]["days_covered"] == 17
+    assert quotes[4]["total"] == quotes[0]["total"]
+    assert [quote["priced"] for quote in quotes[1:4]] == [False, False, False]
+    assert quotes[2]["message"] == "Product not found"
+
+    # A week is cheaper than six single days, even though it covers more
+    response = client.post("/api/v1/quotes", json={
+        "product_ids": [products[0].id], "region_id": region.id,
+        "start_date": START.isoformat(), "end_date": (START + timedelta(days=6)).isoformat(),
+    })
+    quote = response.json()["quotes"][0]
+    assert Decimal(quote["total"]) == Decimal("50.00") and quote["days_covered"] == 7
+
+    response = client.post("/api/v1/quotes", json={
+        "product_ids": [products[0].id], "region_id": region.id,
+        "start_date": START.isoformat(), "end_date": START.isoformat(),
+    })
+    assert response.status_code == 400
+
+
+def test_quote_accepts_dates_with_and_without_a_timezone(client, db):
+    product, region, daily = Product(name="Tent", sku="TENT"), Region(name="West", code="W"), RentalPeriod(name="Daily", days=1)
+    db.add_all([product, region, daily])
+    db.commit()
+    db.add(ProductPricing(product_id=product.id, region_id=region.id, rental_period_id=daily.id, price=Decimal("10.00")))
+    db.commit()
+
+    for start, end, days in (
+        ("2024-06-01T10:00:00Z", "2024-06-03T10:00:00", 2),
+        ("2024-06-01T10:00:00", "2024-06-03T10:00:00+00:00", 2),
+        # 13:00 at UTC+2 is 11:00 UTC, so this is two days and an hour
+        ("2024-06-01T10:00:00", "2024-06-03T13:00:00+02:00", 3),
+    ):
+        response = client.post("/api/v1/quotes", json={
+            "product_ids": [product.id], "region_id": region.id, "start_date": start, "end_date": end,
+        })
+        assert response.status_code == 200
+        assert response.json()["days"] == days
@@ -0,0 +1,214 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+import pytest
+
+from app.main import app
+
+from app.models.product import Product
+from app.models.region import Region
+from app.models.rental_period import RentalPeriod
+from app.models.product_pricing import ProductPricing
+from app.models.rental_transaction import RentalTransaction, TransactionStatus
+from app.services import booking
+from app.services.booking_index import BookingIndex, booking_index
+
+
+@pytest.fixture
+def catalog(db):
+    product = Product(name="Camera", sku="CAM-1")
+    region = Region(name="North", code="N")
+    rental_period = RentalPeriod(name="Weekly", days=7)
+    db.add_all([product, region, rental_period])
+    db.commit()
+    pricing = ProductPricing(product_id=product.id, region_id=region.id, rental_period_id=rental_period.id, price=Decimal("70.00"))
+    db.add(pricing)
+    db.commit()
+    return {"product": product.id, "region": region.id, "rental_period": rental_period.id, "pricing": pricing.id}
+
+
+def _booking(catalog, start, end):
+    return {
+        "product_id": catalog["product"],
+        "region_id": catalog["region"],
+        "rental_period_id": catalog["rental_period"],
+        "customer_name": "Jane Doe",
+        "customer_email": "jane@example.com",
+        "customer_address": "1 Main Street",
+        "start_date": start,
+        "end_date": end,
+        "price": "70.00",
+    }
+
+
+def _check(catalog, start, end):
+    return {
+        "product_id": catalog["product"],
+        "region_id": catalog["region"],
+        "rental_period_id": catalog["rental_period"],
+        "pricing_id": catalog["pricing"],
+        "start_date": start,
+        "end_date": end,
+    }
+
+
+def test_booking_index_overlaps_matches_inclusive_sql_semantics(db, catalog):
+    db.add_all([
+        RentalTransaction(**{**_booking(catalog, datetime(2030, 1, 1), datetime(2030, 1, 20)), "price": Decimal("70")}),
+        RentalTransaction(**{**_booking(catalog, datetime(2030, 1, 5), datetime(2030, 1, 6)), "price": Decimal("70")}),
+        RentalTransaction(**{**_booking(catalog, datetime(2030, 3, 1), datetime(2030, 3, 2)), "price": Decimal("70"), "status": TransactionStatus.CANCELLED}),
+    ])
+    db.commit()
+
+    index = BookingIndex()
+    assert index.overlaps(catalog["product"], datetime(2030, 1, 1), datetime(2030, 1, 2)) is None
+
+    index.load(db)
+    # The short booking is nested inside the long one, so only the running max end sees it
+    assert index.overlaps(catalog["product"], datetime(2030, 1, 10), datetime(2030, 1, 11)) is True
+    assert index.overlaps(catalog["product"], datetime(2030, 1, 20), datetime(2030, 1, 25)) is True
+    assert index.overlaps(catalog["product"], datetime(2030, 1, 21), datetime(2030, 2, 1)) is False
+    assert index.overlaps(catalog["product"], datetime(2030, 3, 1), datetime(2030, 3, 2)) is False
+    # Products without bookings are warm after a full load
+    assert index.overlaps(catalog["product"] + 1, datetime(2030, 1, 1), datetime(2030, 1, 2)) is False
+
+
+def test_booking_index_follows_status_changes_and_deletes(client, catalog):
+    booking = client.post("/api/v1/rental-transactions", json=_booking(catalog, "2030-05-01T00:00:00", "2030-05-08T00:00:00")).json()
+
+    response = client.post("/api/v1/check-rental", json=_check(catalog, "2030-05-03T00:00:00", "2030-05-04T00:00:00"))
+    assert response.json()["available"] is False
+    assert booking_index.is_warm(catalog["product"])
+
+    client.put(f"/api/v1/rental-transactions/{booking['id']}/status", params={"status": "cancelled"})
+    response = client.post("/api/v1/check-rental", json=_check(catalog, "2030-05-03T00:00:00", "2030-05-04T00:00:00"))
+    assert response.json()["available"] is True
+
+    client.put(f"/api/v1/rental-transactions/{booking['id']}/status", params={"status": "confirmed"})
+    client.put(f"/api/v1/rental-transactions/{booking['id']}", json={"start_date": "2030-06-01T00:00:00", "end_date": "2030-06-08T00:00:00"})
+    assert client.post("/api/v1/check-rental", json=_check(catalog, "2030-05-03T00:00:00", "2030-05-04T00:00:00")).json()["available"] is True
+    assert client.post("/api/v1/check-rental", json=_check(catalog, "2030-06-02T00:00:00", "2030-06-03T00:00:00")).json()["available"] is False
+
+    client.delete(f"/api/v1/rental-transactions/{booking['id']}")
+    assert client.post("/api/v1/check-rental", json=_check(catalog, "2030-06-02T00:00:00", "2030-06-03T00:00:00")).json()["available"] is True
+
+
+def test_check_rental_batch_keeps_input_order(client, catalog):
+    client.post("/api/v1/rental-transactions", json=_booking(catalog, "2030-05-01T00:00:00", "2030-05-08T00:00:00"))
+
+    response = client.post("/api/v1/check-rental/batch", json=[
+        _check(catalog, "2030-05-03T00:00:00", "2030-05-04T00:00:00"),
+        _check(catalog, "2030-07-01T00:00:00", "2030-07-02T00:00:00"),
+        {**_check(catalog, "2030-07-01T00:00:00", "2030-07-02T00:00:00"), "pricing_id": 999},
+        {**_check(catalog, "2030-07-01T00:00:00", None), "end_date": None},
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["available"] for result in results] == [False, True, False, True]
+    assert results[0]["message"] == "Product is already rented for the requested period"
+    assert results[1]["pricing"] == {"id": catalog["pricing"], "price": 70.0}
+    assert results[2]["message"] == "Pricing not found"
+
+
+def test_check_rental_batch_rejects_oversized_batches(client, catalog):
+    checks = [_check(catalog, "2030-07-01T00:00:00", "2030-07-02T00:00:00")] * 1001
+    response = client.post("/api/v1/check-rental/batch", json=checks)
+    assert response.status_code == 400
+
+
+def test_export_streams_filtered_ndjson_and_csv(client, catalog):
+    client.post("/api/v1/rental-transactions", json=_booking(catalog, "2030-05-01T00:00:00", "2030-05-08T00:00:00"))
+    client.post("/api/v1/rental-transactions", json={**_booking(catalog, "2030-06-01T00:00:00", "2030-06-08T00:00:00"), "customer_email": "sam@example.com"})
+
+    response = client.get("/api/v1/rental-transactions/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["customer_email"] for row in rows] == ["jane@example.com", "sam@example.com"]
+    assert rows[0]["price"] == "70.00" and rows[0]["status"] == "confirmed"
+
+    response = client.get("/api/v1/rental-transactions/export", params={"format": "csv", "customer_email": "sam"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["customer_email"] for row in rows] == ["sam@example.com"]
+    assert rows[0]["start_date"] == "2030-06-01T00:00:00"
+
+
+def test_concurrent_bookings_never_double_book(client, db, catalog):
+    # Many overlapping bookings race through separate connections; exactly one per
+    # disjoint window may win and the rest must be rejected, never double-booked
+    windows = [(datetime(2031, 1, 1), datetime(2031, 1, 10)), (datetime(2031, 2, 1), datetime(2031, 2, 10))]
+    payloads = [
+        _booking(catalog, start.isoformat(), end.isoformat())
+        for start, end in windows
+        for _ in range(12)
+    ]
+
+    async def race():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.post("/api/v1/rental-transactions", json=payload) for payload in payloads))
+
+    responses = asyncio.run(race())
+    assert sorted(response.status_code for response in responses) == [201, 201] + [400] * (len(payloads) - 2)
+
+    confirmed = db.query(RentalTransaction).filter(RentalTransaction.status == TransactionStatus.CONFIRMED).all()
+    assert sorted(transaction.start_date for transaction in confirmed) == [start for start, _ in windows]
+
+
+
+def test_booking_lock_falls_back_on_other_dialects(db, catalog, count_queries, monkeypatch, caplog):
+    dialect = db.get_bind().dialect
+    monkeypatch.setattr(dialect, "name", "other")
+    monkeypatch.setattr(booking, "_UNLOCKED_DIALECTS", set())
+    # Running the migrations in an earlier test disables the loggers that existed then
+    monkeypatch.setattr(booking.logger, "disabled", False)
+
+    # Row locks where the dialect has them
+    monkeypatch.setattr(dialect, "supports_for_update_of", True)
+    with count_queries() as statements:
+        booking.lock_product_bookings(db, catalog["product"])
+    assert [statement.split()[0] for statement in statements] == ["SELECT"]
+    db.rollback()
+
+    # Otherwise unlocked, with one warning rather than a failed write
+    monkeypatch.setattr(dialect, "supports_for_update_of", False)
+    with caplog.at_level(logging.WARNING, logger=booking.__name__), count_queries() as statements:
+        booking.lock_product_bookings(db, catalog["product"])
+        booking.lock_product_bookings(db, catalog["product"])
+    assert statements == []
+    assert len([record for record in caplog.records if "not locked on other" in record.getMessage()]) == 1
+
+def test_availability_merges_bookings_into_booked_and_free_intervals(client, db, catalog):
+    for start, end, status in (
+        (datetime(2030, 5, 3), datetime(2030, 5, 6), TransactionStatus.CONFIRMED),
+        (datetime(2030, 5, 5), datetime(2030, 5, 8), TransactionStatus.CONFIRMED),
+        (datetime(2030, 5, 12), datetime(2030, 5, 25), TransactionStatus.CONFIRMED),
+        (datetime(2030, 5, 9), datetime(2030, 5, 10), TransactionStatus.CANCELLED),
+    ):
+        db.add(RentalTransaction(**{**_booking(catalog, start, end), "price": Decimal("70"), "status": status}))
+    db.commit()
+
+    params = {"from": "2030-05-01T00:00:00", "to": "2030-05-20T00:00:00"}
+    body = client.get(f"/api/v1/products/{catalog['product']}/availability", params=params).json()
+    assert [(interval["start"][:10], interval["end"][:10]) for interval in body["booked"]] == [
+        ("2030-05-03", "2030-05-08"), ("2030-05-12", "2030-05-20"),
+    ]
+    assert [(interval["start"][:10], interval["end"][:10]) for interval in body["free"]] == [
+        ("2030-05-01", "2030-05-03"), ("2030-05-08", "2030-05-12"),
+    ]
+
+    other = client.post("/api/v1/products", json={"name": "Drone", "sku": "DRONE-1"}).json()
+    calendars = client.get("/api/v1/products/availability", params={**params, "product_ids": [other["id"], catalog["product"]]}).json()
+    assert [calendar["product_id"] for calendar in calendars] == [other["id"], catalog["product"]]
+    assert calendars[0]["booked"] == [] and len(calendars[0]["free"]) == 1
+    assert calendars[1]["booked"] == body["booked"]
+
+    assert client.get("/api/v1/products/999/availability", params=params).status_code == 404
+    assert client.get(f"/api/v1/products/{catalog['product']}/availability", params={"from": params["to"], "to": params["from"]}).status_code == 400